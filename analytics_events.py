@@ -0,0 +1,331 @@
+"""
+Analytics event pipeline for GreenThumb Goods
+This module emits the chatbot events specified in section5_google_analytics.md without blocking
+the chat: events are queued in memory, batched and gzip-compressed by a background thread, and
+sent to a collector when a batch fills up or a time limit passes. Batches the collector does not
+accept are spilled to a disk queue and replayed, oldest first, once it is reachable again.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+
+import requests
+
+from http_client import PooledHTTPClient
+
+# Events from the GA4 tracking plan (section5_google_analytics.md)
+CHAT_SESSION_INITIATED = "chat_session_initiated"
+COMPLEX_QUERY_IDENTIFIED = "complex_query_identified"
+PRODUCT_RECOMMENDATION_PROVIDED = "product_recommendation_provided"
+POLICY_INFORMATION_DELIVERED = "policy_information_delivered"
+USER_SATISFACTION_RATING = "user_satisfaction_rating"
+
+DEFAULT_SPOOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "analytics_spool")
+
+# Suffix of a spooled batch renamed by the process that is sending it ("<batch>.<pid>.sending")
+CLAIM_SUFFIX = ".sending"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _batch_events(name):
+    """Event count stored in a spooled batch's file name."""
+    return int(name.split("-")[1].split(".")[0])
+
+
+class _Flush:
+    """Queue marker asking the worker to send what it has and then signal done."""
+
+    def __init__(self, stop=False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class AnalyticsEmitter:
+    """
+    Non-blocking, batching analytics client.
+
+    emit() only appends to a bounded in-memory queue (events are dropped, and counted, if it is
+    full), so a chat turn never waits on the network. A worker thread sends gzip-compressed JSON
+    batches of up to batch_size events, at least every flush_interval seconds while events are
+    pending. When a send fails, the batch is written to spool_dir, further batches go straight
+    to disk during an exponential backoff, and spooled batches are replayed after the next success.
+    Several processes may share spool_dir: a batch is claimed by renaming it before it is sent, so
+    each one is replayed by a single process.
+
+    Args:
+        endpoint: Collector URL that accepts POSTed {"events": [...]} bodies
+        batch_size: Events per request
+        flush_interval: Seconds an event may wait for its batch to fill
+        max_queue: In-memory queue capacity
+        spool_dir: Directory for batches that could not be delivered (None to drop them instead)
+        max_spool_bytes: Oldest spooled batches are deleted beyond this size
+        http_client: Optional PooledHTTPClient (a non-retrying one with short timeouts by default)
+    """
+
+    def __init__(self, endpoint, batch_size=200, flush_interval=2.0, max_queue=10000, spool_dir=DEFAULT_SPOOL_DIR,
+                 max_spool_bytes=50 * 2 ** 20, http_client=None, retry_base=1.0, retry_cap=60.0):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir
+        self.max_spool_bytes = max_spool_bytes
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.http_client = http_client or PooledHTTPClient(pool_maxsize=2, timeout=(1.0, 5.0), max_retries=0)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._counts = {
+            "emitted": 0, "dropped": 0, "sent_events": 0, "sent_batches": 0, "failed_sends": 0,
+            "spooled_batches": 0, "replayed_batches": 0, "spool_evicted_batches": 0,
+            "raw_bytes": 0, "compressed_bytes": 0, "errors": 0
+        }
+        self._last_error = None
+        self._failures = 0
+        self._retry_at = 0.0
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+            self._release_orphaned_claims()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="analytics-emitter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counts[key] += amount
+
+    def emit(self, name, client_id=None, **params):
+        """
+        Queue an event without blocking.
+
+        Args:
+            name: Event name (e.g. COMPLEX_QUERY_IDENTIFIED)
+            client_id: Chat session identifier
+            **params: Event parameters (JSON-serializable)
+
+        Returns:
+            True if the event was queued, False if it was dropped because the queue is full
+        """
+        event = {"name": name, "client_id": client_id, "timestamp_micros": int(time.time() * 1e6), "params": params}
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("emitted")
+        return True
+
+    def flush(self, timeout=10.0):
+        """Send every queued event (or spool it if the collector is down). Returns False on timeout."""
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """Flush pending events and stop the worker thread."""
+        if self._closed:
+            return
+        self._closed = True
+        marker = _Flush(stop=True)
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return
+        marker.done.wait(timeout)
+
+    def stats(self):
+        """
+        Report pipeline counters.
+
+        Returns:
+            Dictionary of event/batch counters, queued events, spooled batches on disk, the
+            compression ratio of sent batches and the last unexpected worker error (or None)
+        """
+        with self._lock:
+            stats = dict(self._counts)
+            stats["last_error"] = self._last_error
+        stats["queued"] = self._queue.qsize()
+        stats["spool_files"] = len(self._spool_files())
+        stats["compression_ratio"] = stats["raw_bytes"] / stats["compressed_bytes"] if stats["compressed_bytes"] else 0.0
+        return stats
+
+    def _guarded(self, action, *args):
+        """
+        Run a worker step, counting an unexpected error instead of letting it end the thread.
+
+        Returns:
+            True if the step completed
+        """
+        try:
+            action(*args)
+            return True
+        except Exception as e:
+            with self._lock:
+                self._counts["errors"] += 1
+                self._last_error = f"{type(e).__name__}: {e}"
+            return False
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            if batch:
+                timeout = max(0.0, deadline - time.monotonic())
+            else:
+                timeout = self.flush_interval
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _Flush):
+                if batch:
+                    self._guarded(self._ship, batch)
+                    batch = []
+                self._guarded(self._replay_spool, True)
+                item.done.set()
+                if item.stop:
+                    return
+                continue
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                # A batch whose step failed is not retried, so one bad event cannot wedge the pipeline
+                self._guarded(self._ship, batch)
+                batch = []
+            elif not batch:
+                self._guarded(self._replay_spool)
+
+    def _ship(self, batch):
+        raw = json.dumps({"events": batch}, separators=(",", ":")).encode("utf-8")
+        body = gzip.compress(raw, compresslevel=5)
+        if time.monotonic() >= self._retry_at and self._post(body):
+            self._count("sent_events", len(batch))
+            self._count("sent_batches")
+            self._count("raw_bytes", len(raw))
+            self._count("compressed_bytes", len(body))
+            self._replay_spool()
+        else:
+            self._spool(body, len(batch))
+
+    def _post(self, body):
+        try:
+            response = self.http_client.post(
+                self.endpoint, data=body, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+            ok = 200 <= response.status_code < 300
+            response.close()
+        except requests.RequestException:
+            ok = False
+        if ok:
+            self._failures = 0
+            self._retry_at = 0.0
+        else:
+            self._count("failed_sends")
+            self._retry_at = time.monotonic() + min(self.retry_cap, self.retry_base * 2 ** self._failures)
+            self._failures += 1
+        return ok
+
+    def _spool_files(self):
+        if not self.spool_dir:
+            return []
+        return sorted(name for name in os.listdir(self.spool_dir) if name.endswith(".json.gz"))
+
+    def _release_orphaned_claims(self):
+        """Return batches claimed by processes that exited mid-send to the spool."""
+        for name in os.listdir(self.spool_dir):
+            if not name.endswith(CLAIM_SUFFIX):
+                continue
+            batch, pid = name[:-len(CLAIM_SUFFIX)].rsplit(".", 1)
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                try:
+                    os.rename(os.path.join(self.spool_dir, name), os.path.join(self.spool_dir, batch))
+                except FileNotFoundError:
+                    pass  # another process released it first
+
+    def _spool(self, body, events):
+        if not self.spool_dir:
+            self._count("dropped", events)
+            return
+        # Sortable name: creation time, then the event count (read back when batches are evicted) and the
+        # writing process, so processes sharing the directory never write to the same file
+        name = f"{time.time_ns():020d}-{events}-{os.getpid()}.json.gz"
+        path = os.path.join(self.spool_dir, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(path + ".tmp", path)
+        self._count("spooled_batches")
+
+        # Another process may replay or evict a batch at any point, so vanished files are skipped
+        sizes = []
+        for file in self._spool_files():
+            try:
+                sizes.append((file, os.path.getsize(os.path.join(self.spool_dir, file))))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size in sizes)
+        for file, size in sizes:
+            if total <= self.max_spool_bytes:
+                break
+            total -= size
+            try:
+                os.remove(os.path.join(self.spool_dir, file))
+            except FileNotFoundError:
+                continue
+            self._count("spool_evicted_batches")
+            self._count("dropped", _batch_events(file))
+
+    def _replay_spool(self, force=False):
+        """
+        Send spooled batches oldest first, stopping at the first failure (or during backoff).
+
+        Each batch is claimed by renaming it to a name only this process uses; a batch that is
+        already gone was claimed (or evicted) by another process and is skipped.
+        """
+        if not force and time.monotonic() < self._retry_at:
+            return
+        for file in self._spool_files():
+            path = os.path.join(self.spool_dir, file)
+            claimed = f"{path}.{os.getpid()}{CLAIM_SUFFIX}"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed, "rb") as f:
+                body = f.read()
+            if not self._post(body):
+                os.rename(claimed, path)  # back in the spool for the next replay
+                return
+            os.remove(claimed)
+            events = _batch_events(file)
+            self._count("replayed_batches")
+            self._count("sent_events", events)
+            self._count("sent_batches")
+            self._count("compressed_bytes", len(body))
+            self._count("raw_bytes", len(gzip.decompress(body)))
+
+
+def emitter_from_env():
+    """Create an AnalyticsEmitter for GREENTHUMB_ANALYTICS_URL, or return None if it is not set."""
+    endpoint = os.getenv("GREENTHUMB_ANALYTICS_URL")
+    if not endpoint:
+        return None
+    return AnalyticsEmitter(endpoint, spool_dir=os.getenv("GREENTHUMB_ANALYTICS_SPOOL", DEFAULT_SPOOL_DIR))
@@ -0,0 +1,96 @@
+"""
+Benchmark: analytics event pipeline
+Sends chatbot events to the stub server's /collect endpoint with one blocking HTTP call per
+event and with the batching AnalyticsEmitter, compares the cost paid on the chat thread and
+end-to-end throughput, then takes the collector down to check events are spooled and replayed.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analytics_events import COMPLEX_QUERY_IDENTIFIED, AnalyticsEmitter
+from http_client import PooledHTTPClient
+from stub_server import start_stub_server
+
+
+def sample_event(i):
+    return {"client_id": f"session-{i % 50}", "intent_count": 3,
+            "intents": ["product_inquiry", "policy_question", "price_comparison"], "mode": "Zero-shot"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-event HTTP calls vs the batching emitter.")
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--naive-events", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4, help="Threads emitting concurrently")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=0.0, jitter=0.0, seed=0)
+    url = f"{base_url}/collect"
+
+    # One blocking POST per event, as a chat turn would pay without the pipeline
+    client = PooledHTTPClient(max_retries=0)
+    latencies = []
+    for i in range(args.naive_events):
+        start = time.perf_counter()
+        client.post(url, json={"events": [dict(sample_event(i), name=COMPLEX_QUERY_IDENTIFIED)]}).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    print(f"Per-event POST:  {statistics.median(latencies) * 1e6:8.1f} us/event on the caller, "
+          f"{len(latencies) / sum(latencies):,.0f} events/s")
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        emitter = AnalyticsEmitter(url, batch_size=args.batch_size, flush_interval=0.5,
+                                   max_queue=args.events + 1, spool_dir=spool_dir)
+        emit_times = []
+
+        def produce(worker):
+            local = []
+            for i in range(worker, args.events, args.threads):
+                params = sample_event(i)
+                start = time.perf_counter()
+                emitter.emit(COMPLEX_QUERY_IDENTIFIED, **params)
+                local.append(time.perf_counter() - start)
+            emit_times.extend(local)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=produce, args=(worker,)) for worker in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        emitter.flush()
+        elapsed = time.perf_counter() - start
+        stats = emitter.stats()
+        emit_times.sort()
+        print(f"Batched emitter: {statistics.median(emit_times) * 1e6:8.1f} us/event on the caller "
+              f"(p99 {emit_times[int(len(emit_times) * 0.99)] * 1e6:.1f} us), "
+              f"{stats['sent_events'] / elapsed:,.0f} events/s delivered")
+        print(f"  {stats['sent_batches']} batches, {stats['compression_ratio']:.1f}x gzip compression, "
+              f"{stats['dropped']} dropped")
+
+        # Collector outage: batches spill to disk, then replay once it is back
+        collected_before = server.stats["collected_events"]
+        server.config["collector_up"] = False
+        for i in range(args.batch_size * 4):
+            emitter.emit(COMPLEX_QUERY_IDENTIFIED, **sample_event(i))
+        emitter.flush()
+        spooled = emitter.stats()["spool_files"]
+        server.config["collector_up"] = True
+        emitter.flush()
+        stats = emitter.stats()
+        delivered = server.stats["collected_events"] - collected_before
+        print(f"\nOutage: {spooled} batches spooled to disk; after recovery {stats['replayed_batches']} replayed, "
+              f"{delivered} of {args.batch_size * 4} events delivered, {stats['spool_files']} left on disk")
+        emitter.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
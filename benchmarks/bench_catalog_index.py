@@ -0,0 +1,83 @@
+"""
+Benchmark: catalog entity linking
+Builds synthetic catalogs of several sizes and compares extracting mentioned products from a
+query with a linear substring scan versus the CatalogIndex matcher, plus exact name lookup.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog_index import CatalogIndex
+from section1_dataset import products
+
+ADJECTIVES = ["Organic", "Heirloom", "Compact", "Deluxe", "Recycled", "Bamboo", "Cedar", "Ceramic", "Solar", "Natural"]
+NOUNS = ["Planter", "Trowel", "Seed Mix", "Hose", "Pruner", "Soil Blend", "Fertilizer", "Trellis", "Watering Can", "Grow Bag"]
+
+TEMPLATES = [
+    "Do you have the {a} in stock? Also, what's your return policy?",
+    "How does the {a} compare to the {b}? I also need some soil advice.",
+    "My {a} arrived damaged, and can I swap it for the {b}?"
+]
+
+
+def make_catalog(size, rng):
+    """Seed with the real catalog, then add synthetic SKUs with unique model numbers."""
+    catalog = {category: list(items) for category, items in products.items()}
+    categories = list(catalog)
+    for sku in range(max(0, size - sum(len(items) for items in catalog.values()))):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} GT-{sku:06d}"
+        catalog[rng.choice(categories)].append({"name": name, "price": 9.99, "description": ""})
+    return catalog
+
+
+def linear_extract(query, catalog):
+    text = query.lower()
+    return [(category, product) for category, items in catalog.items()
+            for product in items if product['name'].lower() in text]
+
+
+def timed_ms(func, inputs):
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        func(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog entity linking and lookup latency.")
+    parser.add_argument("--sizes", default="20,1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    print(f"{'SKUs':>7} {'build s':>8} {'scan p50 ms':>12} {'index p50 ms':>13} {'index p99 ms':>13} {'lookup p50 us':>14}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        catalog = make_catalog(size, rng)
+        names = [product['name'] for items in catalog.values() for product in items]
+        queries = [rng.choice(TEMPLATES).format(a=rng.choice(names), b=rng.choice(names)) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        index = CatalogIndex(catalog)
+        index.match("")  # compile the matcher
+        build = time.perf_counter() - start
+
+        for query in queries[:20]:
+            expected = {product['name'] for _, product in linear_extract(query, catalog)}
+            found = {product['name'] for _, product in index.extract(query)["products"]}
+            assert found <= expected, (query, found, expected)
+
+        scan_p50, _ = timed_ms(lambda q: linear_extract(q, catalog), queries[:max(5, args.queries // 10)])
+        index_p50, index_p99 = timed_ms(index.extract, queries)
+        lookup_p50, _ = timed_ms(index.lookup, [rng.choice(names).upper() for _ in range(args.queries)])
+        print(f"{size:>7} {build:>8.2f} {scan_p50:>12.3f} {index_p50:>13.3f} {index_p99:>13.3f} {lookup_p50 * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
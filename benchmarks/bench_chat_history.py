@@ -0,0 +1,90 @@
+"""
+Benchmark: chat history rendering
+Reruns the Streamlit app headlessly (streamlit.testing AppTest) with conversations of increasing
+length and reports rerun time and session size, compared with the previous approach of
+re-emitting one HTML block (and caption) per message on every rerun.
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chat_history import ChatHistory
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "section2_streamlit_app.py")
+
+# The previous rendering loop, for comparison
+LEGACY_SCRIPT = '''
+import streamlit as st
+from chat_history import render_chat_message
+for msg in st.session_state.messages:
+    st.markdown(render_chat_message(msg["content"], msg["role"] == "user"), unsafe_allow_html=True)
+    if msg.get("metrics"):
+        st.caption(msg["metrics"]["caption"])
+'''
+
+REPLY = "Thanks for reaching out to GreenThumb Goods! " * 8
+
+
+def make_turns(count):
+    for i in range(count // 2):
+        yield "user", f"Question {i}: what is your return policy for tools?", None
+        yield "assistant", REPLY, {"caption": "First token 0.21s · total 0.56s (streamed)"}
+
+
+def time_reruns(app_test, reruns):
+    app_test.run()  # first run pays for imports and caches
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app_test.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat history rerun time vs conversation length.")
+    parser.add_argument("--sizes", default="10,100,1000,5000")
+    parser.add_argument("--reruns", type=int, default=3)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    os.environ.setdefault("GREENTHUMB_CACHE", "0")
+    # Reading session state outside a script run logs a harmless warning per access
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: "missing ScriptRunContext" not in record.getMessage())
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(f"import sys\nsys.path.insert(0, {os.path.dirname(APP_PATH)!r})\n" + LEGACY_SCRIPT)
+        legacy_path = f.name
+    try:
+        print(f"{'messages':>9} {'legacy rerun ms':>16} {'legacy KB':>10} {'bounded rerun ms':>17} "
+              f"{'history render ms':>18} {'bounded KB':>11}")
+        for size in (int(s) for s in args.sizes.split(',')):
+            messages = [{"role": role, "content": content, "metrics": metrics} for role, content, metrics in make_turns(size)]
+            legacy = AppTest.from_file(legacy_path, default_timeout=120)
+            legacy.session_state["messages"] = messages
+            legacy_ms = time_reruns(legacy, args.reruns)
+
+            history = ChatHistory()
+            for role, content, metrics in make_turns(size):
+                history.append(role, content, metrics, metrics and metrics["caption"])
+            app = AppTest.from_file(APP_PATH, default_timeout=120)
+            app.session_state["history"] = history
+            app_ms = time_reruns(app, args.reruns)
+            render_ms = statistics.median(app.session_state["render_times"]) * 1000
+
+            print(f"{size:>9} {legacy_ms:>16.1f} {len(pickle.dumps(messages)) / 1024:>10.0f} {app_ms:>17.1f} "
+                  f"{render_ms:>18.2f} {len(pickle.dumps(history)) / 1024:>11.0f}")
+    finally:
+        os.unlink(legacy_path)
+
+
+if __name__ == "__main__":
+    main()
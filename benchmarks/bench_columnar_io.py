@@ -0,0 +1,69 @@
+"""
+Benchmark: CSV vs columnar (Parquet/Feather) analytics loads
+Generates a corpus in CSV, Parquet and Feather, then compares file size, load time and
+in-memory size for an intent-frequency analysis that only needs the label columns.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_columnar import load_columns
+from section1_dataset import generate_seeded_corpus
+
+
+def directory_size(output_dir, extension):
+    return sum(os.path.getsize(os.path.join(output_dir, name))
+               for name in os.listdir(output_dir) if name.endswith(extension))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV and columnar loads for intent analytics.")
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--shard-size", type=int, default=100000)
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="greenthumb_columnar_")
+    try:
+        generate_seeded_corpus(args.count, args.shard_size, 7, output_dir, ("csv", "parquet", "feather"), progress=False)
+        columns = ["intents", "policies_mentioned"]
+
+        start = time.perf_counter()
+        csv_paths = sorted(os.path.join(output_dir, n) for n in os.listdir(output_dir) if n.endswith(".csv"))
+        df = pd.concat(pd.read_csv(path, usecols=columns) for path in csv_paths)
+        csv_counts = Counter(intent for value in df["intents"] for intent in value.split(","))
+        csv_time = time.perf_counter() - start
+        csv_memory = df.memory_usage(deep=True).sum()
+
+        print(f"{'format':<8} {'file MB':>8} {'load+count s':>13} {'memory MB':>10}")
+        print(f"{'csv':<8} {directory_size(output_dir, '.csv') / 1e6:>8.1f} {csv_time:>13.3f} {csv_memory / 1e6:>10.1f}")
+
+        for fmt in ("parquet", "feather"):
+            shard_dir = os.path.join(output_dir, fmt)
+            os.makedirs(shard_dir)
+            for name in os.listdir(output_dir):
+                if name.endswith(f".{fmt}"):
+                    os.rename(os.path.join(output_dir, name), os.path.join(shard_dir, name))
+
+            start = time.perf_counter()
+            table = load_columns(shard_dir, columns, as_pandas=False)
+            intents = table.column("intents").combine_chunks().flatten()
+            counts = intents.dictionary_decode().value_counts()
+            columnar_counts = Counter({row["values"]: row["counts"] for row in counts.to_pylist()})
+            elapsed = time.perf_counter() - start
+
+            assert columnar_counts == csv_counts, "Columnar and CSV intent counts differ"
+            print(f"{fmt:<8} {directory_size(shard_dir, f'.{fmt}') / 1e6:>8.1f} {elapsed:>13.3f} {table.nbytes / 1e6:>10.1f}")
+    finally:
+        shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    main()
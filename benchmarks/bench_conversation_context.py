@@ -0,0 +1,55 @@
+"""
+Benchmark: multi-turn prompt construction
+Simulates a long chat and reports, at several conversation lengths, the prompt size when every
+prior message is appended verbatim versus the token-budgeted ConversationContext, plus build time.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conversation_context import ConversationContext
+from section1_dataset import generate_complex_query
+from token_utils import estimate_tokens
+
+HEADER = "You are a helpful assistant for GreenThumb Goods, a company that sells eco-friendly gardening supplies.\n\n"
+
+
+def naive_prompt(history, query):
+    turns = "".join(f"{'Customer' if m['role'] == 'user' else 'Assistant'}: {m['content']}\n" for m in history)
+    return HEADER + turns + f"Customer: {query}\nAssistant:"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token-budgeted multi-turn prompts.")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=3416)
+    parser.add_argument("--report", default="1,5,10,25,50,100,200")
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    report = {int(n) for n in args.report.split(',')}
+    context = ConversationContext(token_budget=args.budget)
+    history = []
+    print(f"{'turn':>5} {'naive tokens':>13} {'budgeted tokens':>16} {'summarized':>11} {'dropped':>8} {'build us':>9}")
+    for turn in range(1, args.turns + 1):
+        record = generate_complex_query(rng)
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            prompt = context.build_prompt(HEADER, history, record['query'])
+            timings.append((time.perf_counter() - start) * 1e6)
+        if turn in report:
+            stats = context.turns[-1]
+            print(f"{turn:>5} {estimate_tokens(naive_prompt(history, record['query'])):>13} "
+                  f"{estimate_tokens(prompt):>16} {stats['summarized_messages']:>11} {stats['dropped_messages']:>8} "
+                  f"{statistics.median(timings):>9.1f}")
+        history += [{"role": "user", "content": record['query']}, {"role": "assistant", "content": record['response']}]
+
+
+if __name__ == "__main__":
+    main()
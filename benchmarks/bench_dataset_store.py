@@ -0,0 +1,86 @@
+"""
+Benchmark: dataset store
+Writes a generated JSONL dataset and compares parsing it fully with json (what each Streamlit
+session paid with st.cache_data) against opening it as a memory-mapped DatasetStore: open time,
+Python heap, random access, sampling and intent lookup latency.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_store import DatasetStore
+from section1_dataset import iter_records
+
+
+def measure(func):
+    """Run func twice: once timed, once under tracemalloc. Returns (result, seconds, peak traced MB)."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def median_us(func, inputs):
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        func(item)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped dataset store.")
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dataset.jsonl")
+        with open(path, "w") as f:
+            for record in iter_records(args.records, random.Random(0)):
+                f.write(json.dumps(record) + "\n")
+        print(f"{args.records:,} records, {os.path.getsize(path) / 2 ** 20:.0f} MB of JSONL")
+
+        def parse_all():
+            with open(path) as f:
+                return [json.loads(line) for line in f]
+
+        records, parse_s, parse_mb = measure(parse_all)
+        del records
+        print(f"Full parse:             {parse_s:6.2f}s, {parse_mb:7.1f} MB Python heap")
+
+        def open_uncached():
+            if os.path.exists(path + ".idx.npz"):
+                os.remove(path + ".idx.npz")
+            return DatasetStore(path)
+
+        _, cold_s, cold_mb = measure(open_uncached)
+        store, warm_s, warm_mb = measure(lambda: DatasetStore(path))
+        print(f"Store open (index):     {cold_s:6.2f}s, {cold_mb:7.1f} MB Python heap")
+        print(f"Store open (cached):    {warm_s:6.2f}s, {warm_mb:7.1f} MB Python heap")
+
+        _, intent_s, intent_mb = measure(lambda: DatasetStore(path).intent_rows("complaint"))
+        print(f"Intent index (1st use): {intent_s:6.2f}s, {intent_mb:7.1f} MB Python heap")
+
+        rng = random.Random(1)
+        rows = [rng.randrange(len(store)) for _ in range(2000)]
+        print(f"Random record:    {median_us(store.__getitem__, rows):8.1f} us")
+        print(f"Sample 10:        {median_us(lambda _: store.sample(10, rng), range(200)):8.1f} us")
+        print(f"Sample by intent: {median_us(lambda _: store.sample_by_intent('complaint', 3, rng), range(200)):8.1f} us")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: sequential vs concurrent prompt evaluation
+Runs the evaluation engine against the local stub server (no network or API key needed)
+and compares wall time for sequential and concurrent execution of the same jobs.
+"""
+
+import argparse
+import os
+import sys
+
+from openai import AsyncOpenAI
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evaluation_engine import evaluate, format_report
+from stub_server import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the concurrent evaluation engine offline.")
+    parser.add_argument("--queries", type=int, default=50, help="Number of queries (two strategies each)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub latency per call in seconds")
+    parser.add_argument("--rpm", type=int, default=None)
+    parser.add_argument("--tpm", type=int, default=None)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, jitter=args.latency / 4, seed=0)
+
+    def make_call():
+        # Each asyncio.run() needs its own client (connection pools are bound to one event loop), closed on that loop
+        client = AsyncOpenAI(api_key="stub", base_url=f"{base_url}/v1", max_retries=0)
+
+        async def call(prompt):
+            response = await client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=500
+            )
+            return response.choices[0].message.content
+        return call, client.close
+
+    jobs = [
+        {"index": i, "strategy": strategy, "prompt": f"[{strategy}] Customer query number {i}"}
+        for i in range(args.queries) for strategy in ("zero_shot", "few_shot")
+    ]
+
+    print(f"Sequential ({len(jobs)} calls):")
+    call, close = make_call()
+    _, sequential = evaluate(jobs, call, cleanup=close, concurrency=1, rpm=args.rpm, tpm=args.tpm)
+    print(format_report(sequential))
+
+    print(f"\nConcurrent (concurrency {args.concurrency}):")
+    call, close = make_call()
+    _, concurrent = evaluate(jobs, call, cleanup=close, concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm)
+    print(format_report(concurrent))
+
+    print(f"\nSpeedup: {sequential['wall_time_s'] / concurrent['wall_time_s']:.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
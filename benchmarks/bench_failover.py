@@ -0,0 +1,96 @@
+"""
+Benchmark: hedged requests and failover
+Runs requests against a stand-in Hugging Face endpoint with injected cold starts and 503s, first
+alone and then behind a FailoverRouter that hedges to a stand-in OpenAI endpoint after the
+primary's p95 latency, and compares the latency percentiles. Then makes the primary fail every
+request to show the circuit breaker routing traffic away from it.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from failover_router import FailoverRouter
+from http_client import PooledHTTPClient
+from load_test import distribution
+from model_backends import HuggingFaceBackend, OpenAIBackend
+from stub_server import start_stub_server
+
+
+def run(generate, requests, concurrency, label):
+    """Send requests prompts through generate and return (latencies, errors)."""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            generate(f"Customer: What do you recommend for a balcony herb garden? (request {label}-{i})\nAssistant:")
+            return time.perf_counter() - start, False
+        except Exception:
+            return time.perf_counter() - start, True
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    return [latency for latency, _ in results], sum(error for _, error in results)
+
+
+def report(label, latencies, errors):
+    dist = distribution(latencies)
+    print(f"{label:<22} p50 {dist['p50'] * 1000:7.0f} ms  p95 {dist['p95'] * 1000:7.0f} ms  "
+          f"p99 {dist['p99'] * 1000:7.0f} ms  max {dist['max'] * 1000:7.0f} ms  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged requests and failover against stub servers.")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of primary requests that cold-start")
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of primary requests answered with 503")
+    args = parser.parse_args()
+
+    primary_server, primary_url = start_stub_server(latency=0.1, jitter=0.03, slow_rate=args.slow_rate,
+                                                    slow_latency=args.slow_latency, error_rate=args.error_rate, seed=1)
+    secondary_server, secondary_url = start_stub_server(latency=0.2, jitter=0.03, seed=2)
+    print(f"Primary: 100 ms +/- 30 ms, {args.slow_rate:.0%} cold starts of {args.slow_latency:.1f}s, "
+          f"{args.error_rate:.0%} 503s. Secondary: 200 ms +/- 30 ms.\n")
+
+    # Errors are not retried, so they show up as failures rather than as extra latency
+    primary = HuggingFaceBackend(f"{primary_url}/models/phi-3", "phi-3", max_tokens=300,
+                                 http_client=PooledHTTPClient(max_retries=0))
+    secondary = OpenAIBackend("gpt-3.5-turbo", max_tokens=300, api_key="stub", base_url=f"{secondary_url}/v1")
+
+    latencies, errors = run(primary.generate, args.requests, args.concurrency, "primary")
+    report("Primary only", latencies, errors)
+
+    router = FailoverRouter([primary, secondary], initial_hedge_delay=0.5, reset_timeout=2.0)
+    run(router.generate, 50, args.concurrency, "warmup")
+    latencies, errors = run(router.generate, args.requests, args.concurrency, "router")
+    report("Hedged + failover", latencies, errors)
+    stats = router.stats()
+    print(f"  hedge delay {stats['backends'][0]['hedge_delay'] * 1000:.0f} ms, {stats['hedged']} hedged, "
+          f"{stats['failovers']} failovers, wins: "
+          + ", ".join(f"{backend['name']} {backend['wins']}" for backend in stats["backends"]))
+
+    # Primary outage: after failure_threshold errors the circuit opens and requests skip the primary
+    primary_server.config["error_rate"] = 1.0
+    requests_before = primary_server.stats["requests"]
+    latencies, errors = run(router.generate, 200, args.concurrency, "outage")
+    report("Primary down", latencies, errors)
+    stats = router.stats()
+    print(f"  circuit {stats['backends'][0]['circuit']} after {stats['backends'][0]['trips']} trip(s); "
+          f"primary received {primary_server.stats['requests'] - requests_before} of 200 requests")
+
+    # Recovery: once reset_timeout passes, a probe request closes the circuit again
+    primary_server.config["error_rate"] = 0.0
+    time.sleep(2.1)
+    run(router.generate, 20, 1, "recovery")
+    print(f"  after recovery the circuit is {router.stats()['backends'][0]['circuit']}")
+
+    primary_server.shutdown()
+    secondary_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
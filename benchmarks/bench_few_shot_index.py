@@ -0,0 +1,55 @@
+"""
+Benchmark: few-shot example retrieval
+Builds the few-shot index over generated datasets of several sizes and reports build time,
+incremental update time after adding records, and per-query search latency.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from few_shot_index import load_or_build_index
+from section1_dataset import generate_complex_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark few-shot index build and search latency.")
+    parser.add_argument("--sizes", default="50,1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    print(f"{'records':>8} {'build s':>8} {'+1% update s':>13} {'search p50 ms':>14} {'search p99 ms':>14}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        records = [generate_complex_query(rng) for _ in range(size)]
+        extra = [generate_complex_query(rng) for _ in range(max(1, size // 100))]
+        queries = [generate_complex_query(rng) for _ in range(args.queries)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            start = time.perf_counter()
+            load_or_build_index(records, path)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = load_or_build_index(records + extra, path)
+            update = time.perf_counter() - start
+
+        index.search(queries[0]['query'])  # compile outside the timed loop
+        latencies = []
+        for item in queries:
+            start = time.perf_counter()
+            index.search(item['query'], k=3, intents=item['intents'])
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{size:>8} {build:>8.2f} {update:>13.2f} {statistics.median(latencies):>14.3f} {p99:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
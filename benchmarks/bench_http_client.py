@@ -0,0 +1,63 @@
+"""
+Benchmark: pooled HTTP client vs one-off requests
+Sends inference requests to the local stub server with a fresh connection per call and
+with the shared PooledHTTPClient, then exercises retries against injected 503 responses.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import PooledHTTPClient
+from stub_server import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark connection pooling and retries offline.")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.3, help="Injected 503 rate for the retry run")
+    args = parser.parse_args()
+
+    payload = {"inputs": "Customer: What is your return policy?\nAssistant:", "parameters": {"max_new_tokens": 300}}
+
+    server, base_url = start_stub_server(latency=0.0, jitter=0.0, seed=0)
+    url = f"{base_url}/models/phi-3"
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        requests.post(url, json=payload, timeout=(3.05, 60)).raise_for_status()
+    fresh = time.perf_counter() - start
+
+    client = PooledHTTPClient()
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        client.post(url, json=payload).raise_for_status()
+    pooled = time.perf_counter() - start
+    stats = client.stats()
+
+    print(f"Fresh connection per call: {fresh / args.calls * 1000:.2f} ms/call")
+    print(f"Pooled keep-alive client:  {pooled / args.calls * 1000:.2f} ms/call "
+          f"({stats['connections_opened']} connections for {stats['pooled_requests']} requests, "
+          f"reuse {stats['connection_reuse_ratio']:.1%})")
+    server.shutdown()
+
+    # Retries with jittered backoff against a flaky backend
+    server, base_url = start_stub_server(latency=0.0, jitter=0.0, error_rate=args.error_rate, seed=1)
+    url = f"{base_url}/models/phi-3"
+    client = PooledHTTPClient(backoff_base=0.01, backoff_cap=0.05)
+    failures = 0
+    for _ in range(args.calls // 4):
+        if client.post(url, json=payload).status_code != 200:
+            failures += 1
+    stats = client.stats()
+    print(f"\nWith {args.error_rate:.0%} injected 503s: {stats['calls']} calls, {stats['retries']} retries, "
+          f"{failures} calls still failing after {client.max_retries} retries")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
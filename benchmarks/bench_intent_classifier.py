@@ -0,0 +1,52 @@
+"""
+Benchmark: intent classifier
+Trains the intent classifier on generated datasets of several sizes and reports training time,
+held-out accuracy, batch prediction throughput and single-query latency.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from intent_classifier import IntentClassifier
+from section1_dataset import generate_complex_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent classifier accuracy and throughput.")
+    parser.add_argument("--sizes", default="500,2000,20000")
+    parser.add_argument("--test", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    test = [generate_complex_query(rng) for _ in range(args.test)]
+    queries = [record['query'] for record in test]
+    print(f"{'train':>7} {'fit s':>7} {'F1':>6} {'exact':>7} {'batch q/s':>10} {'single p50 ms':>14}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        train = [generate_complex_query(rng) for _ in range(size)]
+        start = time.perf_counter()
+        classifier = IntentClassifier().fit(train)
+        fit = time.perf_counter() - start
+        metrics = classifier.evaluate(test)
+
+        start = time.perf_counter()
+        for i in range(0, len(queries), args.batch_size):
+            classifier.predict(queries[i:i + args.batch_size])
+        throughput = len(queries) / (time.perf_counter() - start)
+
+        latencies = []
+        for query in queries[:500]:
+            start = time.perf_counter()
+            classifier.predict([query])
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>7} {fit:>7.2f} {metrics['f1']:>6.3f} {metrics['exact_match']:>7.1%} "
+              f"{throughput:>10.0f} {statistics.median(latencies):>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
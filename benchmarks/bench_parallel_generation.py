@@ -0,0 +1,59 @@
+"""
+Benchmark: multi-process dataset generation
+Generates the same seeded corpus with increasing worker counts, reports rows/sec and
+speedup, and checks that every run produced bit-for-bit identical shard files.
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from section1_dataset import generate_seeded_corpus
+
+
+def digest_files(paths):
+    """Hash shard files by name so runs with different worker counts can be compared."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel seeded dataset generation.")
+    parser.add_argument("--count", type=int, default=400000)
+    parser.add_argument("--shard-size", type=int, default=25000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", default=None, help="Comma-separated worker counts (default: 1,2,4,... up to CPU count)")
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(',')]
+    else:
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1, cpus} | {2 ** i for i in range(1, cpus.bit_length()) if 2 ** i <= cpus})
+
+    baseline_rate, baseline_digest = None, None
+    print(f"{'workers':>8} {'rows/sec':>12} {'speedup':>8}  identical")
+    for workers in worker_counts:
+        output_dir = tempfile.mkdtemp(prefix="greenthumb_bench_")
+        try:
+            stats = generate_seeded_corpus(args.count, args.shard_size, args.seed, output_dir,
+                                           ("jsonl",), workers=workers, progress=False)
+            digest = digest_files(stats['paths'])
+        finally:
+            shutil.rmtree(output_dir)
+        if baseline_rate is None:
+            baseline_rate, baseline_digest = stats['rows_per_sec'], digest
+        print(f"{workers:>8} {stats['rows_per_sec']:>12,.0f} {stats['rows_per_sec'] / baseline_rate:>7.2f}x  "
+              f"{'yes' if digest == baseline_digest else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
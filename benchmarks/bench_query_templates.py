@@ -0,0 +1,302 @@
+"""
+Benchmark: precompiled template tables vs the original query generator
+Compares records/sec of generate_complex_query with the original implementation (kept
+below for reference) and checks that both produce identical records for the same seed.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from section1_dataset import generate_complex_query, intents, policies, products
+
+
+def legacy_generate_complex_query(rng=None):
+    """Reference implementation: rebuilds and formats every template list on each call."""
+    rng = rng or random
+    # Select 2-3 intents for a complex query
+    num_intents = rng.randint(2, 3)
+    selected_intents = rng.sample(intents, num_intents)
+    
+    # Select random products and categories for reference
+    category1 = rng.choice(list(products.keys()))
+    product1 = rng.choice(products[category1])
+    category2 = rng.choice(list(products.keys()))
+    product2 = rng.choice(products[category2])
+    
+    # Select a random policy
+    policy_key = rng.choice(list(policies.keys()))
+    policy = policies[policy_key]
+    
+    # Generate query based on selected intents
+    query_parts = []
+    
+    if "product_inquiry" in selected_intents:
+        inquiries = [
+            f"Can you tell me more about the {product1['name']}?",
+            f"What are the specifications of the {product1['name']}?",
+            f"I'm interested in the {product1['name']}, what can you tell me about it?",
+            f"Does the {product1['name']} come with a warranty?",
+            f"What materials is the {product1['name']} made from?"
+        ]
+        query_parts.append(rng.choice(inquiries))
+    
+    if "price_comparison" in selected_intents:
+        comparisons = [
+            f"How does the price of {product1['name']} compare to {product2['name']}?",
+            f"Which is more cost-effective, the {product1['name']} or the {product2['name']}?",
+            f"I'm trying to decide between {product1['name']} and {product2['name']} based on price and quality.",
+            f"Is the {product1['name']} worth the extra cost over the {product2['name']}?",
+            f"Do you have any cheaper alternatives to the {product1['name']}?"
+        ]
+        query_parts.append(rng.choice(comparisons))
+    
+    if "availability_check" in selected_intents:
+        availability = [
+            f"Is the {product1['name']} currently in stock?",
+            f"When will you restock the {product1['name']} if it's sold out?",
+            f"Can I pre-order the {product1['name']} if it's not available?",
+            f"Do you have the {product1['name']} available for immediate shipping?",
+            f"What's the estimated delivery time for the {product1['name']}?"
+        ]
+        query_parts.append(rng.choice(availability))
+    
+    if "policy_question" in selected_intents:
+        policy_questions = [
+            f"What's your return policy for {category1} items?",
+            f"How does your shipping policy work for orders containing {product1['name']}?",
+            f"Can you explain your sustainability practices regarding packaging?",
+            f"How does the rewards program work if I purchase both {product1['name']} and {product2['name']}?",
+            f"What's covered under the warranty for the {product1['name']}?"
+        ]
+        query_parts.append(rng.choice(policy_questions))
+    
+    if "care_instructions" in selected_intents:
+        care = [
+            f"How should I care for the {product1['name']} after purchase?",
+            f"What maintenance is required for the {product1['name']}?",
+            f"How often should I water/clean/maintain the {product1['name']}?",
+            f"Are there special storage requirements for the {product1['name']}?",
+            f"What's the best way to ensure the {product1['name']} lasts a long time?"
+        ]
+        query_parts.append(rng.choice(care))
+    
+    if "compatibility_check" in selected_intents:
+        compatibility = [
+            f"Will the {product1['name']} work well with the {product2['name']}?",
+            f"Is the {product1['name']} compatible with my existing {category2} items?",
+            f"Can I use the {product1['name']} in conjunction with the {product2['name']}?",
+            f"Are there any known issues using the {product1['name']} with {product2['name']}?",
+            f"Do I need any adapters or additional items to use the {product1['name']} with my {category2} setup?"
+        ]
+        query_parts.append(rng.choice(compatibility))
+    
+    if "recommendation_request" in selected_intents:
+        recommendations = [
+            f"What would you recommend for someone new to gardening who's interested in {category1}?",
+            f"I'm looking for the best {category1} for a small apartment balcony, any suggestions?",
+            f"Can you recommend a {category1} that would complement my existing {product2['name']}?",
+            f"What's your most popular {category1} item for beginners?",
+            f"I need a gift for a sustainability enthusiast who loves {category1}, what do you suggest?"
+        ]
+        query_parts.append(rng.choice(recommendations))
+    
+    if "complaint" in selected_intents:
+        complaints = [
+            f"The {product1['name']} I received doesn't match the description on your website.",
+            f"My {product1['name']} arrived damaged, and I'm not satisfied with the customer service response.",
+            f"I've been waiting for my {product1['name']} for over two weeks now, what's the delay?",
+            f"The quality of the {product1['name']} doesn't justify the price you're charging.",
+            f"The {product1['name']} stopped working after just a few uses, is this normal?"
+        ]
+        query_parts.append(rng.choice(complaints))
+    
+    if "return_process" in selected_intents:
+        returns = [
+            f"How do I initiate a return for the {product1['name']} I purchased last week?",
+            f"What's the process for exchanging my {product1['name']} for a different size/color/model?",
+            f"Will I get a full refund if I return the {product1['name']} within the 30-day window?",
+            f"Do I need the original packaging to return the {product1['name']}?",
+            f"Can I return the {product1['name']} to your physical store if I bought it online?"
+        ]
+        query_parts.append(rng.choice(returns))
+    
+    if "shipping_inquiry" in selected_intents:
+        shipping = [
+            f"How much would shipping cost for the {product1['name']} to California?",
+            f"Do you offer expedited shipping for the {product1['name']}?",
+            f"Can I track my {product1['name']} order once it's shipped?",
+            f"Do you ship the {product1['name']} internationally?",
+            f"What shipping carrier do you use for delivering the {product1['name']}?"
+        ]
+        query_parts.append(rng.choice(shipping))
+    
+    # Combine query parts with connecting phrases
+    connectors = [
+        " Also, ", 
+        " Additionally, ", 
+        " By the way, ", 
+        " One more thing, ", 
+        " I'm also wondering, ",
+        " While we're at it, ",
+        " And I'd like to know, ",
+        " Could you also tell me ",
+        " I'd also like to ask about ",
+        " On a related note, "
+    ]
+    
+    # Shuffle query parts to make it more natural
+    rng.shuffle(query_parts)
+    
+    # Connect the parts
+    complex_query = query_parts[0]
+    for i in range(1, len(query_parts)):
+        complex_query += rng.choice(connectors) + query_parts[i].lower()
+    
+    # Generate appropriate response
+    response_parts = []
+    
+    # Add greeting
+    greetings = [
+        "Thank you for reaching out to GreenThumb Goods! ",
+        "Hello from GreenThumb Goods! ",
+        "We appreciate your interest in our products. ",
+        "Thanks for your questions about our products and services. ",
+        "I'd be happy to help with your inquiries. "
+    ]
+    response = rng.choice(greetings)
+    
+    # Address each intent in the query
+    for intent in selected_intents:
+        if intent == "product_inquiry":
+            response_parts.append(f"Regarding the {product1['name']}, it's priced at ${product1['price']} and {product1['description']}.")
+        
+        elif intent == "price_comparison":
+            response_parts.append(f"When comparing the {product1['name']} (${product1['price']}) with the {product2['name']} (${product2['price']}), the price difference reflects their different features and benefits. The {product1['name']} {product1['description']}, while the {product2['name']} {product2['description']}.")
+        
+        elif intent == "availability_check":
+            availability_responses = [
+                f"The {product1['name']} is currently in stock and ready to ship within 1-2 business days.",
+                f"We're temporarily out of stock on the {product1['name']}, but we expect to restock within 2 weeks. You can sign up for email notifications on the product page.",
+                f"We have limited quantities of the {product1['name']} available, so we recommend placing your order soon if you're interested."
+            ]
+            response_parts.append(rng.choice(availability_responses))
+        
+        elif intent == "policy_question":
+            if "return" in query_parts[selected_intents.index(intent)].lower():
+                response_parts.append(f"Regarding our return policy: {policies['returns']}")
+            elif "shipping" in query_parts[selected_intents.index(intent)].lower():
+                response_parts.append(f"About our shipping policy: {policies['shipping']}")
+            elif "sustainability" in query_parts[selected_intents.index(intent)].lower():
+                response_parts.append(f"Our sustainability commitment: {policies['sustainability']}")
+            elif "reward" in query_parts[selected_intents.index(intent)].lower():
+                response_parts.append(f"About our rewards program: {policies['rewards']}")
+            elif "warranty" in query_parts[selected_intents.index(intent)].lower():
+                response_parts.append(f"Regarding our warranty policy: {policies['warranty']}")
+            else:
+                response_parts.append(f"Regarding our policies: {policies[policy_key]}")
+        
+        elif intent == "care_instructions":
+            care_responses = [
+                f"For the {product1['name']}, we recommend regular maintenance to ensure longevity. Specific care instructions are included with your purchase, and you can also find them on our website under the product details.",
+                f"The {product1['name']} requires minimal maintenance. We suggest [specific care instructions based on product type] for best results.",
+                f"To keep your {product1['name']} in optimal condition, please follow the care guide included in the packaging. Generally, [basic care tip relevant to product category]."
+            ]
+            response_parts.append(rng.choice(care_responses))
+        
+        elif intent == "compatibility_check":
+            compatibility_responses = [
+                f"The {product1['name']} is designed to work seamlessly with the {product2['name']} and other products in our {category2} line.",
+                f"While the {product1['name']} and {product2['name']} can be used together, you might need [additional accessory] for optimal performance.",
+                f"Yes, the {product1['name']} is fully compatible with your existing {category2} items, including the {product2['name']}."
+            ]
+            response_parts.append(rng.choice(compatibility_responses))
+        
+        elif intent == "recommendation_request":
+            recommendation_responses = [
+                f"For someone new to {category1}, I'd recommend starting with our {product1['name']}. It's user-friendly and provides excellent value for beginners.",
+                f"Based on your interest in {category1} for a small space, our {product1['name']} would be perfect as it's compact yet effective.",
+                f"As a popular gift for sustainability enthusiasts, our {product1['name']} consistently receives excellent feedback. It complements existing {category2} setups beautifully."
+            ]
+            response_parts.append(rng.choice(recommendation_responses))
+        
+        elif intent == "complaint":
+            complaint_responses = [
+                f"I'm sorry to hear about your experience with the {product1['name']}. We stand behind the quality of our products and would like to make this right. Please email our customer service team at support@greenthumbgoods.com with your order number and photos of the issue, and we'll resolve this promptly.",
+                f"We apologize for the delay with your {product1['name']} order. Let me check the status for you right away. Please provide your order number, and I'll investigate the cause of the delay and provide an updated delivery estimate.",
+                f"I understand your frustration with the {product1['name']}. Quality is our top priority, and we'd like to address this issue immediately. Please contact our support team at 1-800-GREEN-THUMB, and they'll arrange a replacement or refund."
+            ]
+            response_parts.append(rng.choice(complaint_responses))
+        
+        elif intent == "return_process":
+            return_responses = [
+                f"To return your {product1['name']}, please visit our Returns Center on the website and follow the simple process: 1) Enter your order number and email, 2) Select the item(s) to return, 3) Print the prepaid return label if eligible, and 4) Drop off the package at any authorized shipping location.",
+                f"Returns for the {product1['name']} can be initiated through your account on our website. Go to Order History, select the relevant order, and click 'Return Items'. You'll receive a confirmation email with further instructions.",
+                f"For returning the {product1['name']}, you have 30 days from the delivery date. Original packaging is preferred but not required. Once we receive the return, refunds typically process within 5-7 business days to your original payment method."
+            ]
+            response_parts.append(rng.choice(return_responses))
+        
+        elif intent == "shipping_inquiry":
+            shipping_responses = [
+                f"Shipping for the {product1['name']} to California would fall under our standard shipping policy: {policies['shipping']}",
+                f"Yes, we offer expedited shipping for the {product1['name']} at $12.99, which typically delivers within 1-2 business days depending on your location.",
+                f"All orders, including the {product1['name']}, come with tracking information that will be emailed to you once your order ships. You can also track your order through your account on our website."
+            ]
+            response_parts.append(rng.choice(shipping_responses))
+    
+    # Combine response parts
+    for part in response_parts:
+        response += part + " "
+    
+    # Add closing
+    closings = [
+        "Is there anything else I can help you with today?",
+        "Please let me know if you have any other questions!",
+        "We hope this information helps with your decision.",
+        "Thank you for choosing GreenThumb Goods for your sustainable living needs.",
+        "We're here if you need any further assistance."
+    ]
+    response += rng.choice(closings)
+    
+    return {
+        "query": complex_query,
+        "response": response,
+        "intents": selected_intents,
+        "products_mentioned": [product1['name'], product2['name']],
+        "categories_mentioned": [category1, category2],
+        "policies_mentioned": policy_key if "policy_question" in selected_intents else None
+    }
+
+
+def measure(generator, count, seed):
+    """Generate `count` records with a seeded RNG and return (records, records/sec)."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    records = [generator(rng) for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    return records, count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_complex_query against the original implementation.")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    legacy_records, legacy_rate = measure(legacy_generate_complex_query, args.count, args.seed)
+    new_records, new_rate = measure(generate_complex_query, args.count, args.seed)
+
+    print(f"Original implementation: {legacy_rate:>10,.0f} records/sec")
+    print(f"Template tables:         {new_rate:>10,.0f} records/sec ({new_rate / legacy_rate:.1f}x)")
+
+    identical = legacy_records == new_records
+    print(f"Identical records for seed {args.seed}: {'yes' if identical else 'NO'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
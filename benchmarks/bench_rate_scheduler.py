@@ -0,0 +1,93 @@
+"""
+Benchmark: priority-aware rate scheduler
+A separate process floods the shared budget with batch requests (like a Section 3 evaluation run)
+while this process sends interactive requests at a steady rate (like chat users). Interactive
+waits are compared with both workloads in one class (no priority) and with interactive priority.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from load_test import distribution
+from rate_scheduler import BATCH, INTERACTIVE, RateScheduler
+
+
+def flood(path, rpm, tpm, tokens, workers, duration, granted):
+    """Batch workload: workers acquire back to back for duration seconds."""
+    scheduler = RateScheduler(rpm, tpm, path=path)
+    deadline = time.time() + duration
+
+    def worker():
+        while time.time() < deadline:
+            scheduler.acquire(tokens, BATCH)
+            with granted.get_lock():
+                granted.value += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=duration + 5)
+
+
+def run(args, interactive_class):
+    with tempfile.TemporaryDirectory() as state_dir:
+        path = os.path.join(state_dir, "rate_scheduler.json")
+        granted = multiprocessing.Value("i", 0)
+        batch = multiprocessing.Process(target=flood, args=(path, args.rpm, args.tpm, args.tokens, args.batch_workers,
+                                                            args.duration, granted))
+        batch.start()
+        time.sleep(1.0)  # let the batch run drain the buckets first
+
+        scheduler = RateScheduler(args.rpm, args.tpm, path=path)
+        waits = []
+
+        def interactive():
+            waits.append(scheduler.acquire(args.tokens, interactive_class))
+
+        threads = []
+        end = time.time() + args.duration - 2.0
+        while time.time() < end:
+            thread = threading.Thread(target=interactive)
+            thread.start()
+            threads.append(thread)
+            time.sleep(1.0 / args.interactive_rate)
+        for thread in threads:
+            thread.join()
+        batch.join()
+        stats = scheduler.stats()
+    return waits, granted.value, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interactive waits under a competing batch workload.")
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=240000)
+    parser.add_argument("--tokens", type=int, default=500, help="Tokens per request")
+    parser.add_argument("--batch-workers", type=int, default=8)
+    parser.add_argument("--interactive-rate", type=float, default=2.0, help="Interactive requests per second")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    capacity = min(args.rpm / 60.0, args.tpm / 60.0 / args.tokens)
+    print(f"Budget: {args.rpm} rpm, {args.tpm} tpm ({capacity:.1f} requests/s at {args.tokens} tokens); "
+          f"{args.batch_workers} batch workers in another process, {args.interactive_rate:.1f} interactive requests/s")
+    print("The buckets start with a full minute of budget, which the batch workers drain first.\n")
+    for label, interactive_class in (("No priority", BATCH), ("Interactive priority", INTERACTIVE)):
+        waits, batch_granted, stats = run(args, interactive_class)
+        dist = distribution(waits)
+        print(f"{label:<21} interactive wait p50 {dist['p50'] * 1000:6.0f} ms  p95 {dist['p95'] * 1000:6.0f} ms  "
+              f"max {dist['max'] * 1000:6.0f} ms  (n={dist['count']}); batch {batch_granted} granted")
+    print("\nShared state after the priority run: " + ", ".join(
+        f"{priority} {stats[priority]['granted']} granted, mean wait {stats[priority]['wait_mean_s'] * 1000:.0f} ms"
+        for priority in (INTERACTIVE, BATCH)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmark suite: dataset generation and prompt-building hot paths
+Times generate_complex_query, create_zero_shot_prompt, create_few_shot_prompt,
+select_challenging_queries and the JSON/CSV dataset writers on seeded fixtures of several
+sizes, with peak traced memory for each. Results can be saved as a baseline; later runs are
+compared against it and the script exits with status 1 if anything regressed beyond the threshold.
+
+Usage:
+    python benchmarks/bench_suite.py --save-baseline
+    python benchmarks/bench_suite.py --sizes 50,1000,10000,100000,1000000 --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("GREENTHUMB_CACHE", "0")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from few_shot_index import FewShotIndex
+from section1_dataset import generate_complex_query, iter_records, policies, products, write_csv_dataset, write_json_dataset
+from section3_prompt_engineering import create_few_shot_prompt, create_zero_shot_prompt, select_challenging_queries
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_suite_baseline.json")
+
+# Queries prompted per few-shot run (the index size is what varies), and the largest index built
+FEW_SHOT_QUERIES = 100
+FEW_SHOT_MAX_RECORDS = 100000
+
+# Differences below these are treated as noise rather than regressions
+MIN_TIME_DELTA_S = 0.005
+MIN_MEMORY_DELTA_MB = 0.5
+
+
+def bench_generate(records, size, seed, workdir):
+    rng = random.Random(seed)
+    return (lambda: sum(1 for _ in iter_records(size, rng))), size
+
+
+def bench_zero_shot(records, size, seed, workdir):
+    queries = [record['query'] for record in records]
+    return (lambda: [create_zero_shot_prompt(query, products, policies, 400) for query in queries]), len(queries)
+
+
+def bench_few_shot(records, size, seed, workdir):
+    # The index build is untimed setup (bench_few_shot_index.py covers it); prompting scales with its size
+    index = FewShotIndex()
+    index.update(records)
+    queries = records[:FEW_SHOT_QUERIES]
+    return (lambda: [create_few_shot_prompt(item['query'], index=index, k=3, intents=item['intents']) for item in queries]), len(queries)
+
+
+def bench_select(records, size, seed, workdir):
+    return (lambda: select_challenging_queries(records, 5)), size
+
+
+def bench_writer(write, suffix):
+    def setup(records, size, seed, workdir):
+        # Every size and repetition overwrites one file, removed with workdir when the suite ends
+        path = os.path.join(workdir, f"dataset.{suffix}")
+        return (lambda: write(records, path)), size
+    return setup
+
+
+# name -> (setup returning (timed callable, items it processes), largest size the benchmark runs at);
+# setups take (records, size, seed, workdir), where workdir is a scratch directory shared by the run
+BENCHMARKS = {
+    "generate_complex_query": (bench_generate, None),
+    "create_zero_shot_prompt": (bench_zero_shot, None),
+    "create_few_shot_prompt": (bench_few_shot, FEW_SHOT_MAX_RECORDS),
+    "select_challenging_queries": (bench_select, None),
+    "write_json_dataset": (bench_writer(write_json_dataset, "json"), None),
+    "write_csv_dataset": (bench_writer(write_csv_dataset, "csv"), None)
+}
+
+
+def measure(func, repeats, time_budget=2.0):
+    """
+    Time func (best of up to `repeats` runs, stopping early once time_budget seconds are spent),
+    then run it once more under tracemalloc for the peak allocation.
+
+    Returns:
+        Tuple of (best seconds, peak traced MB)
+    """
+    timings = []
+    spent = 0.0
+    while len(timings) < max(1, repeats) and (not timings or spent < time_budget):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        spent += timings[-1]
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def run_suite(sizes, names, seed=1234, repeats=3):
+    """
+    Run the selected benchmarks at each fixture size.
+
+    Fixtures are the first `size` records of one seeded generate_complex_query stream, so every
+    run (and every machine) benchmarks the same records.
+
+    Returns:
+        Dictionary of benchmark name -> {size (str): {"seconds", "peak_mb"}}
+    """
+    rng = random.Random(seed)
+    fixture = [generate_complex_query(rng) for _ in range(max(sizes))]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as workdir:
+        for name in names:
+            setup, max_size = BENCHMARKS[name]
+            results[name] = {}
+            for size in sizes:
+                if max_size and size > max_size:
+                    continue
+                func, items = setup(fixture[:size], size, seed, workdir)
+                seconds, peak_mb = measure(func, repeats)
+                results[name][str(size)] = {"seconds": seconds, "peak_mb": peak_mb}
+                print(f"{name:<28} {size:>9,} {seconds:>10.4f} {seconds / items * 1e6:>8.2f} {peak_mb:>9.1f}", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    A measurement regresses when it exceeds the baseline by more than threshold (a fraction)
+    and by more than the noise floor (MIN_TIME_DELTA_S / MIN_MEMORY_DELTA_MB).
+
+    Returns:
+        List of (benchmark, size, metric, baseline value, current value) regressions
+    """
+    regressions = []
+    for name, by_size in results.items():
+        for size, current in by_size.items():
+            previous = baseline.get(name, {}).get(size)
+            if previous is None:
+                continue
+            for metric, floor in (("seconds", MIN_TIME_DELTA_S), ("peak_mb", MIN_MEMORY_DELTA_MB)):
+                if current[metric] > previous[metric] * (1 + threshold) and current[metric] - previous[metric] > floor:
+                    regressions.append((name, size, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generation and prompt-building hot paths.")
+    parser.add_argument("--sizes", default="50,1000,10000,100000", help="Comma-separated fixture sizes (records)")
+    parser.add_argument("--only", default=None, help=f"Comma-separated benchmarks to run (from: {', '.join(BENCHMARKS)})")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per measurement (best is kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown / memory growth (0.2 = 20%%)")
+    parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    names = [name.strip() for name in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    print(f"{'benchmark':<28} {'records':>9} {'seconds':>10} {'us/item':>8} {'peak MB':>9}")
+    report = {
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": run_suite(sizes, names, args.seed, args.repeats)
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        # Merge, so a partial run (--only / --sizes) updates just the measurements it made
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        for name, by_size in report["results"].items():
+            baseline.setdefault("results", {}).setdefault(name, {}).update(by_size)
+        baseline.update({key: value for key, value in report.items() if key != "results"})
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = compare(report["results"], baseline.get("results", {}), args.threshold)
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for name, size, metric, previous, current in regressions:
+        print(f"  {name} @ {int(size):,} records: {metric} {previous:.4g} -> {current:.4g} (+{current / previous - 1:.0%})")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: tracing overhead
+Runs an empty request with the same spans as a chat submit (render, prompt build, fast path,
+backend call, post-processing) with tracing disabled, with in-memory metrics, and with JSONL
+export, and reports the added cost per request. Also checks the Prometheus endpoint responds.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracing import Tracer
+
+SPANS = ("render", "prompt_build", "fast_path", "backend_call", "post_process", "render")
+
+
+def traced_requests(tracer, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        with tracer.request("chat", mode="Zero-shot", stream=True) as trace:
+            for name in SPANS:
+                with trace.span(name):
+                    pass
+            trace.set(prompt_tokens=120, response_tokens=80)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-request tracing overhead.")
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [
+            ("disabled", Tracer(enabled=False)),
+            ("metrics only", Tracer()),
+            ("metrics + JSONL", Tracer(jsonl_path=os.path.join(tmp, "traces.jsonl")))
+        ]
+        print(f"{'tracing':<16} {'us/request':>11}")
+        for label, tracer in runs:
+            traced_requests(tracer, min(1000, args.requests))  # warm up
+            print(f"{label:<16} {traced_requests(tracer, args.requests) * 1e6:>11.2f}")
+            tracer.close()
+
+    tracer = Tracer()
+    traced_requests(tracer, 10)
+    server = tracer.start_metrics_server(0)
+    response = requests.get(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5)
+    series = [line for line in response.text.splitlines() if line and not line.startswith("#")]
+    print(f"\nPrometheus endpoint: HTTP {response.status_code}, {len(series)} series")
+    tracer.close()
+
+
+if __name__ == "__main__":
+    main()
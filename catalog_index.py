@@ -0,0 +1,223 @@
+"""
+Product catalog index for GreenThumb Goods
+This module indexes the product catalog (category -> list of product dicts) for fast entity linking:
+an exact name/alias map, an inverted token index for partial mentions, and a word-level
+Aho-Corasick matcher that finds every product and category mentioned in a query in one pass.
+"""
+
+from collections import deque
+
+from section1_dataset import products
+from text_features import tokenize
+
+# Extra ways customers refer to each category (the category key itself is always an alias)
+CATEGORY_ALIASES = {
+    "plants": ("plants", "plant"),
+    "tools": ("tools", "tool", "garden tools"),
+    "soil_fertilizers": ("soil", "fertilizer", "fertilizers", "soil and fertilizers"),
+    "eco_home": ("eco-home", "eco home products", "eco-home products")
+}
+
+
+def normalize_name(text):
+    """Normalize a product name, alias or query fragment to space-joined lowercase tokens."""
+    return " ".join(tokenize(text))
+
+
+class CatalogIndex:
+    """
+    Entity-linking index over a product catalog.
+
+    Product names and aliases are compiled into a token trie with Aho-Corasick failure links,
+    so matching a query costs one pass over its tokens regardless of catalog size.
+    Overlapping mentions resolve leftmost-longest (e.g. "compost tea brewing kit" wins over
+    a shorter alias inside it).
+    """
+
+    def __init__(self, catalog=None, category_aliases=CATEGORY_ALIASES):
+        self.products = []
+        self.categories = []
+        self._by_name = {}
+        self._postings = {}
+        self._patterns = []
+        self._compiled = False
+        for category, items in (catalog or {}).items():
+            self.add_category(category, category_aliases.get(category, ()))
+            for product in items:
+                self.add_product(category, product)
+
+    def __len__(self):
+        return len(self.products)
+
+    def add_category(self, category, aliases=()):
+        """Register a category and the aliases that refer to it."""
+        if category not in self.categories:
+            self.categories.append(category)
+        for alias in (category, *aliases):
+            tokens = tuple(tokenize(alias))
+            if tokens:
+                self._patterns.append((tokens, ("category", category)))
+        self._compiled = False
+
+    def add_product(self, category, product, aliases=()):
+        """
+        Add a product to the index.
+
+        Args:
+            category: Category key the product belongs to
+            product: Product dictionary (name, price, description, optional "aliases")
+            aliases: Extra names the product is known by
+
+        Returns:
+            The product's id within the index
+        """
+        if category not in self.categories:
+            self.add_category(category)
+        product_id = len(self.products)
+        self.products.append((category, product))
+        for name in (product['name'], *product.get('aliases', ()), *aliases):
+            tokens = tuple(tokenize(name))
+            if not tokens:
+                continue
+            self._by_name.setdefault(" ".join(tokens), product_id)
+            self._patterns.append((tokens, ("product", product_id)))
+        for token in set(tokenize(product['name'])):
+            self._postings.setdefault(token, []).append(product_id)
+        self._compiled = False
+        return product_id
+
+    def _compile(self):
+        """Build the token trie and its failure links from the registered patterns."""
+        goto, outputs = [{}], [[]]
+        for tokens, entity in self._patterns:
+            state = 0
+            for token in tokens:
+                next_state = goto[state].get(token)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][token] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append((len(tokens), entity))
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and token not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(token, 0)
+                fail[child] = target if target != child else 0
+                if outputs[fail[child]]:
+                    outputs[child] = outputs[child] + outputs[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(out) for out in outputs]
+        self._compiled = True
+
+    def match(self, text):
+        """
+        Find every product and category mention in a text.
+
+        Args:
+            text: Query or other free text
+
+        Returns:
+            List of (start, end, kind, key) token spans, where kind is "product" (key is the
+            product id) or "category" (key is the category), in order of appearance with
+            overlaps resolved leftmost-longest
+        """
+        if not self._compiled:
+            self._compile()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = []
+        state = 0
+        for position, token in enumerate(tokenize(text)):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, (kind, key) in outputs[state]:
+                found.append((position + 1 - length, position + 1, kind, key))
+
+        found.sort(key=lambda span: (span[0], span[0] - span[1]))
+        matches = []
+        covered = 0
+        for span in found:
+            if span[0] >= covered:
+                matches.append(span)
+                covered = span[1]
+        return matches
+
+    def extract(self, text):
+        """
+        Extract the products and categories a text mentions.
+
+        A mentioned product also counts as a mention of its category.
+
+        Args:
+            text: Query or other free text
+
+        Returns:
+            Dictionary with "products" (list of (category, product) tuples) and
+            "categories" (list of category keys), each in order of first mention
+        """
+        product_ids, categories = [], []
+        for _, _, kind, key in self.match(text):
+            if kind == "product":
+                if key not in product_ids:
+                    product_ids.append(key)
+                key = self.products[key][0]
+            if key not in categories:
+                categories.append(key)
+        return {"products": [self.products[i] for i in product_ids], "categories": categories}
+
+    def lookup(self, name):
+        """
+        Look up a product by exact name or alias (case and punctuation insensitive).
+
+        Returns:
+            (category, product) tuple, or None if no product has that name
+        """
+        product_id = self._by_name.get(normalize_name(name))
+        return self.products[product_id] if product_id is not None else None
+
+    def search(self, text, limit=5):
+        """
+        Rank products by how many of their name tokens appear in a text.
+
+        Useful for partial mentions ("the bonsai", "your tumbler") that the exact matcher misses.
+
+        Args:
+            text: Query or other free text
+            limit: Maximum number of products to return
+
+        Returns:
+            List of (category, product) tuples, best match first
+        """
+        overlap = {}
+        for token in set(tokenize(text)):
+            for product_id in self._postings.get(token, ()):
+                overlap[product_id] = overlap.get(product_id, 0) + 1
+        ranked = sorted(overlap, key=lambda i: (-overlap[i], i))[:limit]
+        return [self.products[i] for i in ranked]
+
+
+_default_indexes = {}
+
+
+def get_catalog_index(catalog=products):
+    """
+    Return a shared CatalogIndex for a catalog, building it on first use.
+
+    The index is cached per catalog object, so pass the same dict to reuse it.
+    """
+    cached = _default_indexes.get(id(catalog))
+    if cached is None or cached[0] is not catalog:
+        cached = (catalog, CatalogIndex(catalog))
+        _default_indexes[id(catalog)] = cached
+    return cached[1]
@@ -0,0 +1,111 @@
+"""
+Bounded chat history for the GreenThumb Goods Streamlit app
+This module keeps a conversation's messages with their rendered HTML cached at insert time,
+compacts old turns into short snippets once a cap is reached, and pages through older messages
+so each rerun renders a bounded number of messages regardless of conversation length.
+"""
+
+import html
+from collections import deque
+
+
+def render_chat_message(message, is_user=False):
+    """Render one chat bubble as HTML."""
+    avatar = "👤" if is_user else "🌱"
+    role_class = "user" if is_user else "bot"
+    return f"""
+    <div class="chat-message {role_class}">
+        <div class="avatar">{avatar}</div>
+        <div class="message">{message}</div>
+    </div>
+    """
+
+
+def render_caption(text):
+    """Render a small grey caption line (used for per-reply latency metrics) as HTML."""
+    return f'<div class="chat-caption">{html.escape(text)}</div>'
+
+
+class ChatHistory:
+    """
+    Conversation history with cached rendering and compaction.
+
+    At most max_messages full messages are kept. When the cap is exceeded, the oldest
+    compact_batch messages are replaced by truncated snippets in a bounded archive, so
+    session memory stays flat however long the conversation runs.
+    """
+
+    def __init__(self, max_messages=200, compact_batch=50, snippet_chars=80, max_archive=1000):
+        self.max_messages = max_messages
+        self.compact_batch = compact_batch
+        self.snippet_chars = snippet_chars
+        self.messages = []
+        self.archive = deque(maxlen=max_archive)
+        self.compacted = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, role, content, metrics=None, caption=None):
+        """
+        Add a message, rendering its HTML once.
+
+        Args:
+            role: "user" or "assistant"
+            content: Message text
+            metrics: Optional latency/intent metrics for the message
+            caption: Optional caption text shown under the message
+
+        Returns:
+            The stored message dictionary
+        """
+        rendered = render_chat_message(content, role == "user")
+        if caption:
+            rendered += render_caption(caption)
+        message = {"role": role, "content": content, "metrics": metrics, "html": rendered}
+        self.messages.append(message)
+        if len(self.messages) > self.max_messages:
+            self.compact()
+        return message
+
+    def compact(self):
+        """Move the oldest messages into the snippet archive."""
+        count = min(self.compact_batch, len(self.messages))
+        for message in self.messages[:count]:
+            snippet = message["content"][:self.snippet_chars]
+            if len(message["content"]) > self.snippet_chars:
+                snippet += "…"
+            self.archive.append({"role": message["role"], "snippet": snippet})
+        del self.messages[:count]
+        self.compacted += count
+
+    def recent(self, count):
+        """Return the newest count messages."""
+        return self.messages[-count:] if count > 0 else []
+
+    def older_page_count(self, recent_count, page_size):
+        """Number of pages of messages older than the recent window."""
+        older = max(0, len(self.messages) - recent_count)
+        return (older + page_size - 1) // page_size
+
+    def older_page(self, page, recent_count, page_size):
+        """
+        Return one page of messages older than the recent window.
+
+        Args:
+            page: Zero-based page number, where page 0 holds the messages just before the recent window
+            recent_count: Size of the recent window
+            page_size: Messages per page
+
+        Returns:
+            List of messages in chronological order
+        """
+        end = max(0, len(self.messages) - recent_count) - page * page_size
+        if end <= 0:
+            return []
+        return self.messages[max(0, end - page_size):end]
+
+
+def render_messages(messages):
+    """Join the cached HTML of several messages into one block."""
+    return "".join(message["html"] for message in messages)
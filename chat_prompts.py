@@ -0,0 +1,35 @@
+"""
+Chat prompts for the GreenThumb Goods assistant
+This module holds the system prompt for each prompt strategy offered in the Streamlit app and
+builds the model prompt for a customer query, so the app and the load-testing harness share it.
+"""
+
+# Instructions (zero-shot) or example exchanges (few-shot) placed before the conversation
+PROMPT_HEADERS = {
+    "Zero-shot": "You are a helpful assistant for GreenThumb Goods, a company that sells eco-friendly gardening supplies.\n\n",
+    "Few-shot": (
+        "Customer: What plants are good for beginners?\n"
+        "Assistant: Our Herb Garden Starter Kit and Indoor Succulent Collection are great for beginners.\n\n"
+        "Customer: What's your return policy?\n"
+        "Assistant: We offer a 30-day satisfaction guarantee on all items. Perishables must be returned within 7 days.\n\n"
+    )
+}
+
+
+def create_prompt(user_query, mode, history=None, context=None):
+    """
+    Build the prompt for a customer query.
+
+    Args:
+        user_query: The new customer query
+        mode: "Zero-shot" or "Few-shot"
+        history: Prior messages (dicts with "role" and "content"), oldest first
+        context: Optional ConversationContext that fits the history into its token budget
+
+    Returns:
+        The prompt string, ending with "Assistant:"
+    """
+    header = PROMPT_HEADERS[mode]
+    if context is not None:
+        return context.build_prompt(header, history or [], user_query)
+    return header + f"Customer: {user_query}\nAssistant:"
@@ -0,0 +1,158 @@
+"""
+Relevance-pruned context assembly for GreenThumb Goods prompts
+This module detects which policies, products and categories a customer query touches and
+builds the prompt context from only those sections, under a configurable token budget.
+"""
+
+from catalog_index import get_catalog_index
+from section1_dataset import policies, products
+from token_utils import estimate_tokens
+
+# Keywords that indicate a query touches each policy
+POLICY_KEYWORDS = {
+    "returns": ("return", "refund", "exchang", "send it back", "30-day"),
+    "shipping": ("ship", "deliver", "track", "carrier", "express", "expedite", "international"),
+    "sustainability": ("sustainab", "packaging", "eco-friendly", "carbon", "recycl", "biodegradable", "environment"),
+    "rewards": ("reward", "points", "member", "loyalty", "discount"),
+    "warranty": ("warrant", "defect", "guarantee", "stopped working", "broken", "damaged", "claim")
+}
+
+# Human-readable category lines (as used in the full zero-shot prompt)
+CATEGORY_DESCRIPTIONS = {
+    "plants": "Plants (herb kits, succulents, seedlings, etc.)",
+    "tools": "Tools (garden tools, lights, composting equipment, etc.)",
+    "soil_fertilizers": "Soil & Fertilizers (organic soils, natural fertilizers, etc.)",
+    "eco_home": "Eco-Home Products (sustainable kitchen items, reusable goods, etc.)"
+}
+
+# Keywords that indicate a query is about a category in general
+CATEGORY_KEYWORDS = {
+    "plants": ("plant", "herb", "succulent", "seed", "flower", "bonsai", "garden"),
+    "tools": ("tool", "light", "compost", "rain", "stake"),
+    "soil_fertilizers": ("soil", "fertiliz", "compost", "nutrient", "root"),
+    "eco_home": ("eco_home", "kitchen", "home", "reusable", "wrap", "utensil", "bag")
+}
+
+POLICY_TITLES = {
+    "returns": "Returns",
+    "shipping": "Shipping",
+    "sustainability": "Sustainability",
+    "rewards": "Rewards Program",
+    "warranty": "Warranty"
+}
+
+
+def detect_policies(query):
+    """Return the policy keys a query touches, in POLICY_KEYWORDS order."""
+    text = query.lower()
+    return [key for key, keywords in POLICY_KEYWORDS.items() if any(k in text for k in keywords)]
+
+
+def detect_products(query, product_info=products):
+    """
+    Find catalog products mentioned by name in a query.
+
+    Args:
+        query: Customer query text
+        product_info: Catalog as a dict of category -> list of product dicts
+
+    Returns:
+        List of (category, product) tuples in order of first mention
+    """
+    return get_catalog_index(product_info).extract(query)["products"]
+
+
+def detect_categories(query, mentioned_products=()):
+    """Return categories touched by keyword or by a mentioned product, in catalog order."""
+    text = query.lower()
+    touched = {category for category, _ in mentioned_products}
+    touched.update(category for category, keywords in CATEGORY_KEYWORDS.items() if any(k in text for k in keywords))
+    return [category for category in CATEGORY_DESCRIPTIONS if category in touched]
+
+
+def assemble_context(query, product_info=products, policy_info=policies, token_budget=400):
+    """
+    Build the prompt context sections relevant to a query.
+
+    Sections are added in priority order (policies, then products, then categories)
+    and any section that would exceed the token budget is skipped.
+
+    Args:
+        query: Customer query text
+        product_info: Catalog as a dict of category -> list of product dicts
+        policy_info: Dictionary of policy key -> policy text
+        token_budget: Maximum estimated tokens for the assembled context
+
+    Returns:
+        Dictionary with the context text, the included policy/product/category keys and its token count
+    """
+    mentioned = detect_products(query, product_info)
+    candidates = []
+    for key in detect_policies(query):
+        if key in policy_info:
+            candidates.append(("policy", key, f"{POLICY_TITLES.get(key, key.title())}: {policy_info[key]}"))
+    for category, product in mentioned:
+        candidates.append(("product", product['name'],
+                           f"{product['name']} (${product['price']}): {product['description']}"))
+    categories = detect_categories(query, mentioned) or list(CATEGORY_DESCRIPTIONS)
+    for category in categories:
+        candidates.append(("category", category, CATEGORY_DESCRIPTIONS[category]))
+
+    included = {"policy": [], "product": [], "category": []}
+    lines = {"policy": [], "product": [], "category": []}
+    used = 0
+    for kind, key, line in candidates:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            continue
+        used += cost
+        included[kind].append(key)
+        lines[kind].append(line)
+
+    sections = []
+    if lines["product"]:
+        sections.append("RELEVANT PRODUCTS:\n" + "\n".join(f"- {line}" for line in lines["product"]))
+    if lines["category"]:
+        sections.append("PRODUCT CATEGORIES:\n" + "\n".join(f"- {line}" for line in lines["category"]))
+    if lines["policy"]:
+        sections.append("RELEVANT COMPANY POLICIES:\n" +
+                        "\n".join(f"{i}. {line}" for i, line in enumerate(lines["policy"], 1)))
+    text = "\n\n".join(sections)
+    return {
+        "text": text,
+        "policies": included["policy"],
+        "products": included["product"],
+        "categories": included["category"],
+        "tokens": estimate_tokens(text)
+    }
+
+
+def report_token_savings(queries, build_full_prompt, build_pruned_prompt):
+    """
+    Compare prompt sizes with full and relevance-pruned context.
+
+    Args:
+        queries: Customer query texts
+        build_full_prompt: Function mapping a query to the full-context prompt
+        build_pruned_prompt: Function mapping a query to the pruned-context prompt
+
+    Returns:
+        Dictionary with per-prompt savings and totals
+    """
+    savings = []
+    full_total = pruned_total = 0
+    for query in queries:
+        full = estimate_tokens(build_full_prompt(query))
+        pruned = estimate_tokens(build_pruned_prompt(query))
+        full_total += full
+        pruned_total += pruned
+        savings.append(full - pruned)
+    count = len(savings)
+    return {
+        "prompts": count,
+        "full_tokens": full_total,
+        "pruned_tokens": pruned_total,
+        "saved_per_prompt": savings,
+        "mean_saved": sum(savings) / count if count else 0.0,
+        "saved_fraction": 1 - pruned_total / full_total if full_total else 0.0
+    }
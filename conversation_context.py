@@ -0,0 +1,156 @@
+"""
+Token-budgeted conversation context for GreenThumb Goods chat prompts
+This module builds a multi-turn prompt from the chat history under a strict token budget:
+recent turns are kept verbatim, older turns are summarized to one line each, and the rest are
+dropped. Rendered turns and the assembled history prefix are cached between turns.
+"""
+
+import re
+from collections import OrderedDict, deque
+
+from token_utils import estimate_tokens
+
+SUMMARY_HEADER = "Earlier in this conversation (summary):\n"
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def summarize_message(message, max_chars=120):
+    """Shorten a message to its first sentence, truncated to max_chars."""
+    text = " ".join(message["content"].split())
+    first = SENTENCE_END.split(text, maxsplit=1)[0]
+    if len(first) > max_chars:
+        first = first[:max_chars].rstrip() + "…"
+    label = "Customer asked" if message["role"] == "user" else "We answered"
+    return f"- {label}: {first}\n"
+
+
+class ConversationContext:
+    """
+    Builds prompts from chat history within a token budget and records prompt size per turn.
+
+    Args:
+        token_budget: Maximum estimated prompt tokens (leave room for the reply in the model window)
+        recent_messages: Maximum number of latest messages kept verbatim
+        summary_chars: Length of the one-line summary of an older message
+        cache_size: Number of rendered messages kept in the render cache
+    """
+
+    def __init__(self, token_budget=3400, recent_messages=6, summary_chars=120, cache_size=512):
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self.summary_chars = summary_chars
+        self.cache_size = cache_size
+        self._rendered = OrderedDict()
+        self._prefix_key = None
+        self._prefix = ""
+        self.turns = deque(maxlen=500)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _render(self, message):
+        """Return (cache key, (verbatim text, its tokens, summary line, its tokens)) for a message, cached by content."""
+        key = (message["role"], message["content"])
+        entry = self._rendered.get(key)
+        if entry is not None:
+            self._rendered.move_to_end(key)
+            self.cache_hits += 1
+            return key, entry
+        self.cache_misses += 1
+        if message["role"] == "user":
+            verbatim = f"Customer: {message['content'].strip()}\n"
+        else:
+            verbatim = f"Assistant: {message['content'].strip()}\n\n"
+        summary = summarize_message(message, self.summary_chars)
+        entry = (verbatim, estimate_tokens(verbatim), summary, estimate_tokens(summary))
+        self._rendered[key] = entry
+        if len(self._rendered) > self.cache_size:
+            self._rendered.popitem(last=False)
+        return key, entry
+
+    def build_prompt(self, header, history, query):
+        """
+        Build a prompt from a header, prior messages and the new query.
+
+        The header and the query are always included (even if they alone exceed the budget).
+        The latest messages are added verbatim, newest first, while they fit; older messages
+        get a one-line summary while those fit; anything older is dropped.
+
+        Args:
+            header: Instructions / few-shot examples placed before the conversation
+            history: Prior messages (dicts with "role" and "content"), oldest first
+            query: The new customer query
+
+        Returns:
+            The prompt string
+        """
+        tail = f"Customer: {query}\nAssistant:"
+        used = estimate_tokens(header) + estimate_tokens(tail)
+
+        # Walk back from the newest message, rendering only messages that are considered
+        rendered = {}
+        index = len(history) - 1
+        verbatim = []
+        while index >= 0 and len(verbatim) < self.recent_messages:
+            rendered[index] = self._render(history[index])
+            if used + rendered[index][1][1] > self.token_budget:
+                break
+            used += rendered[index][1][1]
+            verbatim.append(index)
+            index -= 1
+
+        summarized = []
+        if index >= 0 and used + estimate_tokens(SUMMARY_HEADER) <= self.token_budget:
+            used += estimate_tokens(SUMMARY_HEADER)
+            while index >= 0:
+                if index not in rendered:
+                    rendered[index] = self._render(history[index])
+                if used + rendered[index][1][3] > self.token_budget:
+                    break
+                used += rendered[index][1][3]
+                summarized.append(index)
+                index -= 1
+            if not summarized:
+                used -= estimate_tokens(SUMMARY_HEADER)
+        dropped = index + 1
+        verbatim.reverse()
+        summarized.reverse()
+
+        # Reuse the assembled history prefix when the selected turns have not changed
+        prefix_key = (tuple(rendered[i][0] for i in summarized), tuple(rendered[i][0] for i in verbatim))
+        prefix_hit = prefix_key == self._prefix_key
+        if not prefix_hit:
+            parts = []
+            if summarized:
+                parts.append(SUMMARY_HEADER + "".join(rendered[i][1][2] for i in summarized) + "\n")
+            parts.extend(rendered[i][1][0] for i in verbatim)
+            self._prefix_key, self._prefix = prefix_key, "".join(parts)
+
+        self.turns.append({
+            "prompt_tokens": used,
+            "verbatim_messages": len(verbatim),
+            "summarized_messages": len(summarized),
+            "dropped_messages": dropped,
+            "prefix_cache_hit": prefix_hit
+        })
+        return header + self._prefix + tail
+
+    def stats(self):
+        """
+        Report prompt size and cache metrics over recorded turns.
+
+        Returns:
+            Dictionary with turns, last/mean/max prompt tokens, messages summarized/dropped in the
+            last turn, and the render cache hit rate
+        """
+        tokens = [turn["prompt_tokens"] for turn in self.turns]
+        last = self.turns[-1] if self.turns else {}
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "turns": len(tokens),
+            "last_prompt_tokens": tokens[-1] if tokens else 0,
+            "mean_prompt_tokens": sum(tokens) / len(tokens) if tokens else 0.0,
+            "max_prompt_tokens": max(tokens) if tokens else 0,
+            "last_summarized_messages": last.get("summarized_messages", 0),
+            "last_dropped_messages": last.get("dropped_messages", 0),
+            "render_cache_hit_rate": self.cache_hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,184 @@
+"""
+Columnar dataset export for GreenThumb Goods
+This module writes generated records to Parquet or Feather with intents, products, categories
+and policies stored as dictionary-encoded (list) columns, and loads back only requested columns.
+Requires pyarrow.
+"""
+
+import glob
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for columnar output
+    pa = None
+
+COLUMNAR_FORMATS = ("parquet", "feather")
+
+# Columns holding lists of labels, and the single-label policy column
+LIST_COLUMNS = ("intents", "products_mentioned", "categories_mentioned")
+LABEL_COLUMNS = ("policies_mentioned",)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Columnar output requires pyarrow. Install it with: pip install pyarrow")
+
+
+def _index_type(size):
+    return pa.int8() if size < 128 else pa.int16() if size < 32768 else pa.int32()
+
+
+def make_schema(vocabularies):
+    """
+    Build the Arrow schema for generated records.
+
+    Args:
+        vocabularies: Dictionary mapping each label column to its list of possible values
+
+    Returns:
+        A pyarrow.Schema with dictionary-encoded label columns
+    """
+    _require_pyarrow()
+    fields = [pa.field("query", pa.string()), pa.field("response", pa.string())]
+    for name in LIST_COLUMNS:
+        value_type = pa.dictionary(_index_type(len(vocabularies[name])), pa.string())
+        fields.append(pa.field(name, pa.list_(value_type)))
+    for name in LABEL_COLUMNS:
+        fields.append(pa.field(name, pa.dictionary(_index_type(len(vocabularies[name])), pa.string())))
+    return pa.schema(fields)
+
+
+class ColumnarWriter:
+    """
+    Incrementally write records to a Parquet or Feather file in fixed-size batches.
+
+    Every batch shares the same fixed dictionaries (the vocabularies), so label columns are
+    stored as small integer codes and batches can be appended without re-encoding.
+    """
+
+    def __init__(self, path, vocabularies, format="parquet", batch_size=50000, compression="zstd"):
+        _require_pyarrow()
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown columnar format: {format}")
+        self.path = path
+        self.format = format
+        self.batch_size = batch_size
+        self.schema = make_schema(vocabularies)
+        self._dictionaries = {name: pa.array(list(values), pa.string()) for name, values in vocabularies.items()}
+        self._codes = {name: {value: i for i, value in enumerate(values)} for name, values in vocabularies.items()}
+        self._buffer = []
+        self.rows = 0
+
+        if format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        else:
+            sink = pa.OSFile(path, "wb")
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            self._sink = sink
+            self._writer = pa.ipc.new_file(sink, self.schema, options=options)
+
+    def write(self, record):
+        """Buffer one record, flushing a batch when the buffer is full."""
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def _list_column(self, name, records):
+        codes = self._codes[name]
+        field_type = self.schema.field(name).type
+        offsets, indices = [0], []
+        for record in records:
+            indices.extend(codes[value] for value in record[name])
+            offsets.append(len(indices))
+        values = pa.DictionaryArray.from_arrays(
+            pa.array(indices, field_type.value_type.index_type), self._dictionaries[name]
+        )
+        return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), values)
+
+    def _label_column(self, name, records):
+        codes = self._codes[name]
+        index_type = self.schema.field(name).type.index_type
+        indices = [codes[record[name]] if record[name] else None for record in records]
+        return pa.DictionaryArray.from_arrays(pa.array(indices, index_type), self._dictionaries[name])
+
+    def flush(self):
+        """Write buffered records as one batch (row group)."""
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        columns = [
+            pa.array([r["query"] for r in records], pa.string()),
+            pa.array([r["response"] for r in records], pa.string())
+        ]
+        columns.extend(self._list_column(name, records) for name in LIST_COLUMNS)
+        columns.extend(self._label_column(name, records) for name in LABEL_COLUMNS)
+        batch = pa.RecordBatch.from_arrays(columns, schema=self.schema)
+        self._writer.write_batch(batch)
+        self.rows += len(records)
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        if self.format == "feather":
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_columnar(records, path, vocabularies, format="parquet", batch_size=50000):
+    """
+    Write an iterable of records to a single Parquet or Feather file.
+
+    Args:
+        records: Iterable of record dictionaries
+        path: Output file path
+        vocabularies: Dictionary mapping each label column to its possible values
+        format: "parquet" or "feather"
+        batch_size: Records per batch / row group
+
+    Returns:
+        Number of rows written
+    """
+    with ColumnarWriter(path, vocabularies, format, batch_size) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.rows
+
+
+def load_columns(path, columns=None, as_pandas=True):
+    """
+    Load selected columns from a Parquet/Feather file or a directory of shards.
+
+    Only the requested columns are read from disk; label columns come back as
+    categoricals (or lists of categoricals) rather than comma-joined strings.
+
+    Args:
+        path: A .parquet/.feather file, or a directory containing shards of one format
+        columns: Column names to load (None loads every column)
+        as_pandas: Return a pandas DataFrame instead of a pyarrow Table
+
+    Returns:
+        The loaded data
+    """
+    _require_pyarrow()
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, "*.parquet")))
+        format = "parquet"
+        if not files:
+            files = sorted(glob.glob(os.path.join(path, "*.feather")))
+            format = "feather"
+        if not files:
+            raise FileNotFoundError(f"No .parquet or .feather shards found in {path}")
+    else:
+        files = [path]
+        format = "feather" if path.endswith((".feather", ".arrow")) else "parquet"
+
+    table = pa_dataset.dataset(files, format=format).to_table(columns=columns)
+    return table.to_pandas() if as_pandas else table
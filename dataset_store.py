@@ -0,0 +1,220 @@
+"""
+Memory-mapped dataset store for GreenThumb Goods
+This module opens generated JSONL datasets (a file or a directory of shards) through mmap with an
+offset index of record boundaries, so records are parsed only when accessed. It supports random
+sampling and lookup by intent without loading the whole dataset into memory.
+"""
+
+import glob
+import json
+import mmap
+import os
+import random
+import re
+import tempfile
+import threading
+
+import numpy as np
+
+# Raw-bytes pattern for a record's intent list, so the intent index can be built without json parsing
+INTENTS_PATTERN = re.compile(rb'"intents":\s*\[([^\]]*)\]')
+LABEL_PATTERN = re.compile(rb'"([^"]*)"')
+
+# Bytes scanned per step when indexing line boundaries
+SCAN_CHUNK_BYTES = 1 << 24
+
+
+def index_lines(buffer):
+    """
+    Find the byte ranges of the non-empty lines in a buffer.
+
+    Args:
+        buffer: bytes-like object (e.g. an mmap)
+
+    Returns:
+        Tuple of (starts, ends) int64 arrays, one entry per non-empty line
+    """
+    size = len(buffer)
+    newlines = []
+    for offset in range(0, size, SCAN_CHUNK_BYTES):
+        chunk = np.frombuffer(buffer, dtype=np.uint8, count=min(SCAN_CHUNK_BYTES, size - offset), offset=offset)
+        newlines.append(np.flatnonzero(chunk == ord("\n")) + offset)
+        del chunk  # release the exported buffer so the mmap can be closed later
+    ends = np.concatenate(newlines) if newlines else np.zeros(0, dtype=np.int64)
+    if size and (not len(ends) or ends[-1] != size - 1):
+        ends = np.append(ends, size)
+    starts = np.concatenate([[0], ends[:-1] + 1]) if len(ends) else np.zeros(0, dtype=np.int64)
+    keep = ends > starts
+    return starts[keep].astype(np.int64), ends[keep].astype(np.int64)
+
+
+def _load_or_build_offsets(path, buffer):
+    """Load the offset index from its sidecar file if it matches the data file, else build and save it."""
+    stat = os.stat(path)
+    sidecar = path + ".idx.npz"
+    if os.path.exists(sidecar):
+        with np.load(sidecar) as data:
+            if int(data['size']) == stat.st_size and int(data['mtime_ns']) == stat.st_mtime_ns:
+                return data['starts'], data['ends']
+    starts, ends = index_lines(buffer)
+    try:
+        # Written under a unique name and renamed, so a concurrent reader never loads a partial index
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(sidecar)), suffix=".idx.tmp")
+    except OSError:
+        return starts, ends  # read-only location: the index is simply rebuilt next time
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, starts=starts, ends=ends, size=np.array(stat.st_size), mtime_ns=np.array(stat.st_mtime_ns))
+        os.replace(tmp_path, sidecar)
+    except OSError:
+        os.remove(tmp_path)
+    return starts, ends
+
+
+class DatasetStore:
+    """
+    Read-only, lazily parsed view of one or more JSONL dataset files.
+
+    The store is safe to share between threads (e.g. every Streamlit session): records are
+    parsed from the memory map on access and nothing is copied per caller.
+    """
+
+    def __init__(self, path):
+        if os.path.isdir(path):
+            files = sorted(glob.glob(os.path.join(path, "*.jsonl")))
+            if not files:
+                raise FileNotFoundError(f"No .jsonl shards found in {path}")
+        else:
+            files = [path]
+        self.path = path
+        self.files = files
+        self._handles, self._buffers = [], []
+        file_ids, starts, ends = [], [], []
+        for file_id, file_path in enumerate(files):
+            handle = open(file_path, "rb")
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(file_path) else b""
+            self._handles.append(handle)
+            self._buffers.append(buffer)
+            file_starts, file_ends = _load_or_build_offsets(file_path, buffer)
+            file_ids.append(np.full(len(file_starts), file_id, dtype=np.int32))
+            starts.append(file_starts)
+            ends.append(file_ends)
+        self._file_ids = np.concatenate(file_ids)
+        self._starts = np.concatenate(starts)
+        self._ends = np.concatenate(ends)
+        self._intent_rows = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _raw(self, row):
+        return self._buffers[self._file_ids[row]][self._starts[row]:self._ends[row]]
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("dataset row out of range")
+        return json.loads(self._raw(row))
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield json.loads(self._raw(row))
+
+    def sample(self, k, rng=None):
+        """
+        Draw k distinct records uniformly at random.
+
+        Args:
+            k: Number of records (capped at the dataset size)
+            rng: Optional random.Random for reproducible samples
+
+        Returns:
+            List of records
+        """
+        rows = (rng or random).sample(range(len(self)), min(k, len(self)))
+        return [self[row] for row in rows]
+
+    def _build_intent_index(self):
+        # One regex pass over each mapped file; match positions are mapped back to rows
+        label_codes = {}
+        all_rows, all_codes = [], []
+        first_row = 0
+        for file_id, buffer in enumerate(self._buffers):
+            file_rows = int(np.count_nonzero(self._file_ids == file_id))
+            positions, codes = [], []
+            for match in INTENTS_PATTERN.finditer(buffer):
+                for label in LABEL_PATTERN.findall(match.group(1)):
+                    positions.append(match.start())
+                    codes.append(label_codes.setdefault(label, len(label_codes)))
+            file_ends = self._ends[first_row:first_row + file_rows]
+            all_rows.append(np.searchsorted(file_ends, np.array(positions, dtype=np.int64)) + first_row)
+            all_codes.append(np.array(codes, dtype=np.int32))
+            first_row += file_rows
+        rows = np.concatenate(all_rows) if all_rows else np.zeros(0, dtype=np.int64)
+        codes = np.concatenate(all_codes) if all_codes else np.zeros(0, dtype=np.int32)
+        return {label.decode("utf-8"): np.unique(rows[codes == code]) for label, code in label_codes.items()}
+
+    def intent_rows(self, intent):
+        """Row numbers of the records labelled with an intent (the intent index is built on first use)."""
+        if self._intent_rows is None:
+            with self._lock:
+                if self._intent_rows is None:
+                    self._intent_rows = self._build_intent_index()
+        return self._intent_rows.get(intent, np.zeros(0, dtype=np.int64))
+
+    def intent_counts(self):
+        """Number of records labelled with each intent."""
+        self.intent_rows("")
+        return {intent: len(rows) for intent, rows in self._intent_rows.items()}
+
+    def by_intent(self, intent, limit=None):
+        """Return records labelled with an intent, in dataset order (up to limit)."""
+        rows = self.intent_rows(intent)
+        return [self[int(row)] for row in rows[:limit]]
+
+    def sample_by_intent(self, intent, k, rng=None):
+        """Draw up to k random records labelled with an intent."""
+        rows = self.intent_rows(intent)
+        chosen = (rng or random).sample(range(len(rows)), min(k, len(rows)))
+        return [self[int(rows[i])] for i in chosen]
+
+    def close(self):
+        for buffer in self._buffers:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+        for handle in self._handles:
+            handle.close()
+
+
+def open_dataset_store(path):
+    """
+    Open a dataset as a DatasetStore.
+
+    A .json dataset (a single JSON list, as written by section1_dataset.py) is first converted
+    to a sibling .jsonl file, which is reused until the .json file changes.
+
+    Args:
+        path: A .jsonl file, a directory of .jsonl shards, or a .json dataset
+
+    Returns:
+        A DatasetStore
+    """
+    if path.endswith(".json"):
+        jsonl_path = path[:-len(".json")] + ".jsonl"
+        if not os.path.exists(jsonl_path) or os.path.getmtime(jsonl_path) < os.path.getmtime(path):
+            with open(path, "r") as f:
+                records = json.load(f)
+            # A unique temporary file per writer, so concurrent conversions never interleave
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(jsonl_path)), suffix=".jsonl.tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+                os.replace(tmp_path, jsonl_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        path = jsonl_path
+    return DatasetStore(path)
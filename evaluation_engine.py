@@ -0,0 +1,205 @@
+"""
+Concurrent evaluation engine for GreenThumb Goods
+This module fans out (query, strategy) prompt evaluations over asyncio with bounded
+concurrency and a requests/tokens-per-minute budget, and reports throughput and latency.
+"""
+
+import asyncio
+import time
+
+from rate_scheduler import BATCH
+from token_utils import estimate_tokens
+from tracing import NOOP_TRACE
+
+
+class RateLimiter:
+    """
+    Async token-bucket limiter enforcing requests-per-minute and tokens-per-minute budgets.
+
+    Both buckets start full and refill continuously. Waiters are served in FIFO order.
+    """
+
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm) if rpm else 0.0
+        self._tokens = float(tpm) if tpm else 0.0
+        self._last_refill = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    async def acquire(self, tokens=0):
+        """
+        Wait until one request and `tokens` tokens fit in the budget, then consume them.
+
+        Args:
+            tokens: Estimated tokens (prompt + completion) for the call
+
+        Returns:
+            Seconds spent waiting for budget
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self.tpm:
+            # A single call larger than the whole budget can never fit; let it through alone
+            tokens = min(tokens, self.tpm)
+
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                delay = 0.0
+                if self.rpm and self._requests < 1:
+                    delay = max(delay, (1 - self._requests) * 60.0 / self.rpm)
+                if self.tpm and self._tokens < tokens:
+                    delay = max(delay, (tokens - self._tokens) * 60.0 / self.tpm)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+                waited += delay
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+        return waited
+
+
+def percentile(values, pct):
+    """
+    Compute a percentile with linear interpolation.
+
+    Args:
+        values: Sequence of numbers
+        pct: Percentile in the range 0-100
+
+    Returns:
+        The interpolated percentile, or 0.0 for an empty sequence
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_records(records, wall_time):
+    """
+    Summarize throughput and latency for a finished evaluation run.
+
+    Args:
+        records: Result records produced by run_evaluation
+        wall_time: Total elapsed seconds for the run
+
+    Returns:
+        Dictionary of run statistics
+    """
+    latencies = [r["latency"] for r in records]
+    errors = sum(1 for r in records if r["error"])
+    return {
+        "calls": len(records),
+        "errors": errors,
+        "wall_time_s": wall_time,
+        "throughput_calls_per_s": len(records) / wall_time if wall_time > 0 else 0.0,
+        "latency_mean_s": sum(latencies) / len(latencies) if latencies else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "latency_max_s": max(latencies) if latencies else 0.0,
+        "rate_limit_wait_s": sum(r["rate_limit_wait"] for r in records)
+    }
+
+
+def format_report(stats):
+    """Format run statistics as a short human-readable report."""
+    return (
+        f"Calls: {stats['calls']} ({stats['errors']} errors) in {stats['wall_time_s']:.2f}s "
+        f"-> {stats['throughput_calls_per_s']:.2f} calls/s\n"
+        f"Latency: mean {stats['latency_mean_s']:.3f}s, p50 {stats['latency_p50_s']:.3f}s, "
+        f"p95 {stats['latency_p95_s']:.3f}s, max {stats['latency_max_s']:.3f}s\n"
+        f"Time waiting on rate limit: {stats['rate_limit_wait_s']:.2f}s"
+    )
+
+
+async def run_evaluation(jobs, call, concurrency=8, rpm=None, tpm=None, max_tokens=500, scheduler=None):
+    """
+    Run every evaluation job concurrently.
+
+    Args:
+        jobs: List of dictionaries with at least a 'prompt' key (e.g. query index and strategy),
+            optionally a 'trace' that records queueing, rate-limit and backend-call spans
+        call: Async function taking a prompt and returning the model response
+        concurrency: Maximum number of calls in flight
+        rpm: Requests-per-minute budget (None for unlimited)
+        tpm: Tokens-per-minute budget (None for unlimited)
+        max_tokens: Completion tokens reserved per call when budgeting tokens
+        scheduler: Optional rate_scheduler.RateScheduler whose shared budget every call also draws
+            on, at batch priority (so interactive chat in other processes goes first)
+
+    Returns:
+        Tuple of (records in job order, run statistics)
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = RateLimiter(rpm, tpm) if (rpm or tpm) else None
+
+    async def run_job(job):
+        # A job may carry a tracing.Trace (started when its prompt was built) to record its steps in
+        trace = job.get("trace", NOOP_TRACE)
+        with trace:
+            queued = time.perf_counter()
+            async with semaphore:
+                trace.add_span("queue_wait", time.perf_counter() - queued)
+                waited = 0.0
+                if limiter or scheduler:
+                    with trace.span("rate_limit_wait"):
+                        if limiter:
+                            waited += await limiter.acquire(estimate_tokens(job["prompt"]) + max_tokens)
+                        if scheduler:
+                            waited += await scheduler.acquire_async(estimate_tokens(job["prompt"]) + max_tokens, BATCH)
+                start = time.perf_counter()
+                try:
+                    with trace.span("backend_call"):
+                        response = await call(job["prompt"])
+                    error = None
+                except Exception as e:
+                    response = None
+                    error = str(e)
+                    trace.fail(e)
+                latency = time.perf_counter() - start
+            trace.set(prompt_tokens=estimate_tokens(job["prompt"]), response_tokens=estimate_tokens(response))
+        return dict(job, response=response, error=error, latency=latency, rate_limit_wait=waited)
+
+    start = time.perf_counter()
+    records = await asyncio.gather(*(run_job(job) for job in jobs))
+    wall_time = time.perf_counter() - start
+    return list(records), summarize_records(records, wall_time)
+
+
+def evaluate(jobs, call, cleanup=None, **kwargs):
+    """
+    Synchronous wrapper around run_evaluation for scripts.
+
+    Args:
+        jobs, call, **kwargs: As for run_evaluation
+        cleanup: Optional async function awaited after the run on the same event loop, e.g. a
+            backend's aclose(), so clients bound to that loop are closed before it ends
+
+    Returns:
+        Tuple of (records in job order, run statistics)
+    """
+    async def run():
+        try:
+            return await run_evaluation(jobs, call, **kwargs)
+        finally:
+            if cleanup is not None:
+                await cleanup()
+
+    return asyncio.run(run())
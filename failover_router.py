@@ -0,0 +1,349 @@
+"""
+Hedged requests and multi-backend failover for GreenThumb Goods
+This module puts several model backends behind one ModelBackend: a request goes to the first
+(primary) backend, and if it has not answered within that backend's recent p95 latency a hedged
+request goes to the next one. The first successful reply wins and the slower request is cancelled.
+A failure fails over to the next backend immediately, and a per-backend circuit breaker stops
+sending requests to a backend that keeps failing until a probe request succeeds.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from model_backends import BackendError, ModelBackend
+
+
+class AllBackendsFailed(BackendError):
+    """Every backend failed (or had an open circuit) for a request."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors) or "all circuits are open"
+        super().__init__(f"All backends failed ({details})")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: requests flow. After failure_threshold consecutive failures it opens and rejects
+    requests for reset_timeout seconds, then lets one probe request through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        """Return True if a request may be sent now (claiming the probe slot when half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                if self._opened_at is None:
+                    self.trips += 1
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def record_cancel(self):
+        """A request was cancelled before it finished: free the probe slot without judging the backend."""
+        with self._lock:
+            self._probing = False
+
+
+class LatencyTracker:
+    """Sliding window of recent successful latencies."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, quantile):
+        """Return the quantile of the window, or None if it is empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+
+
+class FailoverRouter(ModelBackend):
+    """
+    Hedging, failing-over ModelBackend over an ordered list of backends.
+
+    The hedge delay for a backend is the hedge_quantile of its recent latencies (time to first
+    chunk for streams), clamped to [min_hedge_delay, max_hedge_delay]; until min_samples replies
+    have been seen, initial_hedge_delay is used. Backends with an open circuit are skipped.
+    Cancelling a loser aborts it for backends with native async support (OpenAI, local); a
+    Hugging Face request runs on in its worker thread and its reply is discarded.
+
+    Args:
+        backends: Backends in order of preference (the first is the primary)
+        hedge: Send hedged requests (False only fails over after an error)
+        hedge_quantile: Latency quantile used as the hedge delay
+        initial_hedge_delay: Hedge delay before enough latencies have been observed
+        min_hedge_delay, max_hedge_delay: Bounds for the hedge delay
+        min_samples: Latencies needed before the quantile is trusted
+        failure_threshold, reset_timeout: Circuit breaker settings for every backend
+    """
+
+    name = "Failover router"
+
+    def __init__(self, backends, hedge=True, hedge_quantile=0.95, initial_hedge_delay=2.0, min_hedge_delay=0.05,
+                 max_hedge_delay=30.0, min_samples=20, failure_threshold=5, reset_timeout=30.0):
+        if not backends:
+            raise ValueError("FailoverRouter needs at least one backend")
+        primary = backends[0]
+        super().__init__(primary.model_id, primary.temperature, primary.max_tokens)
+        self.name = " -> ".join(backend.name for backend in backends)
+        self.backends = list(backends)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.breakers = [CircuitBreaker(failure_threshold, reset_timeout) for _ in backends]
+        self.latencies = [LatencyTracker() for _ in backends]
+        self.first_chunk_latencies = [LatencyTracker() for _ in backends]
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "hedged": 0, "failovers": 0, "all_failed": 0}
+        self._backend_counts = [{"sent": 0, "wins": 0, "failures": 0, "cancelled": 0} for _ in backends]
+        self._loop = None
+
+    def _count(self, key, index=None):
+        with self._lock:
+            if index is None:
+                self._counts[key] += 1
+            else:
+                self._backend_counts[index][key] += 1
+
+    def hedge_delay(self, index, streaming=False):
+        """Seconds to wait for backend index before sending a hedged request to the next backend."""
+        tracker = (self.first_chunk_latencies if streaming else self.latencies)[index]
+        if len(tracker) < self.min_samples:
+            return self.initial_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, tracker.percentile(self.hedge_quantile)))
+
+    def _next_allowed(self, start):
+        """Return the index of the next backend from start whose circuit allows a request, or None."""
+        for index in range(start, len(self.backends)):
+            if self.breakers[index].allow():
+                return index
+        return None
+
+    def _record(self, index, error=None, cancelled=False):
+        if cancelled:
+            self.breakers[index].record_cancel()
+            self._count("cancelled", index)
+        elif error is not None:
+            self.breakers[index].record_failure()
+            self._count("failures", index)
+        else:
+            self.breakers[index].record_success()
+            self._count("wins", index)
+
+    async def agenerate(self, prompt):
+        self._count("requests")
+        attempts = {}  # task -> (backend index, start time)
+        errors = []
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            index = self._next_allowed(next_index)
+            if index is None:
+                next_index = len(self.backends)
+                return False
+            next_index = index + 1
+            task = asyncio.ensure_future(self.backends[index].agenerate(prompt))
+            attempts[task] = (index, time.perf_counter())
+            self._count("sent", index)
+            return True
+
+        launch()
+        try:
+            while attempts:
+                timeout = None
+                if self.hedge and next_index < len(self.backends):
+                    newest_index, newest_start = max(attempts.values(), key=lambda attempt: attempt[1])
+                    timeout = max(0.0, newest_start + self.hedge_delay(newest_index) - time.perf_counter())
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch():
+                        self._count("hedged")
+                    continue
+                for task in done:
+                    index, start = attempts.pop(task)
+                    if task.exception() is None:
+                        self.latencies[index].observe(time.perf_counter() - start)
+                        self._record(index)
+                        return task.result()
+                    self._record(index, error=task.exception())
+                    errors.append((self.backends[index].name, task.exception()))
+                if not attempts and launch():
+                    self._count("failovers")
+        finally:
+            # The loser (or every attempt, if the caller was cancelled) is cancelled. Its elapsed time is
+            # not a latency: a losing primary would record hedge delay + the winner's latency, pushing the
+            # next hedge delay up by that much each window, and a barely started hedge would drag the
+            # secondary's quantile towards zero. Only completed requests are observed.
+            for task, (index, start) in attempts.items():
+                task.cancel()
+                self._record(index, cancelled=True)
+        self._count("all_failed")
+        raise AllBackendsFailed(errors)
+
+    async def aclose(self):
+        await asyncio.gather(*(backend.aclose() for backend in self.backends))
+
+    def _event_loop(self):
+        """Background event loop that runs agenerate() for synchronous callers."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                # Blocking backends run in this pool, and a hedged loser keeps its thread until it returns
+                self._loop.set_default_executor(ThreadPoolExecutor(max_workers=32, thread_name_prefix="failover-call"))
+                threading.Thread(target=self._loop.run_forever, name="failover-router", daemon=True).start()
+            return self._loop
+
+    def generate(self, prompt):
+        return asyncio.run_coroutine_threadsafe(self.agenerate(prompt), self._event_loop()).result()
+
+    def stream(self, prompt):
+        """
+        Yield reply chunks from whichever backend produces a first chunk first.
+
+        Each attempt runs in a worker thread; once a backend has sent a chunk it wins, the others
+        are told to stop, and the reply comes only from it (a failure after that point is raised).
+        """
+        self._count("requests")
+        events = queue.Queue()
+        attempts = {}  # backend index -> (stop event, start time)
+        errors = []
+        winner = None
+        next_index = 0
+
+        def pump(index, stop):
+            chunks = self.backends[index].stream(prompt)
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        return
+                    events.put((index, "chunk", chunk))
+                events.put((index, "done", None))
+            except Exception as e:
+                events.put((index, "error", e))
+            finally:
+                chunks.close()
+
+        def launch():
+            nonlocal next_index
+            index = self._next_allowed(next_index)
+            if index is None:
+                next_index = len(self.backends)
+                return False
+            next_index = index + 1
+            stop = threading.Event()
+            attempts[index] = (stop, time.perf_counter())
+            self._count("sent", index)
+            threading.Thread(target=pump, args=(index, stop), name="failover-stream", daemon=True).start()
+            return True
+
+        launch()
+        try:
+            while attempts:
+                timeout = None
+                if winner is None and self.hedge and next_index < len(self.backends):
+                    newest = max(attempts, key=lambda index: attempts[index][1])
+                    timeout = max(0.0, attempts[newest][1] + self.hedge_delay(newest, streaming=True) - time.perf_counter())
+                try:
+                    index, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    if launch():
+                        self._count("hedged")
+                    continue
+                if index not in attempts:
+                    continue  # a cancelled loser
+                if kind == "chunk":
+                    if winner is None:
+                        winner = index
+                        self.first_chunk_latencies[index].observe(time.perf_counter() - attempts[index][1])
+                        for other in [other for other in attempts if other != index]:
+                            stop, _ = attempts.pop(other)
+                            stop.set()
+                            self._record(other, cancelled=True)  # not observed, as in agenerate()
+                    yield value
+                elif kind == "done":
+                    attempts.pop(index)
+                    self._record(index)
+                    return
+                else:
+                    attempts.pop(index)
+                    self._record(index, error=value)
+                    if winner is not None:
+                        raise value
+                    errors.append((self.backends[index].name, value))
+                    if not attempts and launch():
+                        self._count("failovers")
+        finally:
+            for index, (stop, _) in attempts.items():
+                stop.set()
+                self._record(index, cancelled=True)
+        self._count("all_failed")
+        raise AllBackendsFailed(errors)
+
+    def stats(self):
+        """
+        Report routing counters.
+
+        Returns:
+            Dictionary with requests, hedged, failovers and all_failed, plus a "backends" list with
+            each backend's name, sent, wins, failures, cancelled, circuit state, trips and hedge delay
+        """
+        with self._lock:
+            stats = dict(self._counts)
+            backend_counts = [dict(counts) for counts in self._backend_counts]
+        stats["backends"] = [
+            dict(counts, name=backend.name, circuit=breaker.state, trips=breaker.trips, hedge_delay=self.hedge_delay(index))
+            for index, (backend, breaker, counts) in enumerate(zip(self.backends, self.breakers, backend_counts))
+        ]
+        return stats
@@ -0,0 +1,148 @@
+"""
+Fast-path routing for GreenThumb Goods customer queries
+This module answers single-intent policy questions ("what's your return policy?") directly from
+the policy texts, and only escalates multi-intent, product-specific or ambiguous queries to the LLM.
+"""
+
+import re
+import threading
+
+from catalog_index import get_catalog_index
+from context_assembly import POLICY_KEYWORDS, detect_policies
+from section1_dataset import policies, products
+from text_features import tokenize
+
+# Phrasing of direct policy answers
+POLICY_ANSWER_TEMPLATES = {
+    "returns": "Regarding our return policy: {text}",
+    "shipping": "About our shipping policy: {text}",
+    "sustainability": "Our sustainability commitment: {text}",
+    "rewards": "About our rewards program: {text}",
+    "warranty": "Regarding our warranty policy: {text}"
+}
+
+# Sentence ends and connectors that introduce another question
+CLAUSE_SPLIT = re.compile(
+    r"[?.!;]+|\b(?:and|also|additionally|by the way|while we're at it|on a related note|"
+    r"i'd also like to know|plus)\b",
+    re.IGNORECASE
+)
+
+# Wording that signals a question about how a policy works
+POLICY_CUES = ("policy", "policies", "what is", "what's", "what are", "how do", "how does", "how long",
+               "how much", "do you", "can i", "is there", "are there", "tell me about")
+
+# Wording that signals a complaint or an individual case, which needs a tailored answer
+ESCALATION_CUES = ("arrived", "hasn't", "haven't", "still", "wrong", "disappointed", "damaged", "broken",
+                   "never", "waiting", "stopped working", "unhappy", "frustrat")
+
+# Words that carry no subject of their own; any other word must come from the policy texts or
+# keywords, or name a catalog category, for a query to count as a pure policy question
+GENERIC_WORDS = frozenset("""
+a an the i me my we our us you your it its is are was were be been being do does did done can could would
+should will shall may might must to of for in on at by with about from into over under or but if so that
+this these those there here what what's whats which who whom whose how when where why s d ll ve re m t
+please hi hello hey thanks thank just tell know like want need get got have has had am any some all
+policy policies work works take takes long much many offer offers provide mean explain details detail
+info information question questions rule rules terms condition conditions program plan option options
+order orders purchase purchased buy bought item items product products store company greenthumb goods
+cost costs price prices charge charged fee fees time join sign up become qualify eligible start process
+""".split())
+
+
+def _fold(token):
+    """Fold simple plurals so "tools" and "tool" compare equal."""
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+class FastPathRouter:
+    """
+    Route queries either to a direct policy answer or to the LLM.
+
+    Counters are shared across threads (e.g. every Streamlit session), so stats() reports
+    the share of all traffic served by the fast path.
+    """
+
+    def __init__(self, policy_info=policies, catalog=products):
+        self.policy_info = policy_info
+        self.catalog_index = get_catalog_index(catalog)
+        self.policy_vocabulary = {_fold(token) for text in policy_info.values() for token in tokenize(text)}
+        self.policy_stems = tuple(keyword for keywords in POLICY_KEYWORDS.values() for keyword in keywords if " " not in keyword)
+        self._lock = threading.Lock()
+        self._counters = {"queries": 0, "fast_path": 0, "escalated": 0}
+        self._reasons = {}
+
+    def classify(self, query):
+        """
+        Decide whether a query can be answered from the policy texts.
+
+        Args:
+            query: Customer query text
+
+        Returns:
+            Dictionary with "route" ("fast_path" or "llm"), the matched "policy" key (or None)
+            and the "reason" for the decision
+        """
+        text = query.lower()
+        touched = [key for key in detect_policies(query) if key in self.policy_info]
+        if not touched:
+            return {"route": "llm", "policy": None, "reason": "no_policy"}
+        if len(touched) > 1:
+            return {"route": "llm", "policy": None, "reason": "multi_policy"}
+        clauses = [clause for clause in CLAUSE_SPLIT.split(query) if clause and clause.strip(" ,")]
+        if len(clauses) > 1:
+            return {"route": "llm", "policy": None, "reason": "multi_intent"}
+        if self.catalog_index.extract(query)["products"]:
+            return {"route": "llm", "policy": None, "reason": "product_specific"}
+        if self._unresolved_words(query):
+            return {"route": "llm", "policy": None, "reason": "unresolved_mention"}
+        if any(cue in text for cue in ESCALATION_CUES):
+            return {"route": "llm", "policy": None, "reason": "complaint"}
+        if not any(cue in text for cue in POLICY_CUES):
+            return {"route": "llm", "policy": None, "reason": "ambiguous"}
+        return {"route": "fast_path", "policy": touched[0], "reason": "single_policy"}
+
+    def _unresolved_words(self, query):
+        """Words that are neither generic, policy vocabulary nor part of a catalog category mention."""
+        tokens = tokenize(query)
+        covered = {position for start, end, _, _ in self.catalog_index.match(query) for position in range(start, end)}
+        return [
+            token for position, token in enumerate(tokens)
+            if position not in covered and token not in GENERIC_WORDS and not token.isdigit()
+            and _fold(token) not in self.policy_vocabulary and not token.startswith(self.policy_stems)
+        ]
+
+    def answer(self, query):
+        """
+        Answer a query directly if it is a single-intent policy question.
+
+        Args:
+            query: Customer query text
+
+        Returns:
+            The policy answer, or None if the query should go to the LLM
+        """
+        decision = self.classify(query)
+        fast = decision["route"] == "fast_path"
+        with self._lock:
+            self._counters["queries"] += 1
+            self._counters["fast_path" if fast else "escalated"] += 1
+            self._reasons[decision["reason"]] = self._reasons.get(decision["reason"], 0) + 1
+        if not fast:
+            return None
+        key = decision["policy"]
+        template = POLICY_ANSWER_TEMPLATES.get(key, "{text}")
+        return template.format(text=self.policy_info[key])
+
+    def stats(self):
+        """
+        Report routing counters.
+
+        Returns:
+            Dictionary with queries, fast_path, escalated, fast_path_share and per-reason counts
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["reasons"] = dict(self._reasons)
+        stats["fast_path_share"] = stats["fast_path"] / stats["queries"] if stats["queries"] else 0.0
+        return stats
@@ -0,0 +1,251 @@
+"""
+Few-shot example retrieval index for GreenThumb Goods
+This module indexes dataset queries as TF-IDF weighted hashed n-gram vectors (NumPy arrays)
+plus intent labels, so the most relevant few-shot examples for a customer query can be found
+in well under a millisecond. The index is persisted to disk and updated incrementally.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from text_features import DEFAULT_N_FEATURES, hashed_counts
+
+# Default location of the persisted index (next to the dataset)
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "few_shot_index.npz")
+
+
+def record_key(record):
+    """Stable identity of a dataset record, used to detect added and removed examples."""
+    material = f"{record['query']}\x1f{record['response']}"
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+
+class FewShotIndex:
+    """
+    Similarity index over dataset examples.
+
+    Scores are cosine similarity between TF-IDF vectors of the queries plus
+    intent_weight times the fraction of the query's intents an example shares.
+    Features present in more than max_df of the examples (e.g. "the", "can you")
+    are ignored, which keeps posting lists short on large datasets.
+    """
+
+    def __init__(self, n_features=DEFAULT_N_FEATURES, intent_weight=0.3, max_df=0.3):
+        self.n_features = n_features
+        self.intent_weight = intent_weight
+        self.max_df = max_df
+        self.records = []
+        self.keys = []
+        self._doc_indices = []
+        self._doc_counts = []
+        self.df = np.zeros(n_features, dtype=np.int32)
+        self._compiled = False
+
+    def __len__(self):
+        return len(self.records)
+
+    def update(self, records):
+        """
+        Sync the index with a dataset, vectorizing only records that are new.
+
+        Args:
+            records: List of dataset records (query, response, intents)
+
+        Returns:
+            Dictionary with counts of added, removed and reused examples
+        """
+        # A key can appear more than once (duplicated records), so each maps to all of its rows
+        existing = {}
+        for i, key in enumerate(self.keys):
+            existing.setdefault(key, []).append(i)
+        new_records, new_keys, new_indices, new_counts = [], [], [], []
+        added = 0
+        for record in records:
+            key = record_key(record)
+            if existing.get(key):
+                i = existing[key].pop()
+                indices, counts = self._doc_indices[i], self._doc_counts[i]
+            else:
+                indices, counts = hashed_counts(record['query'], self.n_features)
+                np.add.at(self.df, indices, 1)
+                added += 1
+            new_records.append({"query": record['query'], "response": record['response'],
+                                "intents": list(record.get('intents', []))})
+            new_keys.append(key)
+            new_indices.append(indices)
+            new_counts.append(counts)
+
+        # Whatever is left in `existing` was removed from the dataset
+        removed = [i for rows in existing.values() for i in rows]
+        for i in removed:
+            np.subtract.at(self.df, self._doc_indices[i], 1)
+
+        self.records, self.keys = new_records, new_keys
+        self._doc_indices, self._doc_counts = new_indices, new_counts
+        self._compiled = False
+        return {"added": added, "removed": len(removed), "reused": len(records) - added}
+
+    def _idf(self):
+        n_docs = len(self.records)
+        idf = (np.log((1.0 + n_docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        if self.max_df and n_docs >= 20:
+            idf[self.df > self.max_df * n_docs] = 0.0
+        return idf
+
+    def _compile(self):
+        """Build the column-oriented (feature -> documents) weight matrix used by search."""
+        self._idf_weights = self._idf()
+        n_docs = len(self.records)
+        lengths = np.array([len(indices) for indices in self._doc_indices], dtype=np.int64)
+        features = np.concatenate(self._doc_indices) if n_docs else np.zeros(0, dtype=np.int32)
+        counts = np.concatenate(self._doc_counts) if n_docs else np.zeros(0, dtype=np.float32)
+        docs = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+
+        weights = (1.0 + np.log(counts)) * self._idf_weights[features]
+        norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=n_docs))
+        weights = weights / np.maximum(norms[docs], 1e-12)
+
+        # Drop pruned (zero-weight) features, then sort postings by feature
+        keep = weights > 0
+        features, docs, weights = features[keep], docs[keep], weights[keep]
+        order = np.argsort(features, kind="stable")
+        self._rows = docs[order]
+        self._weights = weights[order].astype(np.float32)
+        self._col_ptr = np.concatenate([[0], np.cumsum(np.bincount(features, minlength=self.n_features))])
+
+        vocab = sorted({intent for record in self.records for intent in record['intents']})
+        self._intent_columns = {intent: i for i, intent in enumerate(vocab)}
+        self._intent_matrix = np.zeros((n_docs, len(vocab)), dtype=np.float32)
+        for row, record in enumerate(self.records):
+            for intent in record['intents']:
+                self._intent_matrix[row, self._intent_columns[intent]] = 1.0
+
+        self._query_rows = {}
+        for row, record in enumerate(self.records):
+            self._query_rows.setdefault(record['query'], []).append(row)
+        self._compiled = True
+
+    def scores(self, query, intents=None):
+        """
+        Score every indexed example against a query.
+
+        Args:
+            query: Customer query text
+            intents: Optional list of the query's intents
+
+        Returns:
+            NumPy array of scores, one per indexed example
+        """
+        if not self._compiled:
+            self._compile()
+        n_docs = len(self.records)
+        indices, counts = hashed_counts(query, self.n_features)
+        weights = (1.0 + np.log(counts)) * self._idf_weights[indices]
+        norm = np.sqrt(np.sum(weights ** 2))
+        if norm > 0:
+            weights /= norm
+
+        # Gather the posting lists of the query's features in one vectorized step
+        starts, ends = self._col_ptr[indices], self._col_ptr[indices + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total:
+            offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+            positions = offsets + np.arange(total)
+            scores = np.bincount(self._rows[positions], weights=self._weights[positions] * np.repeat(weights, lengths),
+                                 minlength=n_docs)
+        else:
+            scores = np.zeros(n_docs)
+
+        columns = [self._intent_columns[i] for i in (intents or []) if i in self._intent_columns]
+        if columns and self.intent_weight:
+            scores = scores + self.intent_weight * self._intent_matrix[:, columns].sum(axis=1) / len(columns)
+        return scores
+
+    def search(self, query, k=3, intents=None, exclude_query=True):
+        """
+        Find the k most relevant examples for a query.
+
+        Args:
+            query: Customer query text
+            k: Number of examples to return
+            intents: Optional list of the query's intents (boosts examples sharing them)
+            exclude_query: Skip examples whose query is identical to this one
+
+        Returns:
+            List of example records (query, response, intents), most relevant first
+        """
+        if not self.records or k <= 0:
+            return []
+        scores = self.scores(query, intents)
+        if exclude_query:
+            for row in self._query_rows.get(query, []):
+                scores[row] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.records[i] for i in top if np.isfinite(scores[i])]
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """
+        Persist the index to an .npz file (uncompressed, so saves and loads stay fast).
+
+        The file is written under a unique temporary name and renamed into place, so a crash or a
+        concurrent save never leaves a truncated index for the next load.
+        """
+        lengths = np.array([len(indices) for indices in self._doc_indices], dtype=np.int64)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    n_features=np.array(self.n_features),
+                    intent_weight=np.array(self.intent_weight),
+                    max_df=np.array(self.max_df),
+                    keys=np.array(self.keys, dtype=str),
+                    doc_lengths=lengths,
+                    doc_indices=np.concatenate(self._doc_indices) if self._doc_indices else np.zeros(0, dtype=np.int32),
+                    doc_counts=np.concatenate(self._doc_counts) if self._doc_counts else np.zeros(0, dtype=np.float32),
+                    df=self.df,
+                    records=np.array(json.dumps(self.records))
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """Load an index saved with save()."""
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(int(data['n_features']), float(data['intent_weight']), float(data['max_df']))
+            index.keys = [str(key) for key in data['keys']]
+            splits = np.cumsum(data['doc_lengths'])[:-1]
+            index._doc_indices = np.split(data['doc_indices'], splits) if len(index.keys) else []
+            index._doc_counts = np.split(data['doc_counts'], splits) if len(index.keys) else []
+            index.df = data['df'].copy()
+            index.records = json.loads(str(data['records']))
+        return index
+
+
+def load_or_build_index(records, path=DEFAULT_INDEX_PATH, **kwargs):
+    """
+    Load the persisted index, bring it up to date with the dataset, and save it if it changed.
+
+    Args:
+        records: The current dataset
+        path: Location of the persisted index
+        **kwargs: FewShotIndex options used when building a new index
+
+    Returns:
+        An up-to-date FewShotIndex
+    """
+    index = FewShotIndex.load(path) if os.path.exists(path) else FewShotIndex(**kwargs)
+    changes = index.update(records)
+    if changes['added'] or changes['removed'] or not os.path.exists(path):
+        index.save(path)
+    return index
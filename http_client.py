@@ -0,0 +1,159 @@
+"""
+Pooled HTTP client for GreenThumb Goods inference backends
+This module wraps a keep-alive requests.Session with connect/read timeouts, jittered
+exponential backoff on 429/503 responses, and connection reuse metrics.
+"""
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 60.0)
+
+# Statuses that mean "try again later" (rate limited / model loading)
+RETRY_STATUSES = frozenset({429, 503})
+
+
+def compute_backoff(attempt, base=0.5, cap=8.0, rng=random):
+    """
+    Compute a "full jitter" exponential backoff delay.
+
+    Args:
+        attempt: Zero-based retry attempt
+        base: Delay scale in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Delay in seconds, uniformly drawn from [0, min(cap, base * 2**attempt)]
+    """
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_hint(response, cap):
+    """
+    Read the server's suggested wait from Retry-After or a Hugging Face "estimated_time" body.
+
+    Returns:
+        Suggested delay in seconds (capped), or 0.0 if the server gave no hint
+    """
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return min(cap, float(header))
+        except ValueError:
+            pass
+    if "application/json" in response.headers.get("Content-Type", ""):
+        try:
+            body = response.json()
+        except ValueError:
+            return 0.0
+        if isinstance(body, dict) and isinstance(body.get("estimated_time"), (int, float)):
+            return min(cap, float(body["estimated_time"]))
+    return 0.0
+
+
+class PooledHTTPClient:
+    """
+    Process-wide HTTP client with connection pooling, timeouts and retries.
+
+    A single instance is meant to be shared by every Streamlit session (and thread), so
+    TCP/TLS connections to the inference endpoint are reused across chat submits.
+    """
+
+    def __init__(self, pool_maxsize=32, timeout=DEFAULT_TIMEOUT, max_retries=4,
+                 backoff_base=0.5, backoff_cap=8.0, retry_statuses=RETRY_STATUSES):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_statuses = frozenset(retry_statuses)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "attempts": 0, "retries": 0, "connection_errors": 0, "timeouts": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def post(self, url, **kwargs):
+        """
+        POST with retries on 429/503 and connection errors.
+
+        Args:
+            url: Request URL
+            **kwargs: Passed to requests.Session.post (timeout defaults to the client timeout)
+
+        Returns:
+            The final requests.Response (callers should still call raise_for_status)
+
+        Raises:
+            requests.ReadTimeout: If the server stalls beyond the read timeout (not retried)
+            requests.ConnectionError: If connecting fails on every attempt (including ConnectTimeout)
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._count("attempts")
+            try:
+                response = self.session.post(url, **kwargs)
+            except requests.ConnectionError:
+                # Also catches ConnectTimeout (a ConnectionError and a Timeout): the request never
+                # reached the server, so it is safe to retry
+                self._count("connection_errors")
+                if attempt >= self.max_retries:
+                    raise
+                delay = compute_backoff(attempt, self.backoff_base, self.backoff_cap)
+            except requests.Timeout:
+                # A read timeout means the backend stalled; retrying would just stall again
+                self._count("timeouts")
+                raise
+            else:
+                if response.status_code not in self.retry_statuses or attempt >= self.max_retries:
+                    return response
+                delay = max(
+                    compute_backoff(attempt, self.backoff_base, self.backoff_cap),
+                    retry_after_hint(response, self.backoff_cap)
+                )
+                # Release the connection back to the pool before sleeping
+                response.close()
+
+            self._count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self):
+        """
+        Report request, retry and connection reuse metrics.
+
+        Returns:
+            Dictionary of counters plus connections opened and the connection reuse ratio
+        """
+        opened, requests_sent = 0, 0
+        for adapter in set(self.session.adapters.values()):
+            pools = getattr(adapter, "poolmanager", None)
+            if pools is None:
+                continue
+            for key in list(pools.pools.keys()):
+                pool = pools.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    requests_sent += pool.num_requests
+        with self._lock:
+            stats = dict(self._counters)
+        stats["connections_opened"] = opened
+        stats["pooled_requests"] = requests_sent
+        stats["connection_reuse_ratio"] = 1 - opened / requests_sent if requests_sent else 0.0
+        return stats
+
+    def close(self):
+        self.session.close()
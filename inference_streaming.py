@@ -0,0 +1,106 @@
+"""
+Streaming helpers for the GreenThumb Goods inference backend
+This module parses server-sent events (SSE) from text-generation-inference style endpoints
+into token text and measures time-to-first-token and total latency for each generation.
+"""
+
+import json
+import time
+
+
+class StreamingUnsupported(Exception):
+    """Raised when the backend answered a streaming request with a non-streaming body."""
+
+    def __init__(self, response):
+        super().__init__("Backend did not return an event stream")
+        self.response = response
+
+
+def iter_sse_data(lines):
+    """
+    Yield the data payload of each server-sent event.
+
+    Args:
+        lines: Iterable of decoded lines from the response body
+
+    Returns:
+        Generator of event data strings (multi-line data fields are joined with newlines)
+    """
+    data = []
+    for line in lines:
+        if line is None:
+            continue
+        line = line.rstrip("\r")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue  # SSE comment / keep-alive
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+def iter_stream_tokens(response):
+    """
+    Yield generated token text from a streaming text-generation response.
+
+    Args:
+        response: A requests.Response opened with stream=True
+
+    Returns:
+        Generator of token text chunks
+
+    Raises:
+        StreamingUnsupported: If the backend replied with a regular (non-SSE) body
+    """
+    content_type = response.headers.get("Content-Type", "")
+    if "text/event-stream" not in content_type:
+        raise StreamingUnsupported(response)
+
+    for data in iter_sse_data(response.iter_lines(decode_unicode=True)):
+        if data == "[DONE]":
+            break
+        event = json.loads(data)
+        if "error" in event:
+            raise RuntimeError(event["error"])
+        token = event.get("token") or {}
+        if token.get("special"):
+            continue
+        text = token.get("text")
+        if text:
+            yield text
+
+
+class GenerationTimer:
+    """Measure time-to-first-token and total latency for one generation."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.end = None
+        self.streamed = False
+
+    def mark_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def finish(self):
+        self.end = time.perf_counter()
+        if self.first_token is None:
+            self.first_token = self.end
+
+    def metrics(self):
+        """
+        Report the measured latencies.
+
+        Returns:
+            Dictionary with ttft_s, total_s and whether the reply was streamed token by token
+        """
+        end = self.end if self.end is not None else time.perf_counter()
+        first = self.first_token if self.first_token is not None else end
+        return {"ttft_s": first - self.start, "total_s": end - self.start, "streamed": self.streamed}
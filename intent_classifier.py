@@ -0,0 +1,330 @@
+"""
+Intent classifier for GreenThumb Goods customer queries
+This module trains a multi-label intent classifier on generated JSON/JSONL datasets: hashed
+word n-gram features with one-vs-rest logistic regression, implemented with NumPy only.
+Weights are persisted to an .npz file, and prediction is batched for high throughput.
+
+Usage:
+    python intent_classifier.py --data greenthumb_dataset.json
+    python intent_classifier.py --predict "Do you ship internationally? Also, what's your return policy?"
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import time
+import zlib
+
+import numpy as np
+
+from text_features import extract_ngrams, tokenize
+
+# Default location of the persisted weights
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_classifier.npz")
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "greenthumb_dataset.json")
+
+
+def load_training_records(path):
+    """
+    Load labelled records from a .json list, a .jsonl file, or a directory of .jsonl shards.
+
+    Args:
+        path: Dataset file or shard directory
+
+    Returns:
+        List of records with "query" and "intents"
+    """
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, "*.jsonl")))
+        if not files:
+            raise FileNotFoundError(f"No .jsonl shards found in {path}")
+    else:
+        files = [path]
+    records = []
+    for file_path in files:
+        with open(file_path, "r") as f:
+            if file_path.endswith(".jsonl"):
+                records.extend(json.loads(line) for line in f if line.strip())
+            else:
+                records.extend(json.load(f))
+    return records
+
+
+def training_fingerprint(records):
+    """
+    Identify a training set (its queries and intents, in any order), so stale weights can be detected.
+
+    Args:
+        records: List of records with "query" and "intents"
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha1(str(len(records)).encode("utf-8"))
+    for material in sorted("\x1f".join([record['query']] + sorted(record['intents'])) for record in records):
+        digest.update(material.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def featurize(texts, n_features, ngram_range=(1, 2)):
+    """
+    Turn texts into a CSR matrix of l2-normalized, log-scaled hashed n-gram counts.
+
+    Args:
+        texts: List of texts
+        n_features: Size of the hashed feature space
+        ngram_range: Inclusive (min_n, max_n) n-gram sizes
+
+    Returns:
+        Tuple of (indptr, indices, values) NumPy arrays
+    """
+    crc32 = zlib.crc32
+    hashes, rows = [], []
+    for row, text in enumerate(texts):
+        grams = extract_ngrams(tokenize(text), ngram_range)
+        hashes.extend(crc32(gram.encode("utf-8")) for gram in grams)
+        rows.extend([row] * len(grams))
+    keys = np.array(rows, dtype=np.int64) * n_features + np.array(hashes, dtype=np.int64) % n_features
+    keys, counts = np.unique(keys, return_counts=True)
+    row_ids = keys // n_features
+    indices = (keys % n_features).astype(np.int32)
+    values = (1.0 + np.log(counts)).astype(np.float32)
+    norms = np.sqrt(np.bincount(row_ids, weights=values ** 2, minlength=len(texts)))
+    values /= np.maximum(norms[row_ids], 1e-12).astype(np.float32)
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(row_ids, minlength=len(texts)))])
+    return indptr, indices, values
+
+
+def _sparse_dot(indptr, indices, values, weights):
+    """Multiply a CSR matrix by a dense (n_features, n_labels) weight matrix."""
+    out = np.zeros((len(indptr) - 1, weights.shape[1]), dtype=np.float32)
+    if len(indices):
+        contributions = weights[indices] * values[:, None]
+        nonempty = indptr[1:] > indptr[:-1]
+        out[nonempty] = np.add.reduceat(contributions, indptr[:-1][nonempty], axis=0)
+    return out
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+
+class IntentClassifier:
+    """
+    Multi-label intent classifier (one logistic regression per intent over shared features).
+
+    A query is assigned every intent whose probability reaches the threshold, and always
+    at least its most likely intent.
+    """
+
+    def __init__(self, labels=(), n_features=2 ** 16, ngram_range=(1, 2), threshold=0.5):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.threshold = threshold
+        self.weights = np.zeros((n_features, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+        self.fingerprint = ""  # training_fingerprint() of the records it was trained on
+        self.auto_trained = False  # trained by load_or_train_classifier() rather than explicitly
+
+    def _targets(self, records):
+        columns = {label: i for i, label in enumerate(self.labels)}
+        targets = np.zeros((len(records), len(self.labels)), dtype=np.float32)
+        for row, record in enumerate(records):
+            for intent in record['intents']:
+                if intent in columns:
+                    targets[row, columns[intent]] = 1.0
+        return targets
+
+    def fit(self, records, epochs=5, batch_size=256, learning_rate=0.5, seed=0):
+        """
+        Train on labelled records with mini-batch Adagrad.
+
+        Args:
+            records: List of records with "query" and "intents"
+            epochs: Passes over the data
+            batch_size: Records per gradient step
+            learning_rate: Adagrad step size
+            seed: Shuffling seed
+
+        Returns:
+            self
+        """
+        if not self.labels:
+            self.labels = sorted({intent for record in records for intent in record['intents']})
+        self.weights = np.zeros((self.n_features, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+        self.fingerprint = training_fingerprint(records)
+        grad_sq = np.full(self.weights.shape, 1e-8, dtype=np.float32)
+        bias_grad_sq = np.full(self.bias.shape, 1e-8, dtype=np.float32)
+
+        indptr, indices, values = featurize([record['query'] for record in records], self.n_features, self.ngram_range)
+        targets = self._targets(records)
+        order = list(range(len(records)))
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for start in range(0, len(order), batch_size):
+                rows = np.array(order[start:start + batch_size])
+                starts, ends = indptr[rows], indptr[rows + 1]
+                lengths = ends - starts
+                positions = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+                batch_indptr = np.concatenate([[0], np.cumsum(lengths)])
+                batch_indices, batch_values = indices[positions], values[positions]
+
+                errors = _sigmoid(_sparse_dot(batch_indptr, batch_indices, batch_values, self.weights) + self.bias)
+                errors -= targets[rows]
+                errors /= len(rows)
+
+                # Accumulate the gradient only for the features present in this batch
+                touched, inverse = np.unique(batch_indices, return_inverse=True)
+                gradient = np.zeros((len(touched), len(self.labels)), dtype=np.float32)
+                np.add.at(gradient, inverse, batch_values[:, None] * np.repeat(errors, lengths, axis=0))
+                grad_sq[touched] += gradient ** 2
+                self.weights[touched] -= learning_rate * gradient / np.sqrt(grad_sq[touched])
+                bias_gradient = errors.sum(axis=0)
+                bias_grad_sq += bias_gradient ** 2
+                self.bias -= learning_rate * bias_gradient / np.sqrt(bias_grad_sq)
+        return self
+
+    def predict_proba(self, queries):
+        """Return an (n_queries, n_labels) array of intent probabilities."""
+        indptr, indices, values = featurize(list(queries), self.n_features, self.ngram_range)
+        return _sigmoid(_sparse_dot(indptr, indices, values, self.weights) + self.bias)
+
+    def predict(self, queries):
+        """
+        Predict the intents of a batch of queries.
+
+        Args:
+            queries: List of query texts
+
+        Returns:
+            List of intent lists, one per query
+        """
+        probabilities = self.predict_proba(queries)
+        selected = probabilities >= self.threshold
+        if len(self.labels):
+            selected[np.arange(len(probabilities)), probabilities.argmax(axis=1)] = True
+        return [[self.labels[j] for j in np.flatnonzero(row)] for row in selected]
+
+    def evaluate(self, records):
+        """
+        Measure multi-label accuracy on labelled records.
+
+        Returns:
+            Dictionary with micro precision, recall, F1 and the exact-match ratio
+        """
+        predicted = self.predict([record['query'] for record in records])
+        true_positives = predicted_total = actual_total = exact = 0
+        for record, labels in zip(records, predicted):
+            actual, labels = set(record['intents']), set(labels)
+            true_positives += len(actual & labels)
+            predicted_total += len(labels)
+            actual_total += len(actual)
+            exact += actual == labels
+        precision = true_positives / predicted_total if predicted_total else 0.0
+        recall = true_positives / actual_total if actual_total else 0.0
+        return {
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            "exact_match": exact / len(records) if records else 0.0
+        }
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """Persist the labels, settings, training fingerprint and weights to an .npz file."""
+        np.savez(
+            path,
+            labels=np.array(self.labels, dtype=str),
+            n_features=np.array(self.n_features),
+            ngram_range=np.array(self.ngram_range),
+            threshold=np.array(self.threshold),
+            fingerprint=np.array(self.fingerprint),
+            auto_trained=np.array(self.auto_trained),
+            weights=self.weights,
+            bias=self.bias
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        """Load a classifier saved with save()."""
+        with np.load(path, allow_pickle=False) as data:
+            classifier = cls([str(label) for label in data['labels']], int(data['n_features']),
+                             tuple(int(n) for n in data['ngram_range']), float(data['threshold']))
+            classifier.weights = data['weights'].copy()
+            classifier.bias = data['bias'].copy()
+            # Files saved before fingerprints were stored count as stale auto-trained weights
+            classifier.fingerprint = str(data['fingerprint']) if 'fingerprint' in data.files else ""
+            classifier.auto_trained = bool(data['auto_trained']) if 'auto_trained' in data.files else True
+        return classifier
+
+
+def load_or_train_classifier(records=None, path=DEFAULT_MODEL_PATH, **kwargs):
+    """
+    Load persisted weights, or train on records and save them.
+
+    Weights this function trained on a different set of records (their fingerprint does not
+    match) are retrained and overwritten. Weights saved by the command line are always kept,
+    since they are usually trained on far more data than the records passed here.
+
+    Args:
+        records: Labelled records used if training is needed
+        path: Location of the persisted weights
+        **kwargs: IntentClassifier options used when training
+
+    Returns:
+        An IntentClassifier, or None if there are no weights and no records to train on
+    """
+    if os.path.exists(path):
+        classifier = IntentClassifier.load(path)
+        if not records or not classifier.auto_trained or classifier.fingerprint == training_fingerprint(records):
+            return classifier
+    elif not records:
+        return None
+    classifier = IntentClassifier(**kwargs).fit(records)
+    classifier.auto_trained = True
+    classifier.save(path)
+    return classifier
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train or query the GreenThumb Goods intent classifier.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Training data: .json, .jsonl or a directory of .jsonl shards")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Where to save/load the weights")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of records held out for evaluation")
+    parser.add_argument("--predict", nargs="+", help="Predict intents for these queries with the saved model")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.predict:
+        classifier = IntentClassifier.load(args.model)
+        for query, labels in zip(args.predict, classifier.predict(args.predict)):
+            print(f"{', '.join(labels)}\t{query}")
+        return
+
+    records = load_training_records(args.data)
+    random.Random(0).shuffle(records)
+    split = int(len(records) * (1 - args.holdout)) if len(records) > 1 else len(records)
+    train, test = records[:split], records[split:]
+
+    start = time.perf_counter()
+    classifier = IntentClassifier().fit(train, epochs=args.epochs)
+    print(f"Trained on {len(train)} records in {time.perf_counter() - start:.2f}s")
+    if test:
+        metrics = classifier.evaluate(test)
+        print(f"Held-out ({len(test)} records): F1 {metrics['f1']:.3f}, precision {metrics['precision']:.3f}, "
+              f"recall {metrics['recall']:.3f}, exact match {metrics['exact_match']:.1%}")
+    classifier.save(args.model)
+    print(f"Saved weights to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
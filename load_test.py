@@ -0,0 +1,327 @@
+"""
+End-to-end load test for the GreenThumb Goods chat pipeline
+This script replays dataset queries through the same steps as the Streamlit app (fast-path
+routing, create_prompt, model backend call, reply parsing) at a fixed open-loop arrival rate,
+against the local stub server or the offline local backend. It reports throughput, latency
+percentiles, error rates and queueing delay as JSON for regression tracking.
+
+Usage:
+    python load_test.py --rate 20 --duration 30 --workers 8 --output load_test_results.json
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+
+from chat_prompts import PROMPT_HEADERS, create_prompt
+from dataset_store import open_dataset_store
+from evaluation_engine import percentile
+from fast_path_router import FastPathRouter
+from http_client import PooledHTTPClient
+from model_backends import HuggingFaceBackend, LocalBackend
+from request_coalescing import SingleFlight
+from response_cache import make_cache_key
+from stub_server import start_stub_server
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "greenthumb_dataset.json")
+
+
+def arrival_times(rate, count, process="poisson", seed=0):
+    """
+    Generate request arrival offsets for an open-loop load.
+
+    Args:
+        rate: Mean arrivals per second
+        count: Number of arrivals
+        process: "poisson" (exponential gaps) or "uniform" (constant gaps)
+        seed: Seed for the Poisson gaps
+
+    Returns:
+        List of offsets in seconds from the start of the run
+    """
+    rng = random.Random(seed)
+    offsets, now = [], 0.0
+    for _ in range(count):
+        offsets.append(now)
+        now += rng.expovariate(rate) if process == "poisson" else 1.0 / rate
+    return offsets
+
+
+class ChatPipeline:
+    """
+    The app's per-query work without the UI: fast path, prompt construction and the model call.
+
+    Args:
+        backend: ModelBackend that answers prompts
+        mode: Prompt strategy ("Zero-shot" or "Few-shot")
+        stream: Use the backend's streaming call (measures time to first token)
+        router: Optional FastPathRouter; queries it answers skip the model
+        coalescer: Optional SingleFlight shared by all workers (as by all app sessions)
+    """
+
+    def __init__(self, backend, mode="Zero-shot", stream=False, router=None, coalescer=None):
+        self.backend = backend
+        self.mode = mode
+        self.stream = stream
+        self.router = router
+        self.coalescer = coalescer
+
+    def run(self, query):
+        """Answer a query and return the timing of each step (raises if the model call fails)."""
+        start = time.perf_counter()
+        if self.router is not None and self.router.answer(query) is not None:
+            elapsed = time.perf_counter() - start
+            return {"fast_path": True, "prompt_s": 0.0, "model_s": 0.0, "ttft_s": elapsed}
+
+        prompt = create_prompt(query, self.mode)
+        prompt_done = time.perf_counter()
+        ttft = None
+        key = make_cache_key(self.backend.model_id, prompt, self.backend.temperature, self.backend.max_tokens)
+        if self.stream:
+            chunks = []
+            if self.coalescer is not None:
+                tokens = self.coalescer.stream(key, lambda: self.backend.stream(prompt))
+            else:
+                tokens = self.backend.stream(prompt)
+            for token in tokens:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                chunks.append(token)
+            reply = "".join(chunks).strip()
+        elif self.coalescer is not None:
+            reply = self.coalescer.do(key, lambda: self.backend.generate(prompt))
+        else:
+            reply = self.backend.generate(prompt)
+        finished = time.perf_counter()
+        if not reply:
+            raise ValueError("Empty reply from the model")
+        return {
+            "fast_path": False,
+            "prompt_s": prompt_done - start,
+            "model_s": finished - prompt_done,
+            "ttft_s": ttft if ttft is not None else finished - start
+        }
+
+
+def run_load(pipeline, queries, rate, workers=8, process="poisson", seed=0):
+    """
+    Send queries through the pipeline at an open-loop arrival rate.
+
+    Arrivals follow the schedule regardless of how many requests are outstanding, so when the
+    workers cannot keep up, requests wait in the queue and that wait shows up as queueing delay
+    (as it would for users of an overloaded deployment).
+
+    Args:
+        pipeline: ChatPipeline to exercise
+        queries: List of query texts, one per arrival
+        rate: Mean arrivals per second
+        workers: Requests processed concurrently
+        process: Arrival process, "poisson" or "uniform"
+        seed: Seed for the arrival schedule
+
+    Returns:
+        Tuple of (per-request records, wall time in seconds)
+    """
+    pending = queue.Queue()
+    records = []
+    records_lock = threading.Lock()
+
+    def worker():
+        while True:
+            job = pending.get()
+            if job is None:
+                return
+            index, query, arrived = job
+            started = time.perf_counter()
+            record = {"index": index, "queue_s": started - arrived, "error": None}
+            try:
+                record.update(pipeline.run(query))
+            except Exception as e:
+                record["error"] = type(e).__name__
+                record["fast_path"] = False
+            record["latency_s"] = time.perf_counter() - arrived
+            with records_lock:
+                records.append(record)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for index, (query, offset) in enumerate(zip(queries, arrival_times(rate, len(queries), process, seed))):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        # Queueing delay is measured from the scheduled arrival, not from when the put happened
+        pending.put((index, query, start + offset))
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    records.sort(key=lambda record: record["index"])
+    return records, wall_time
+
+
+def distribution(values):
+    """Summarize a list of durations (seconds) as mean/percentiles/max."""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0
+    }
+
+
+def summarize_load(records, wall_time, offered_rate):
+    """
+    Summarize a load test run.
+
+    Args:
+        records: Per-request records from run_load
+        wall_time: Seconds from the first arrival until the last request finished
+        offered_rate: Configured arrivals per second
+
+    Returns:
+        Dictionary with request/error counts, throughput and latency distributions (seconds)
+    """
+    ok = [record for record in records if not record["error"]]
+    model = [record for record in ok if not record["fast_path"]]
+    return {
+        "requests": len(records),
+        "succeeded": len(ok),
+        "errors": len(records) - len(ok),
+        "error_rate": (len(records) - len(ok)) / len(records) if records else 0.0,
+        "errors_by_type": dict(Counter(record["error"] for record in records if record["error"])),
+        "fast_path": len(ok) - len(model),
+        "wall_time_s": wall_time,
+        "offered_rate_rps": offered_rate,
+        "throughput_rps": len(ok) / wall_time if wall_time > 0 else 0.0,
+        "latency_s": distribution([record["latency_s"] for record in ok]),
+        "queue_delay_s": distribution([record["queue_s"] for record in records]),
+        "time_to_first_token_s": distribution([record["ttft_s"] for record in model]),
+        "prompt_build_s": distribution([record["prompt_s"] for record in model]),
+        "model_call_s": distribution([record["model_s"] for record in model])
+    }
+
+
+def format_load_report(summary):
+    """Format a load test summary as a short human-readable report."""
+    latency, waiting = summary["latency_s"], summary["queue_delay_s"]
+    return (
+        f"Requests: {summary['requests']} ({summary['errors']} errors, {summary['error_rate']:.1%}; "
+        f"{summary['fast_path']} fast path) in {summary['wall_time_s']:.2f}s\n"
+        f"Throughput: {summary['throughput_rps']:.2f} req/s (offered {summary['offered_rate_rps']:.2f} req/s)\n"
+        f"Latency: p50 {latency['p50']:.3f}s, p95 {latency['p95']:.3f}s, p99 {latency['p99']:.3f}s, max {latency['max']:.3f}s\n"
+        f"Queueing delay: mean {waiting['mean']:.3f}s, p95 {waiting['p95']:.3f}s, max {waiting['max']:.3f}s"
+    ) + (
+        f"\nCoalescing: {summary['coalescing']['issued']} backend calls for {summary['coalescing']['calls']} model requests "
+        f"({summary['coalescing']['coalesced_share']:.0%} shared)" if "coalescing" in summary else ""
+    )
+
+
+def load_queries(path, count, seed=0, hot_queries=0, hot_share=0.0):
+    """
+    Return count queries replayed from the dataset in a seeded shuffled order (cycling if needed).
+
+    Args:
+        path: Dataset file or shard directory
+        count: Number of queries
+        seed: Seed for the order
+        hot_queries: Size of a set of "promotion" queries that many users ask at once
+        hot_share: Fraction of arrivals that ask one of the hot queries
+
+    Returns:
+        List of query texts
+    """
+    store = open_dataset_store(path)
+    try:
+        rows = list(range(len(store)))
+        if not rows:
+            raise ValueError(f"No records in {path}")
+        rng = random.Random(seed)
+        rng.shuffle(rows)
+        hot = [store[row]["query"] for row in rows[:hot_queries]]
+        queries = []
+        for i in range(count):
+            if hot and rng.random() < hot_share:
+                queries.append(rng.choice(hot))
+            else:
+                queries.append(store[rows[i % len(rows)]]["query"])
+        return queries
+    finally:
+        store.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the chat pipeline against a local stand-in model.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Dataset to replay: .json, .jsonl or a directory of shards")
+    parser.add_argument("--rate", type=float, default=10.0, help="Arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals (ignored with --requests)")
+    parser.add_argument("--requests", type=int, default=None, help="Total requests to send")
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--workers", type=int, default=8, help="Requests processed concurrently (app sessions)")
+    parser.add_argument("--mode", choices=list(PROMPT_HEADERS), default="Zero-shot", help="Prompt strategy")
+    parser.add_argument("--stream", action="store_true", help="Use streaming calls and report time to first token")
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every query to the model")
+    parser.add_argument("--coalesce", action="store_true", help="Share identical in-flight model calls (single flight)")
+    parser.add_argument("--hot-queries", type=int, default=0, help="Number of promotion queries asked by many users")
+    parser.add_argument("--hot-share", type=float, default=0.5, help="Fraction of arrivals asking a promotion query")
+    parser.add_argument("--backend", choices=["stub", "local"], default="stub",
+                        help="stub: Hugging Face API over HTTP to an in-process stub server; local: no network")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stand-in model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Stand-in model latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stand-in model calls that fail")
+    parser.add_argument("--retries", type=int, default=0, help="HTTP retries on 429/503 (stub backend)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    count = args.requests or max(1, int(args.rate * args.duration))
+    queries = load_queries(args.data, count, args.seed, args.hot_queries, args.hot_share)
+
+    server = None
+    if args.backend == "stub":
+        server, base_url = start_stub_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                             token_delay=0.0, seed=args.seed)
+        client = PooledHTTPClient(pool_maxsize=max(1, args.workers), max_retries=args.retries)
+        backend = HuggingFaceBackend(f"{base_url}/models/phi-3", "stub-phi-3", http_client=client)
+    else:
+        backend = LocalBackend(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    coalescer = SingleFlight() if args.coalesce else None
+    pipeline = ChatPipeline(backend, args.mode, args.stream, None if args.no_fast_path else FastPathRouter(), coalescer)
+
+    try:
+        records, wall_time = run_load(pipeline, queries, args.rate, args.workers, args.arrivals, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    summary = summarize_load(records, wall_time, args.rate)
+    if server is not None:
+        summary["backend_requests"] = server.stats["requests"]
+    if coalescer is not None:
+        summary["coalescing"] = coalescer.stats()
+    report = {"config": {key: value for key, value in vars(args).items() if key != "output"}, "results": summary}
+    print(format_load_report(summary))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
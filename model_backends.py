@@ -0,0 +1,355 @@
+"""
+Model backends for GreenThumb Goods
+This module gives the Streamlit app (Section 2) and the prompt evaluation (Section 3) one interface
+to text generation: sync and async generate, streaming and batch. Backends are provided for the
+Hugging Face Inference API, the OpenAI API, and a local deterministic model that needs no network.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inference_streaming import StreamingUnsupported, iter_stream_tokens
+from stub_server import generate_stub_reply
+
+
+class BackendError(Exception):
+    """A backend failed to produce a reply (e.g. an injected failure in the local backend)."""
+
+
+class ModelBackend:
+    """
+    Base class for text generation backends.
+
+    Subclasses implement generate(); agenerate(), stream() and batch() have working defaults
+    (a worker thread, a single chunk, and a thread pool respectively) that backends with native
+    support override.
+
+    Attributes:
+        name: Human-readable backend name
+        model_id: Model identifier, also used in response cache keys
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens generated per reply
+    """
+
+    name = "model"
+
+    def __init__(self, model_id, temperature=0.7, max_tokens=500):
+        self.model_id = model_id
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def generate(self, prompt):
+        """Return the reply to a prompt, raising on failure."""
+        raise NotImplementedError
+
+    async def agenerate(self, prompt):
+        """Return the reply to a prompt without blocking the event loop."""
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def aclose(self):
+        """Release what agenerate() holds for the running event loop; await it before the loop ends."""
+
+    def stream(self, prompt):
+        """Yield the reply to a prompt in chunks as they are produced."""
+        yield self.generate(prompt)
+
+    def batch(self, prompts, concurrency=8):
+        """
+        Generate replies for several prompts concurrently.
+
+        Args:
+            prompts: List of prompts
+            concurrency: Maximum requests in flight
+
+        Returns:
+            List of replies, or the exception raised for a prompt, in prompt order
+        """
+        def safe_generate(prompt):
+            try:
+                return self.generate(prompt)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            return list(pool.map(safe_generate, prompts))
+
+
+def _drop_closed_loops(per_loop):
+    """Remove the entries of a {event loop: resource} dict whose loop has been closed."""
+    for loop in [loop for loop in per_loop if loop.is_closed()]:
+        del per_loop[loop]
+
+
+def parse_generated_text(prompt, generated):
+    """Extract the reply from a Hugging Face text-generation response (which echoes the prompt)."""
+    text = generated[0]["generated_text"]
+    if text.startswith(prompt):
+        return text[len(prompt):].strip()
+    return text.split("Assistant:")[-1].strip()
+
+
+class HuggingFaceBackend(ModelBackend):
+    """Hugging Face Inference API (text-generation task), over a pooled HTTP client."""
+
+    name = "Hugging Face API"
+
+    def __init__(self, api_url, model_id, headers=None, temperature=0.7, max_tokens=300,
+                 http_client=None, reply_parser=parse_generated_text):
+        super().__init__(model_id, temperature, max_tokens)
+        self.api_url = api_url
+        self.headers = headers or {}
+        self.reply_parser = reply_parser
+        self._http_client = http_client
+
+    @property
+    def http_client(self):
+        if self._http_client is None:
+            from http_client import PooledHTTPClient
+            self._http_client = PooledHTTPClient()
+        return self._http_client
+
+    def _payload(self, prompt, stream=False):
+        payload = {"inputs": prompt, "parameters": {"max_new_tokens": self.max_tokens, "temperature": self.temperature}}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def generate(self, prompt):
+        res = self.http_client.post(self.api_url, headers=self.headers, json=self._payload(prompt))
+        res.raise_for_status()
+        return self.reply_parser(prompt, res.json())
+
+    def stream(self, prompt):
+        res = self.http_client.post(self.api_url, headers=self.headers, json=self._payload(prompt, stream=True), stream=True)
+        res.raise_for_status()
+        try:
+            yield from iter_stream_tokens(res)
+        except StreamingUnsupported as e:
+            # The endpoint ignored "stream" and returned the full generation
+            yield self.reply_parser(prompt, e.response.json())
+
+
+class OpenAIBackend(ModelBackend):
+    """
+    OpenAI chat completions API.
+
+    Clients are created on first use, so importing a module that configures this backend needs
+    neither an API key nor network access. The key comes from the api_key argument, the
+    OPENAI_API_KEY environment variable, or config.py, in that order.
+    """
+
+    name = "OpenAI API"
+
+    def __init__(self, model_id="gpt-3.5-turbo", temperature=0.7, max_tokens=500, api_key=None, base_url=None):
+        super().__init__(model_id, temperature, max_tokens)
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    def _resolve_api_key(self):
+        if self.api_key is None:
+            self.api_key = os.getenv("OPENAI_API_KEY")
+        if self.api_key is None:
+            from config import OPENAI_API_KEY
+            self.api_key = OPENAI_API_KEY
+        return self.api_key
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(api_key=self._resolve_api_key(), base_url=self.base_url)
+            return self._client
+
+    def _async_client(self):
+        # Async clients hold connection pools bound to one event loop, so keep one per loop.
+        # aclose() closes a loop's client on that loop; a loop that ended without it can no longer
+        # run close(), so its entry is dropped and garbage collection closes the sockets.
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            _drop_closed_loops(self._async_clients)
+            client = self._async_clients.get(loop)
+            if client is None:
+                from openai import AsyncOpenAI
+                client = self._async_clients[loop] = AsyncOpenAI(api_key=self._resolve_api_key(), base_url=self.base_url)
+            return client
+
+    async def aclose(self):
+        """Close the running event loop's async client and its connection pool."""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def _request(self, prompt, **kwargs):
+        return dict(model=self.model_id, messages=[{"role": "user", "content": prompt}],
+                    temperature=self.temperature, max_tokens=self.max_tokens, **kwargs)
+
+    def generate(self, prompt):
+        response = self.client.chat.completions.create(**self._request(prompt))
+        return response.choices[0].message.content
+
+    async def agenerate(self, prompt):
+        response = await self._async_client().chat.completions.create(**self._request(prompt))
+        return response.choices[0].message.content
+
+    def stream(self, prompt):
+        for chunk in self.client.chat.completions.create(**self._request(prompt, stream=True)):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class LocalBackend(ModelBackend):
+    """
+    Deterministic offline model for development and performance work.
+
+    Replies are the stub server's canned reply for the prompt. Latency, jitter and failures are
+    derived from a hash of the prompt (and the seed), so a run is reproducible. max_concurrency
+    models a server that processes only that many requests at once; extra requests queue.
+
+    Args:
+        latency: Seconds before the first token
+        jitter: Uniform +/- seconds added to the latency
+        tokens_per_second: Generation speed after the first token (None for instant)
+        error_rate: Fraction of prompts that fail with BackendError
+        max_concurrency: Requests processed at once (None for unlimited)
+        seed: Changes which prompts get which latency/failure
+    """
+
+    name = "Local model"
+
+    def __init__(self, model_id="local-deterministic", temperature=0.7, max_tokens=500, latency=0.05, jitter=0.0,
+                 tokens_per_second=None, error_rate=0.0, max_concurrency=None, seed=0):
+        super().__init__(model_id, temperature, max_tokens)
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.max_concurrency = max_concurrency
+        self.seed = seed
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._async_slots = {}
+        self._lock = threading.Lock()
+
+    def _plan(self, prompt):
+        """Return (reply tokens, first-token delay, per-token delay, should fail) for a prompt."""
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+        delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        fail = rng.random() < self.error_rate
+        words = generate_stub_reply(prompt).split(" ")
+        tokens = [word if i == 0 else " " + word for i, word in enumerate(words)]
+        token_delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        return tokens, delay, token_delay, fail
+
+    def generate(self, prompt):
+        tokens, delay, token_delay, fail = self._plan(prompt)
+        if self._slots:
+            self._slots.acquire()
+        try:
+            time.sleep(delay + token_delay * (len(tokens) - 1))
+        finally:
+            if self._slots:
+                self._slots.release()
+        if fail:
+            raise BackendError("Local backend injected failure")
+        return "".join(tokens)
+
+    def _async_slot(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            _drop_closed_loops(self._async_slots)
+            slot = self._async_slots.get(loop)
+            if slot is None:
+                slot = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+            return slot
+
+    async def aclose(self):
+        with self._lock:
+            self._async_slots.pop(asyncio.get_running_loop(), None)
+
+    async def agenerate(self, prompt):
+        tokens, delay, token_delay, fail = self._plan(prompt)
+        if self.max_concurrency:
+            async with self._async_slot():
+                await asyncio.sleep(delay + token_delay * (len(tokens) - 1))
+        else:
+            await asyncio.sleep(delay + token_delay * (len(tokens) - 1))
+        if fail:
+            raise BackendError("Local backend injected failure")
+        return "".join(tokens)
+
+    def stream(self, prompt):
+        tokens, delay, token_delay, fail = self._plan(prompt)
+        if self._slots:
+            self._slots.acquire()
+        try:
+            time.sleep(delay)
+            if fail:
+                raise BackendError("Local backend injected failure")
+            for i, token in enumerate(tokens):
+                if i and token_delay:
+                    time.sleep(token_delay)
+                yield token
+        finally:
+            if self._slots:
+                self._slots.release()
+
+
+BACKENDS = {
+    "huggingface": HuggingFaceBackend,
+    "openai": OpenAIBackend,
+    "local": LocalBackend
+}
+
+
+def local_backend_from_env(**kwargs):
+    """Create a LocalBackend configured by GREENTHUMB_LOCAL_* environment variables."""
+    settings = {
+        "latency": float(os.getenv("GREENTHUMB_LOCAL_LATENCY", "0.05")),
+        "jitter": float(os.getenv("GREENTHUMB_LOCAL_JITTER", "0")),
+        "error_rate": float(os.getenv("GREENTHUMB_LOCAL_ERROR_RATE", "0"))
+    }
+    if os.getenv("GREENTHUMB_LOCAL_TOKENS_PER_SECOND"):
+        settings["tokens_per_second"] = float(os.getenv("GREENTHUMB_LOCAL_TOKENS_PER_SECOND"))
+    if os.getenv("GREENTHUMB_LOCAL_MAX_CONCURRENCY"):
+        settings["max_concurrency"] = int(os.getenv("GREENTHUMB_LOCAL_MAX_CONCURRENCY"))
+    settings.update(kwargs)
+    return LocalBackend(**settings)
+
+
+def huggingface_backend_from_env(**kwargs):
+    """Create a HuggingFaceBackend for HF_API_URL (phi-3-mini on the Inference API by default) and HF_API_KEY."""
+    model_id = kwargs.pop("model_id", os.getenv("HF_MODEL_ID", "microsoft/phi-3-mini-4k-instruct"))
+    api_url = kwargs.pop("api_url", os.getenv("HF_API_URL", f"https://api-inference.huggingface.co/models/{model_id}"))
+    if "headers" not in kwargs and os.getenv("HF_API_KEY"):
+        kwargs["headers"] = {"Authorization": f"Bearer {os.getenv('HF_API_KEY')}"}
+    return HuggingFaceBackend(api_url, model_id, **kwargs)
+
+
+def create_backend(name, **kwargs):
+    """
+    Create a backend by name.
+
+    Args:
+        name: "huggingface" (configured by HF_API_URL/HF_MODEL_ID/HF_API_KEY), "openai" or "local"
+        **kwargs: Backend constructor arguments
+
+    Returns:
+        A ModelBackend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {name} (choose from {', '.join(BACKENDS)})")
+    if name == "local":
+        return local_backend_from_env(**kwargs)
+    if name == "huggingface":
+        return huggingface_backend_from_env(**kwargs)
+    return BACKENDS[name](**kwargs)
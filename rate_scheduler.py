@@ -0,0 +1,270 @@
+"""
+Priority-aware rate-limit scheduler for GreenThumb Goods
+This module shares one requests-per-minute and tokens-per-minute budget between the Streamlit app
+(interactive chat) and bulk evaluation runs (batch), across processes: the token buckets live in a
+small JSON state file guarded by a file lock. Interactive requests are served first; batch requests
+only take capacity while no interactive request is waiting and must leave a reserve in the buckets,
+so an evaluation run fills the spare quota instead of pushing live users into 429s.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: the state is then only shared between threads of one process
+    fcntl = None
+
+# Priority classes, highest first
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "rate_scheduler.json")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RateScheduler:
+    """
+    Cross-process token-bucket scheduler with priority classes.
+
+    Both buckets start full and refill continuously. A request of class c is granted when the
+    buckets hold one request and its tokens, no request of a higher class is waiting (in any
+    process), and, below the top class, at least `reserve` of each bucket's capacity would remain.
+    Waiting requests poll the shared state every poll_interval seconds at most.
+
+    Args:
+        rpm: Requests-per-minute budget (None for unlimited)
+        tpm: Tokens-per-minute budget (None for unlimited)
+        path: Shared state file (every process using the same file shares the budget)
+        reserve: Share of each bucket that lower-priority classes must leave for interactive requests
+        poll_interval: Longest sleep between attempts while waiting
+    """
+
+    def __init__(self, rpm=None, tpm=None, path=DEFAULT_STATE_PATH, reserve=0.2, poll_interval=0.05):
+        if not 0 <= reserve < 1:
+            raise ValueError(f"reserve must be in [0, 1), got {reserve}")
+        if rpm and rpm * reserve >= rpm - 1:
+            # A batch request needs 1 + reserve * rpm requests in the bucket, which it could never hold
+            raise ValueError(f"rpm={rpm} leaves no room for batch requests with reserve={reserve}")
+        self.rpm = rpm
+        self.tpm = tpm
+        self.path = path
+        self.reserve = reserve
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.Lock()
+        self._waits = {priority: deque(maxlen=1000) for priority in PRIORITIES}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _initial_state(self, now):
+        return {
+            "requests": float(self.rpm or 0), "tokens": float(self.tpm or 0), "updated": now, "pruned": now,
+            "waiting": {priority: {} for priority in PRIORITIES},
+            "granted": {priority: 0 for priority in PRIORITIES},
+            "wait_total": {priority: 0.0 for priority in PRIORITIES},
+            "wait_max": {priority: 0.0 for priority in PRIORITIES}
+        }
+
+    @contextmanager
+    def _state(self):
+        """Read, yield for modification, and write back the shared state under an exclusive lock."""
+        with self._thread_lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, "r+", encoding="utf-8") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    raw = f.read()
+                    now = time.time()
+                    try:
+                        state = json.loads(raw) if raw else self._initial_state(now)
+                    except ValueError:
+                        state = self._initial_state(now)
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f, separators=(",", ":"))
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state["updated"])
+        state["updated"] = now
+        if self.rpm:
+            state["requests"] = min(self.rpm, state["requests"] + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            state["tokens"] = min(self.tpm, state["tokens"] + elapsed * self.tpm / 60.0)
+
+    def _prune(self, state, now):
+        """Drop waiters registered by processes that have exited (checked at most once a second)."""
+        if now - state["pruned"] < 1.0:
+            return
+        state["pruned"] = now
+        for waiters in state["waiting"].values():
+            for pid in [pid for pid in waiters if not _pid_alive(int(pid))]:
+                del waiters[pid]
+
+    def _delay(self, state, priority, tokens):
+        """Seconds until the request could be granted (0 when it can be granted now)."""
+        rank = PRIORITIES.index(priority)
+        if any(state["waiting"][higher] for higher in PRIORITIES[:rank]):
+            return self.poll_interval
+        reserve = self.reserve if rank else 0.0
+        delay = 0.0
+        if self.rpm:
+            needed = 1 + reserve * self.rpm
+            delay = max(delay, (needed - state["requests"]) * 60.0 / self.rpm)
+        if self.tpm:
+            needed = tokens + reserve * self.tpm
+            delay = max(delay, (needed - state["tokens"]) * 60.0 / self.tpm)
+        return delay
+
+    def _set_waiting(self, state, priority, change):
+        waiters = state["waiting"][priority]
+        pid = str(os.getpid())
+        count = waiters.get(pid, 0) + change
+        if count > 0:
+            waiters[pid] = count
+        else:
+            waiters.pop(pid, None)
+
+    def _attempt(self, priority, tokens, registered, waited):
+        """Try to take the budget; return 0.0 when granted, else seconds to wait (registering the waiter)."""
+        with self._state() as state:
+            now = time.time()
+            self._refill(state, now)
+            self._prune(state, now)
+            delay = self._delay(state, priority, tokens)
+            if delay > 0:
+                if not registered:
+                    self._set_waiting(state, priority, 1)
+                return delay
+            if registered:
+                self._set_waiting(state, priority, -1)
+            if self.rpm:
+                state["requests"] -= 1
+            if self.tpm:
+                state["tokens"] -= tokens
+            state["granted"][priority] += 1
+            state["wait_total"][priority] += waited
+            state["wait_max"][priority] = max(state["wait_max"][priority], waited)
+        self._waits[priority].append(waited)
+        return 0.0
+
+    def _cancel(self, priority):
+        with self._state() as state:
+            self._set_waiting(state, priority, -1)
+
+    def _prepare(self, priority, tokens):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class: {priority} (choose from {', '.join(PRIORITIES)})")
+        if not self.tpm:
+            return 0
+        # A call larger than the budget can never fit: it waits for a full bucket (less the reserve) and takes all of it
+        reserve = self.reserve if PRIORITIES.index(priority) else 0.0
+        return min(tokens, self.tpm * (1 - reserve))
+
+    def acquire(self, tokens=0, priority=INTERACTIVE):
+        """
+        Block until one request and `tokens` tokens fit in the shared budget, then consume them.
+
+        Args:
+            tokens: Estimated tokens (prompt + completion) for the call
+            priority: INTERACTIVE or BATCH
+
+        Returns:
+            Seconds spent waiting for budget
+        """
+        tokens = self._prepare(priority, tokens)
+        start = time.perf_counter()
+        registered = False
+        try:
+            while True:
+                delay = self._attempt(priority, tokens, registered, time.perf_counter() - start)
+                if delay <= 0:
+                    registered = False
+                    return time.perf_counter() - start
+                registered = True
+                time.sleep(min(delay, self.poll_interval))
+        finally:
+            if registered:
+                self._cancel(priority)
+
+    async def acquire_async(self, tokens=0, priority=BATCH):
+        """Async version of acquire() (the state file is only locked for microseconds at a time)."""
+        tokens = self._prepare(priority, tokens)
+        start = time.perf_counter()
+        registered = False
+        try:
+            while True:
+                delay = self._attempt(priority, tokens, registered, time.perf_counter() - start)
+                if delay <= 0:
+                    registered = False
+                    return time.perf_counter() - start
+                registered = True
+                await asyncio.sleep(min(delay, self.poll_interval))
+        finally:
+            if registered:
+                self._cancel(priority)
+
+    def stats(self):
+        """
+        Report budget levels and per-class metrics.
+
+        Returns:
+            Dictionary with requests/tokens available and, per class, queued (waiting now, all
+            processes), granted, wait_mean_s and wait_max_s (all processes since the state was
+            created) and wait_p95_s (this process, recent requests)
+        """
+        with self._state() as state:
+            self._refill(state, time.time())
+        stats = {"requests_available": state["requests"] if self.rpm else None,
+                 "tokens_available": state["tokens"] if self.tpm else None}
+        for priority in PRIORITIES:
+            granted = state["granted"][priority]
+            waits = sorted(self._waits[priority])
+            stats[priority] = {
+                "queued": sum(state["waiting"][priority].values()),
+                "granted": granted,
+                "wait_mean_s": state["wait_total"][priority] / granted if granted else 0.0,
+                "wait_max_s": state["wait_max"][priority],
+                "wait_p95_s": waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else 0.0
+            }
+        return stats
+
+
+def rate_scheduler_from_env():
+    """
+    Create the shared RateScheduler configured from the environment.
+
+    Environment variables:
+        GREENTHUMB_RATE_RPM, GREENTHUMB_RATE_TPM: provider budget shared by all processes
+        GREENTHUMB_RATE_STATE: state file location
+        GREENTHUMB_RATE_RESERVE: share of the budget kept for interactive requests
+
+    Returns:
+        A RateScheduler, or None when neither budget is set
+    """
+    rpm = os.getenv("GREENTHUMB_RATE_RPM")
+    tpm = os.getenv("GREENTHUMB_RATE_TPM")
+    if not rpm and not tpm:
+        return None
+    return RateScheduler(rpm=int(rpm) if rpm else None, tpm=int(tpm) if tpm else None,
+                         path=os.getenv("GREENTHUMB_RATE_STATE", DEFAULT_STATE_PATH),
+                         reserve=float(os.getenv("GREENTHUMB_RATE_RESERVE", "0.2")))
@@ -0,0 +1,188 @@
+"""
+Single-flight request coalescing for GreenThumb Goods
+This module lets concurrent identical model requests share one backend call: the first caller
+for a key (the leader) runs the call, and callers arriving while it is in flight wait for its
+result instead of issuing their own. Streamed calls are shared chunk by chunk, so a follower
+sees tokens as the leader receives them. A follower waits at most a bounded time for the
+leader, then makes its own call, so one hung backend call cannot block every session sharing it.
+"""
+
+import threading
+
+# Seconds a follower waits on the leader (for a stream: between chunks) before giving up on it;
+# above the HTTP read timeout, so only a leader that is truly stuck is abandoned
+DEFAULT_WAIT_TIMEOUT = 120.0
+
+
+class _Flight:
+    """One in-flight call and what it has produced so far."""
+
+    __slots__ = ("chunks", "result", "error", "finished", "followers", "condition")
+
+    def __init__(self, lock):
+        self.chunks = []
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.followers = 0
+        self.condition = threading.Condition(lock)
+
+
+class SingleFlight:
+    """
+    Process-wide coalescing of identical concurrent calls, keyed by the caller.
+
+    Use the response cache key (model, prompt, temperature, max_tokens) as the key, so only
+    requests that would get the same reply are merged. Only in-flight calls are shared: once a
+    call finishes, the next caller starts a new one (completed replies belong in the cache).
+    A failure is raised to the leader and to every follower of that flight. A follower that
+    waits longer than wait_timeout falls back to an independent call (see do() and stream()).
+    """
+
+    def __init__(self, wait_timeout=DEFAULT_WAIT_TIMEOUT):
+        if wait_timeout is not None and wait_timeout <= 0:
+            raise ValueError("wait_timeout must be positive (or None to wait indefinitely)")
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._counts = {"calls": 0, "issued": 0, "coalesced": 0, "errors": 0, "max_followers": 0, "timeouts": 0}
+
+    def _join(self, key):
+        """Return (flight, is_leader), registering a new flight if none is in progress."""
+        with self._lock:
+            self._counts["calls"] += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self._counts["coalesced"] += 1
+                self._counts["max_followers"] = max(self._counts["max_followers"], flight.followers)
+                return flight, False
+            flight = self._flights[key] = _Flight(self._lock)
+            self._counts["issued"] += 1
+            return flight, True
+
+    def _finish(self, key, flight, result=None, error=None):
+        with self._lock:
+            flight.result = result
+            flight.error = error
+            flight.finished = True
+            if error is not None:
+                self._counts["errors"] += 1
+            del self._flights[key]
+            flight.condition.notify_all()
+
+    def _count_timeout(self):
+        with self._lock:
+            self._counts["timeouts"] += 1
+
+    def do(self, key, func):
+        """
+        Return func()'s result, sharing the call with concurrent callers using the same key.
+
+        A follower whose leader has not finished within wait_timeout calls func() itself.
+
+        Args:
+            key: Hashable identity of the request
+            func: Zero-argument callable that performs the request
+
+        Returns:
+            The call's result (for a flight started by stream(), the joined chunks)
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            with flight.condition:
+                finished = flight.condition.wait_for(lambda: flight.finished, timeout=self.wait_timeout)
+            if not finished:
+                # The leader looks stuck: stop waiting on it and make an independent call
+                self._count_timeout()
+                return func()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            result = func()
+        except BaseException as e:
+            self._finish(key, flight, error=e)
+            raise
+        with self._lock:
+            flight.chunks.append(result)
+        self._finish(key, flight, result=result)
+        return result
+
+    def stream(self, key, func):
+        """
+        Yield the chunks of func()'s iterator, sharing the stream with concurrent callers using the same key.
+
+        A caller that joins a flight late first receives the chunks already produced. A follower
+        that gets no chunk for wait_timeout streams func() itself if it has received nothing yet;
+        partway through a reply it cannot switch to another call, so it raises TimeoutError.
+
+        Args:
+            key: Hashable identity of the request
+            func: Zero-argument callable returning an iterator of text chunks
+
+        Yields:
+            Text chunks
+        """
+        flight, leader = self._join(key)
+        if leader:
+            chunks = []
+            try:
+                for chunk in func():
+                    chunks.append(chunk)
+                    with self._lock:
+                        flight.chunks.append(chunk)
+                        flight.condition.notify_all()
+                    yield chunk
+            except GeneratorExit:
+                # The leader stopped reading; followers cannot get the rest of the reply
+                self._finish(key, flight, error=RuntimeError("Shared stream closed before it finished"))
+                raise
+            except BaseException as e:
+                self._finish(key, flight, error=e)
+                raise
+            self._finish(key, flight, result="".join(chunks))
+            return
+
+        position = 0
+        while True:
+            with flight.condition:
+                ready = flight.condition.wait_for(
+                    lambda: flight.finished or len(flight.chunks) > position, timeout=self.wait_timeout
+                )
+                new_chunks = flight.chunks[position:]
+                finished, error = flight.finished, flight.error
+            if not ready:
+                self._count_timeout()
+                if position:
+                    raise TimeoutError(f"Shared stream stalled for {self.wait_timeout} seconds")
+                # Nothing received yet: stream an independent call instead
+                yield from func()
+                return
+            for chunk in new_chunks:
+                yield chunk
+            position += len(new_chunks)
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+    def in_flight(self):
+        """Number of distinct calls currently running."""
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self):
+        """
+        Report coalescing counters.
+
+        Returns:
+            Dictionary with calls (requests seen), issued (backend calls made), coalesced
+            (requests served by another caller's call), errors, max_followers, timeouts
+            (followers that gave up waiting on a stuck leader), in_flight and coalesced_share
+        """
+        with self._lock:
+            stats = dict(self._counts)
+            stats["in_flight"] = len(self._flights)
+        stats["coalesced_share"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
@@ -0,0 +1,280 @@
+"""
+Persistent response cache for GreenThumb Goods
+This module stores model responses on disk, keyed by a hash of (model, prompt, temperature,
+max_tokens), with LRU eviction, TTL expiry and hit/miss counters. It is backed by SQLite so
+it can be shared safely by several Streamlit sessions and evaluation worker processes.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default location and limits (override with environment variables)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite3")
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Hit bookkeeping (access times, counters) is written in batches of this many lookups or this many seconds
+FLUSH_EVERY = 64
+FLUSH_INTERVAL = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+
+def make_cache_key(model, prompt, temperature, max_tokens):
+    """
+    Build a content-addressed cache key for a model call.
+
+    Args:
+        model: Model identifier
+        prompt: The full prompt text
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+
+    Returns:
+        Hex SHA-256 digest identifying the call
+    """
+    material = json.dumps([model, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Size-bounded on-disk LRU cache for model responses.
+
+    Each thread gets its own SQLite connection; cross-process safety comes from SQLite's
+    file locking (WAL mode), so any number of processes may share one cache file.
+
+    Lookups only read. The last-access times of hits and the lifetime counters are kept in
+    memory and written in one transaction every FLUSH_EVERY lookups or FLUSH_INTERVAL seconds,
+    before each set() and on stats(), so concurrent readers do not queue for the write lock.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Counters for this process; lifetime totals across processes live in the database
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        # Not yet written to the database: key -> last access time, and counter increments
+        self._pending_access = {}
+        self._pending_counts = {"hits": 0, "misses": 0}
+        self._pending_lookups = 0
+        self._flushed_at = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, key=None, now=None):
+        """Count a lookup in memory; return True when the pending batch is due to be written."""
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+            self._pending_counts[name] += 1
+            self._pending_lookups += 1
+            if key is not None:
+                self._pending_access[key] = now
+            return (self._pending_lookups >= FLUSH_EVERY
+                    or time.monotonic() - self._flushed_at >= FLUSH_INTERVAL)
+
+    def _write_pending(self, conn):
+        """Write the pending access times and counters inside the caller's write transaction."""
+        with self._counter_lock:
+            access, self._pending_access = self._pending_access, {}
+            counts, self._pending_counts = self._pending_counts, {"hits": 0, "misses": 0}
+            self._pending_lookups = 0
+            self._flushed_at = time.monotonic()
+        if access:
+            # MAX keeps a newer access recorded by another process
+            conn.executemany("UPDATE responses SET last_access = MAX(last_access, ?) WHERE key = ?",
+                             [(accessed, key) for key, accessed in access.items()])
+        conn.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                         [(count, name) for name, count in counts.items() if count])
+
+    def flush(self):
+        """Write pending access times and counters to the database."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_pending(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from make_cache_key
+
+        Returns:
+            The cached response text, or None on a miss or expired entry
+        """
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+            row = None  # expired entries are deleted by the next set()
+
+        if row is None:
+            due = self._count("misses")
+        else:
+            due = self._count("hits", key, now)
+        if due:
+            self.flush()
+        return None if row is None else row[0]
+
+    def set(self, key, value):
+        """
+        Store a response and evict least-recently-used entries beyond the limits.
+
+        Args:
+            key: Key from make_cache_key
+            value: Response text to store
+        """
+        conn = self._connect()
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            # Pending access times first, so eviction sees the true LRU order
+            self._write_pending(conn)
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn, now):
+        evicted = 0
+        if self.ttl is not None:
+            evicted += conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if self.max_entries is not None and count > self.max_entries:
+            excess = count - self.max_entries
+            evicted += conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (excess,)
+            ).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        if self.max_bytes is not None and total > self.max_bytes:
+            # Walk entries oldest-first until enough bytes are freed
+            freed, victims = 0, []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                if total - freed <= self.max_bytes:
+                    break
+                victims.append((key,))
+                freed += size
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+            evicted += len(victims)
+
+        if evicted:
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = 'evictions'", (evicted,))
+
+    def stats(self):
+        """
+        Report cache statistics.
+
+        Returns:
+            Dictionary with this process's hits/misses, lifetime totals, entry count and size
+        """
+        self.flush()
+        conn = self._connect()
+        totals = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+            "evictions": totals.get("evictions", 0),
+            "entries": entries,
+            "bytes": size
+        }
+
+    def clear(self):
+        """Remove every cached response and reset the counters."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM responses")
+        conn.execute("UPDATE counters SET value = 0")
+        conn.execute("COMMIT")
+        with self._counter_lock:
+            self.hits = 0
+            self.misses = 0
+            self._pending_access = {}
+            self._pending_counts = {"hits": 0, "misses": 0}
+            self._pending_lookups = 0
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Get the process-wide response cache configured from the environment.
+
+    Environment variables:
+        GREENTHUMB_CACHE: set to "0" to disable caching
+        GREENTHUMB_CACHE_PATH: SQLite file location
+        GREENTHUMB_CACHE_MAX_ENTRIES, GREENTHUMB_CACHE_MAX_BYTES, GREENTHUMB_CACHE_TTL: limits
+
+    Returns:
+        A shared ResponseCache, or None when caching is disabled
+    """
+    global _default_cache
+    if os.getenv("GREENTHUMB_CACHE", "1") == "0":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                path=os.getenv("GREENTHUMB_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries=int(os.getenv("GREENTHUMB_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                max_bytes=int(os.getenv("GREENTHUMB_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                ttl=float(os.getenv("GREENTHUMB_CACHE_TTL", DEFAULT_TTL))
+            )
+    return _default_cache
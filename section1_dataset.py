@@ -2,15 +2,23 @@
 Section 1: Dataset Creation for GreenThumb Goods
 This script generates a dataset of 50 complex multi-intent customer queries
 along with appropriate responses for a gardening and sustainable products company.
+Large corpora can be streamed to sharded JSONL/CSV files with --count and --shard-size.
 """
 
+import argparse
+import csv
+import hashlib
 import json
 import pandas as pd
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import os
 import sys
 import openai
+
+from dataset_columnar import COLUMNAR_FORMATS, ColumnarWriter, write_columnar
 # Import configuration
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -70,298 +78,567 @@ intents = [
     "shipping_inquiry"
 ]
 
+# Query templates per intent, in the order intents are considered (placeholders: p1, p2, c1, c2)
+QUERY_TEMPLATES = {
+    "product_inquiry": (
+        "Can you tell me more about the {p1}?",
+        "What are the specifications of the {p1}?",
+        "I'm interested in the {p1}, what can you tell me about it?",
+        "Does the {p1} come with a warranty?",
+        "What materials is the {p1} made from?"
+    ),
+    "price_comparison": (
+        "How does the price of {p1} compare to {p2}?",
+        "Which is more cost-effective, the {p1} or the {p2}?",
+        "I'm trying to decide between {p1} and {p2} based on price and quality.",
+        "Is the {p1} worth the extra cost over the {p2}?",
+        "Do you have any cheaper alternatives to the {p1}?"
+    ),
+    "availability_check": (
+        "Is the {p1} currently in stock?",
+        "When will you restock the {p1} if it's sold out?",
+        "Can I pre-order the {p1} if it's not available?",
+        "Do you have the {p1} available for immediate shipping?",
+        "What's the estimated delivery time for the {p1}?"
+    ),
+    "policy_question": (
+        "What's your return policy for {c1} items?",
+        "How does your shipping policy work for orders containing {p1}?",
+        "Can you explain your sustainability practices regarding packaging?",
+        "How does the rewards program work if I purchase both {p1} and {p2}?",
+        "What's covered under the warranty for the {p1}?"
+    ),
+    "care_instructions": (
+        "How should I care for the {p1} after purchase?",
+        "What maintenance is required for the {p1}?",
+        "How often should I water/clean/maintain the {p1}?",
+        "Are there special storage requirements for the {p1}?",
+        "What's the best way to ensure the {p1} lasts a long time?"
+    ),
+    "compatibility_check": (
+        "Will the {p1} work well with the {p2}?",
+        "Is the {p1} compatible with my existing {c2} items?",
+        "Can I use the {p1} in conjunction with the {p2}?",
+        "Are there any known issues using the {p1} with {p2}?",
+        "Do I need any adapters or additional items to use the {p1} with my {c2} setup?"
+    ),
+    "recommendation_request": (
+        "What would you recommend for someone new to gardening who's interested in {c1}?",
+        "I'm looking for the best {c1} for a small apartment balcony, any suggestions?",
+        "Can you recommend a {c1} that would complement my existing {p2}?",
+        "What's your most popular {c1} item for beginners?",
+        "I need a gift for a sustainability enthusiast who loves {c1}, what do you suggest?"
+    ),
+    "complaint": (
+        "The {p1} I received doesn't match the description on your website.",
+        "My {p1} arrived damaged, and I'm not satisfied with the customer service response.",
+        "I've been waiting for my {p1} for over two weeks now, what's the delay?",
+        "The quality of the {p1} doesn't justify the price you're charging.",
+        "The {p1} stopped working after just a few uses, is this normal?"
+    ),
+    "return_process": (
+        "How do I initiate a return for the {p1} I purchased last week?",
+        "What's the process for exchanging my {p1} for a different size/color/model?",
+        "Will I get a full refund if I return the {p1} within the 30-day window?",
+        "Do I need the original packaging to return the {p1}?",
+        "Can I return the {p1} to your physical store if I bought it online?"
+    ),
+    "shipping_inquiry": (
+        "How much would shipping cost for the {p1} to California?",
+        "Do you offer expedited shipping for the {p1}?",
+        "Can I track my {p1} order once it's shipped?",
+        "Do you ship the {p1} internationally?",
+        "What shipping carrier do you use for delivering the {p1}?"
+    )
+}
+
+# Response templates per intent; one variant is chosen at random for each record
+RESPONSE_TEMPLATES = {
+    "product_inquiry": (
+        "Regarding the {p1}, it's priced at ${p1_price} and {p1_desc}.",
+    ),
+    "price_comparison": (
+        "When comparing the {p1} (${p1_price}) with the {p2} (${p2_price}), the price difference reflects their different features and benefits. The {p1} {p1_desc}, while the {p2} {p2_desc}.",
+    ),
+    "availability_check": (
+        "The {p1} is currently in stock and ready to ship within 1-2 business days.",
+        "We're temporarily out of stock on the {p1}, but we expect to restock within 2 weeks. You can sign up for email notifications on the product page.",
+        "We have limited quantities of the {p1} available, so we recommend placing your order soon if you're interested."
+    ),
+    "care_instructions": (
+        "For the {p1}, we recommend regular maintenance to ensure longevity. Specific care instructions are included with your purchase, and you can also find them on our website under the product details.",
+        "The {p1} requires minimal maintenance. We suggest [specific care instructions based on product type] for best results.",
+        "To keep your {p1} in optimal condition, please follow the care guide included in the packaging. Generally, [basic care tip relevant to product category]."
+    ),
+    "compatibility_check": (
+        "The {p1} is designed to work seamlessly with the {p2} and other products in our {c2} line.",
+        "While the {p1} and {p2} can be used together, you might need [additional accessory] for optimal performance.",
+        "Yes, the {p1} is fully compatible with your existing {c2} items, including the {p2}."
+    ),
+    "recommendation_request": (
+        "For someone new to {c1}, I'd recommend starting with our {p1}. It's user-friendly and provides excellent value for beginners.",
+        "Based on your interest in {c1} for a small space, our {p1} would be perfect as it's compact yet effective.",
+        "As a popular gift for sustainability enthusiasts, our {p1} consistently receives excellent feedback. It complements existing {c2} setups beautifully."
+    ),
+    "complaint": (
+        "I'm sorry to hear about your experience with the {p1}. We stand behind the quality of our products and would like to make this right. Please email our customer service team at support@greenthumbgoods.com with your order number and photos of the issue, and we'll resolve this promptly.",
+        "We apologize for the delay with your {p1} order. Let me check the status for you right away. Please provide your order number, and I'll investigate the cause of the delay and provide an updated delivery estimate.",
+        "I understand your frustration with the {p1}. Quality is our top priority, and we'd like to address this issue immediately. Please contact our support team at 1-800-GREEN-THUMB, and they'll arrange a replacement or refund."
+    ),
+    "return_process": (
+        "To return your {p1}, please visit our Returns Center on the website and follow the simple process: 1) Enter your order number and email, 2) Select the item(s) to return, 3) Print the prepaid return label if eligible, and 4) Drop off the package at any authorized shipping location.",
+        "Returns for the {p1} can be initiated through your account on our website. Go to Order History, select the relevant order, and click 'Return Items'. You'll receive a confirmation email with further instructions.",
+        "For returning the {p1}, you have 30 days from the delivery date. Original packaging is preferred but not required. Once we receive the return, refunds typically process within 5-7 business days to your original payment method."
+    ),
+    "shipping_inquiry": (
+        "Shipping for the {p1} to California would fall under our standard shipping policy: {shipping_policy}",
+        "Yes, we offer expedited shipping for the {p1} at $12.99, which typically delivers within 1-2 business days depending on your location.",
+        "All orders, including the {p1}, come with tracking information that will be emailed to you once your order ships. You can also track your order through your account on our website."
+    )
+}
+
+CONNECTORS = (
+    " Also, ",
+    " Additionally, ",
+    " By the way, ",
+    " One more thing, ",
+    " I'm also wondering, ",
+    " While we're at it, ",
+    " And I'd like to know, ",
+    " Could you also tell me ",
+    " I'd also like to ask about ",
+    " On a related note, "
+)
+
+GREETINGS = (
+    "Thank you for reaching out to GreenThumb Goods! ",
+    "Hello from GreenThumb Goods! ",
+    "We appreciate your interest in our products. ",
+    "Thanks for your questions about our products and services. ",
+    "I'd be happy to help with your inquiries. "
+)
+
+CLOSINGS = (
+    "Is there anything else I can help you with today?",
+    "Please let me know if you have any other questions!",
+    "We hope this information helps with your decision.",
+    "Thank you for choosing GreenThumb Goods for your sustainable living needs.",
+    "We're here if you need any further assistance."
+)
+
+# Policy answers, checked in order against the policy question's text
+POLICY_RESPONSES = (
+    ("return", f"Regarding our return policy: {policies['returns']}"),
+    ("shipping", f"About our shipping policy: {policies['shipping']}"),
+    ("sustainability", f"Our sustainability commitment: {policies['sustainability']}"),
+    ("reward", f"About our rewards program: {policies['rewards']}"),
+    ("warranty", f"Regarding our warranty policy: {policies['warranty']}")
+)
+
+CATEGORY_KEYS = tuple(products.keys())
+POLICY_KEYS = tuple(policies.keys())
+
+# Possible values of each label column (used for dictionary-encoded columnar output)
+COLUMNAR_VOCABULARIES = {
+    "intents": intents,
+    "products_mentioned": [product['name'] for items in products.values() for product in items],
+    "categories_mentioned": list(products.keys()),
+    "policies_mentioned": list(policies.keys())
+}
+
 # Generate complex multi-intent queries
-def generate_complex_query():
-    """Generate a complex multi-intent customer query with appropriate response."""
+def generate_complex_query(rng=None):
+    """
+    Generate a complex multi-intent customer query with appropriate response.
+    
+    Templates come from the precompiled tables above; only the chosen variant is formatted.
+    
+    Args:
+        rng: Optional random.Random instance (defaults to the global random module)
+    
+    Returns:
+        A record dictionary
+    """
+    rng = rng or random
     # Select 2-3 intents for a complex query
-    num_intents = random.randint(2, 3)
-    selected_intents = random.sample(intents, num_intents)
+    num_intents = rng.randint(2, 3)
+    selected_intents = rng.sample(intents, num_intents)
     
     # Select random products and categories for reference
-    category1 = random.choice(list(products.keys()))
-    product1 = random.choice(products[category1])
-    category2 = random.choice(list(products.keys()))
-    product2 = random.choice(products[category2])
+    category1 = rng.choice(CATEGORY_KEYS)
+    product1 = rng.choice(products[category1])
+    category2 = rng.choice(CATEGORY_KEYS)
+    product2 = rng.choice(products[category2])
     
     # Select a random policy
-    policy_key = random.choice(list(policies.keys()))
-    policy = policies[policy_key]
-    
-    # Generate query based on selected intents
-    query_parts = []
-    
-    if "product_inquiry" in selected_intents:
-        inquiries = [
-            f"Can you tell me more about the {product1['name']}?",
-            f"What are the specifications of the {product1['name']}?",
-            f"I'm interested in the {product1['name']}, what can you tell me about it?",
-            f"Does the {product1['name']} come with a warranty?",
-            f"What materials is the {product1['name']} made from?"
-        ]
-        query_parts.append(random.choice(inquiries))
-    
-    if "price_comparison" in selected_intents:
-        comparisons = [
-            f"How does the price of {product1['name']} compare to {product2['name']}?",
-            f"Which is more cost-effective, the {product1['name']} or the {product2['name']}?",
-            f"I'm trying to decide between {product1['name']} and {product2['name']} based on price and quality.",
-            f"Is the {product1['name']} worth the extra cost over the {product2['name']}?",
-            f"Do you have any cheaper alternatives to the {product1['name']}?"
-        ]
-        query_parts.append(random.choice(comparisons))
-    
-    if "availability_check" in selected_intents:
-        availability = [
-            f"Is the {product1['name']} currently in stock?",
-            f"When will you restock the {product1['name']} if it's sold out?",
-            f"Can I pre-order the {product1['name']} if it's not available?",
-            f"Do you have the {product1['name']} available for immediate shipping?",
-            f"What's the estimated delivery time for the {product1['name']}?"
-        ]
-        query_parts.append(random.choice(availability))
-    
-    if "policy_question" in selected_intents:
-        policy_questions = [
-            f"What's your return policy for {category1} items?",
-            f"How does your shipping policy work for orders containing {product1['name']}?",
-            f"Can you explain your sustainability practices regarding packaging?",
-            f"How does the rewards program work if I purchase both {product1['name']} and {product2['name']}?",
-            f"What's covered under the warranty for the {product1['name']}?"
-        ]
-        query_parts.append(random.choice(policy_questions))
-    
-    if "care_instructions" in selected_intents:
-        care = [
-            f"How should I care for the {product1['name']} after purchase?",
-            f"What maintenance is required for the {product1['name']}?",
-            f"How often should I water/clean/maintain the {product1['name']}?",
-            f"Are there special storage requirements for the {product1['name']}?",
-            f"What's the best way to ensure the {product1['name']} lasts a long time?"
-        ]
-        query_parts.append(random.choice(care))
-    
-    if "compatibility_check" in selected_intents:
-        compatibility = [
-            f"Will the {product1['name']} work well with the {product2['name']}?",
-            f"Is the {product1['name']} compatible with my existing {category2} items?",
-            f"Can I use the {product1['name']} in conjunction with the {product2['name']}?",
-            f"Are there any known issues using the {product1['name']} with {product2['name']}?",
-            f"Do I need any adapters or additional items to use the {product1['name']} with my {category2} setup?"
-        ]
-        query_parts.append(random.choice(compatibility))
-    
-    if "recommendation_request" in selected_intents:
-        recommendations = [
-            f"What would you recommend for someone new to gardening who's interested in {category1}?",
-            f"I'm looking for the best {category1} for a small apartment balcony, any suggestions?",
-            f"Can you recommend a {category1} that would complement my existing {product2['name']}?",
-            f"What's your most popular {category1} item for beginners?",
-            f"I need a gift for a sustainability enthusiast who loves {category1}, what do you suggest?"
-        ]
-        query_parts.append(random.choice(recommendations))
-    
-    if "complaint" in selected_intents:
-        complaints = [
-            f"The {product1['name']} I received doesn't match the description on your website.",
-            f"My {product1['name']} arrived damaged, and I'm not satisfied with the customer service response.",
-            f"I've been waiting for my {product1['name']} for over two weeks now, what's the delay?",
-            f"The quality of the {product1['name']} doesn't justify the price you're charging.",
-            f"The {product1['name']} stopped working after just a few uses, is this normal?"
-        ]
-        query_parts.append(random.choice(complaints))
-    
-    if "return_process" in selected_intents:
-        returns = [
-            f"How do I initiate a return for the {product1['name']} I purchased last week?",
-            f"What's the process for exchanging my {product1['name']} for a different size/color/model?",
-            f"Will I get a full refund if I return the {product1['name']} within the 30-day window?",
-            f"Do I need the original packaging to return the {product1['name']}?",
-            f"Can I return the {product1['name']} to your physical store if I bought it online?"
-        ]
-        query_parts.append(random.choice(returns))
-    
-    if "shipping_inquiry" in selected_intents:
-        shipping = [
-            f"How much would shipping cost for the {product1['name']} to California?",
-            f"Do you offer expedited shipping for the {product1['name']}?",
-            f"Can I track my {product1['name']} order once it's shipped?",
-            f"Do you ship the {product1['name']} internationally?",
-            f"What shipping carrier do you use for delivering the {product1['name']}?"
-        ]
-        query_parts.append(random.choice(shipping))
-    
-    # Combine query parts with connecting phrases
-    connectors = [
-        " Also, ", 
-        " Additionally, ", 
-        " By the way, ", 
-        " One more thing, ", 
-        " I'm also wondering, ",
-        " While we're at it, ",
-        " And I'd like to know, ",
-        " Could you also tell me ",
-        " I'd also like to ask about ",
-        " On a related note, "
-    ]
-    
-    # Shuffle query parts to make it more natural
-    random.shuffle(query_parts)
-    
-    # Connect the parts
-    complex_query = query_parts[0]
-    for i in range(1, len(query_parts)):
-        complex_query += random.choice(connectors) + query_parts[i].lower()
+    policy_key = rng.choice(POLICY_KEYS)
     
-    # Generate appropriate response
-    response_parts = []
+    fields = {
+        "p1": product1['name'], "p1_price": product1['price'], "p1_desc": product1['description'],
+        "p2": product2['name'], "p2_price": product2['price'], "p2_desc": product2['description'],
+        "c1": category1, "c2": category2, "shipping_policy": policies['shipping']
+    }
     
-    # Add greeting
-    greetings = [
-        "Thank you for reaching out to GreenThumb Goods! ",
-        "Hello from GreenThumb Goods! ",
-        "We appreciate your interest in our products. ",
-        "Thanks for your questions about our products and services. ",
-        "I'd be happy to help with your inquiries. "
+    # Generate query parts in the fixed intent order
+    query_parts = [
+        rng.choice(QUERY_TEMPLATES[intent]).format_map(fields)
+        for intent in intents if intent in selected_intents
     ]
-    response = random.choice(greetings)
     
-    # Address each intent in the query
+    # Shuffle query parts to make it more natural, then connect them
+    rng.shuffle(query_parts)
+    query_chunks = [query_parts[0]]
+    for part in query_parts[1:]:
+        query_chunks.append(rng.choice(CONNECTORS))
+        query_chunks.append(part.lower())
+    complex_query = "".join(query_chunks)
+    
+    # Generate appropriate response, addressing each intent in the query
+    response_chunks = [rng.choice(GREETINGS)]
     for intent in selected_intents:
-        if intent == "product_inquiry":
-            response_parts.append(f"Regarding the {product1['name']}, it's priced at ${product1['price']} and {product1['description']}.")
-        
-        elif intent == "price_comparison":
-            response_parts.append(f"When comparing the {product1['name']} (${product1['price']}) with the {product2['name']} (${product2['price']}), the price difference reflects their different features and benefits. The {product1['name']} {product1['description']}, while the {product2['name']} {product2['description']}.")
-        
-        elif intent == "availability_check":
-            availability_responses = [
-                f"The {product1['name']} is currently in stock and ready to ship within 1-2 business days.",
-                f"We're temporarily out of stock on the {product1['name']}, but we expect to restock within 2 weeks. You can sign up for email notifications on the product page.",
-                f"We have limited quantities of the {product1['name']} available, so we recommend placing your order soon if you're interested."
-            ]
-            response_parts.append(random.choice(availability_responses))
-        
-        elif intent == "policy_question":
-            if "return" in query_parts[selected_intents.index(intent)].lower():
-                response_parts.append(f"Regarding our return policy: {policies['returns']}")
-            elif "shipping" in query_parts[selected_intents.index(intent)].lower():
-                response_parts.append(f"About our shipping policy: {policies['shipping']}")
-            elif "sustainability" in query_parts[selected_intents.index(intent)].lower():
-                response_parts.append(f"Our sustainability commitment: {policies['sustainability']}")
-            elif "reward" in query_parts[selected_intents.index(intent)].lower():
-                response_parts.append(f"About our rewards program: {policies['rewards']}")
-            elif "warranty" in query_parts[selected_intents.index(intent)].lower():
-                response_parts.append(f"Regarding our warranty policy: {policies['warranty']}")
-            else:
-                response_parts.append(f"Regarding our policies: {policies[policy_key]}")
-        
-        elif intent == "care_instructions":
-            care_responses = [
-                f"For the {product1['name']}, we recommend regular maintenance to ensure longevity. Specific care instructions are included with your purchase, and you can also find them on our website under the product details.",
-                f"The {product1['name']} requires minimal maintenance. We suggest [specific care instructions based on product type] for best results.",
-                f"To keep your {product1['name']} in optimal condition, please follow the care guide included in the packaging. Generally, [basic care tip relevant to product category]."
-            ]
-            response_parts.append(random.choice(care_responses))
-        
-        elif intent == "compatibility_check":
-            compatibility_responses = [
-                f"The {product1['name']} is designed to work seamlessly with the {product2['name']} and other products in our {category2} line.",
-                f"While the {product1['name']} and {product2['name']} can be used together, you might need [additional accessory] for optimal performance.",
-                f"Yes, the {product1['name']} is fully compatible with your existing {category2} items, including the {product2['name']}."
-            ]
-            response_parts.append(random.choice(compatibility_responses))
-        
-        elif intent == "recommendation_request":
-            recommendation_responses = [
-                f"For someone new to {category1}, I'd recommend starting with our {product1['name']}. It's user-friendly and provides excellent value for beginners.",
-                f"Based on your interest in {category1} for a small space, our {product1['name']} would be perfect as it's compact yet effective.",
-                f"As a popular gift for sustainability enthusiasts, our {product1['name']} consistently receives excellent feedback. It complements existing {category2} setups beautifully."
-            ]
-            response_parts.append(random.choice(recommendation_responses))
-        
-        elif intent == "complaint":
-            complaint_responses = [
-                f"I'm sorry to hear about your experience with the {product1['name']}. We stand behind the quality of our products and would like to make this right. Please email our customer service team at support@greenthumbgoods.com with your order number and photos of the issue, and we'll resolve this promptly.",
-                f"We apologize for the delay with your {product1['name']} order. Let me check the status for you right away. Please provide your order number, and I'll investigate the cause of the delay and provide an updated delivery estimate.",
-                f"I understand your frustration with the {product1['name']}. Quality is our top priority, and we'd like to address this issue immediately. Please contact our support team at 1-800-GREEN-THUMB, and they'll arrange a replacement or refund."
-            ]
-            response_parts.append(random.choice(complaint_responses))
-        
-        elif intent == "return_process":
-            return_responses = [
-                f"To return your {product1['name']}, please visit our Returns Center on the website and follow the simple process: 1) Enter your order number and email, 2) Select the item(s) to return, 3) Print the prepaid return label if eligible, and 4) Drop off the package at any authorized shipping location.",
-                f"Returns for the {product1['name']} can be initiated through your account on our website. Go to Order History, select the relevant order, and click 'Return Items'. You'll receive a confirmation email with further instructions.",
-                f"For returning the {product1['name']}, you have 30 days from the delivery date. Original packaging is preferred but not required. Once we receive the return, refunds typically process within 5-7 business days to your original payment method."
-            ]
-            response_parts.append(random.choice(return_responses))
-        
-        elif intent == "shipping_inquiry":
-            shipping_responses = [
-                f"Shipping for the {product1['name']} to California would fall under our standard shipping policy: {policies['shipping']}",
-                f"Yes, we offer expedited shipping for the {product1['name']} at $12.99, which typically delivers within 1-2 business days depending on your location.",
-                f"All orders, including the {product1['name']}, come with tracking information that will be emailed to you once your order ships. You can also track your order through your account on our website."
-            ]
-            response_parts.append(random.choice(shipping_responses))
-    
-    # Combine response parts
-    for part in response_parts:
-        response += part + " "
+        if intent == "policy_question":
+            # Note: indexes the shuffled query parts by intent position, as the dataset always has
+            question = query_parts[selected_intents.index(intent)].lower()
+            part = next((text for keyword, text in POLICY_RESPONSES if keyword in question),
+                        f"Regarding our policies: {policies[policy_key]}")
+        else:
+            templates = RESPONSE_TEMPLATES[intent]
+            template = templates[0] if len(templates) == 1 else rng.choice(templates)
+            part = template.format_map(fields)
+        response_chunks.append(part)
+        response_chunks.append(" ")
     
     # Add closing
-    closings = [
-        "Is there anything else I can help you with today?",
-        "Please let me know if you have any other questions!",
-        "We hope this information helps with your decision.",
-        "Thank you for choosing GreenThumb Goods for your sustainable living needs.",
-        "We're here if you need any further assistance."
-    ]
-    response += random.choice(closings)
+    response_chunks.append(rng.choice(CLOSINGS))
     
     return {
         "query": complex_query,
-        "response": response,
+        "response": "".join(response_chunks),
         "intents": selected_intents,
         "products_mentioned": [product1['name'], product2['name']],
         "categories_mentioned": [category1, category2],
         "policies_mentioned": policy_key if "policy_question" in selected_intents else None
     }
 
-def main():
-    """Generate the dataset and save it to files."""
-    print("Generating dataset of 50 complex multi-intent customer queries...")
-    
-    # Generate 50 complex queries and responses
-    dataset = []
-    for i in range(50):
-        dataset.append(generate_complex_query())
-    
-    # Create output directory if it doesn't exist
-    output_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Save dataset as JSON
-    json_path = os.path.join(output_dir, 'greenthumb_dataset.json')
-    with open(json_path, 'w') as f:
-        json.dump(dataset, f, indent=2)
-    
-    # Save dataset as CSV
-    df = pd.DataFrame([{
+# Flatten a record into a CSV row (list fields become comma-separated strings)
+CSV_FIELDS = ['query', 'response', 'intents', 'products_mentioned', 'categories_mentioned', 'policies_mentioned']
+
+def flatten_record(item):
+    """Convert a generated record into a flat CSV row."""
+    return {
         'query': item['query'],
         'response': item['response'],
         'intents': ','.join(item['intents']),
         'products_mentioned': ','.join(item['products_mentioned']),
         'categories_mentioned': ','.join(item['categories_mentioned']),
         'policies_mentioned': item['policies_mentioned'] if item['policies_mentioned'] else ''
-    } for item in dataset])
+    }
+
+# Stream records one at a time so memory stays flat for large corpora
+def iter_records(count, rng=None):
+    """
+    Generate records lazily.
+    
+    Args:
+        count: Number of records to generate
+        rng: Optional random.Random instance for reproducible output
+    
+    Returns:
+        Generator of record dictionaries
+    """
+    for _ in range(count):
+        yield generate_complex_query(rng)
+
+# Derive an independent, reproducible RNG seed for each shard
+def derive_shard_seed(master_seed, shard_index):
+    """
+    Derive a shard's seed from the master seed and shard index.
+    
+    Args:
+        master_seed: Seed for the whole corpus
+        shard_index: Zero-based shard number
+    
+    Returns:
+        64-bit integer seed that depends only on (master_seed, shard_index)
+    """
+    digest = hashlib.sha256(f"{master_seed}:{shard_index}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def write_shards(records, output_dir, shard_size, formats=("jsonl", "csv"), prefix="greenthumb_dataset", progress=True, first_shard=0):
+    """
+    Write records to numbered JSONL/CSV shard files incrementally.
+    
+    Args:
+        records: Iterable of record dictionaries (typically a generator)
+        output_dir: Directory for the shard files
+        shard_size: Maximum number of records per shard
+        formats: Output formats to write ("jsonl", "csv", "parquet" and/or "feather")
+        prefix: File name prefix for the shards
+        progress: Print a line per completed shard
+        first_shard: Number used for the first shard file
+    
+    Returns:
+        Dictionary with the number of rows, shard paths, elapsed seconds and rows/sec
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    paths = []
+    handles = {}
+    csv_writer = None
+    columnar_writers = []
+    rows = 0
+    shard_rows = 0
+    shard_index = -1
+    
+    def close_shard():
+        for handle in handles.values():
+            handle.close()
+        handles.clear()
+        for writer in columnar_writers:
+            writer.close()
+        columnar_writers.clear()
+    
+    try:
+        for item in records:
+            if shard_index < 0 or shard_rows >= shard_size:
+                close_shard()
+                if progress and shard_index >= 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"  shard {first_shard + shard_index:05d} done: {rows} rows, {rows / elapsed:,.0f} rows/sec")
+                shard_index += 1
+                shard_rows = 0
+                base = os.path.join(output_dir, f"{prefix}-{first_shard + shard_index:05d}")
+                if "jsonl" in formats:
+                    handles["jsonl"] = open(f"{base}.jsonl", 'w')
+                    paths.append(f"{base}.jsonl")
+                if "csv" in formats:
+                    handles["csv"] = open(f"{base}.csv", 'w', newline='')
+                    csv_writer = csv.DictWriter(handles["csv"], fieldnames=CSV_FIELDS)
+                    csv_writer.writeheader()
+                    paths.append(f"{base}.csv")
+                for fmt in COLUMNAR_FORMATS:
+                    if fmt in formats:
+                        columnar_writers.append(ColumnarWriter(f"{base}.{fmt}", COLUMNAR_VOCABULARIES, fmt))
+                        paths.append(f"{base}.{fmt}")
+            
+            if "jsonl" in handles:
+                handles["jsonl"].write(json.dumps(item) + "\n")
+            if "csv" in handles:
+                csv_writer.writerow(flatten_record(item))
+            for writer in columnar_writers:
+                writer.write(item)
+            rows += 1
+            shard_rows += 1
+    finally:
+        close_shard()
+    
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "shards": shard_index + 1,
+        "paths": paths,
+        "elapsed_s": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0
+    }
+
+# Generate one shard with its own seeded RNG (runs inside worker processes)
+def generate_shard(shard_index, count, master_seed, output_dir, formats, prefix="greenthumb_dataset"):
+    """
+    Generate and write a single shard deterministically.
+    
+    Args:
+        shard_index: Zero-based shard number
+        count: Number of records in this shard
+        master_seed: Seed for the whole corpus
+        output_dir: Directory for the shard files
+        formats: Output formats to write
+        prefix: File name prefix for the shards
+    
+    Returns:
+        Statistics dictionary from write_shards
+    """
+    rng = random.Random(derive_shard_seed(master_seed, shard_index))
+    return write_shards(iter_records(count, rng), output_dir, count, formats, prefix,
+                        progress=False, first_shard=shard_index)
+
+def generate_seeded_corpus(count, shard_size, master_seed, output_dir, formats, workers=1, prefix="greenthumb_dataset", progress=True):
+    """
+    Generate a reproducible corpus, optionally across several processes.
+    
+    Every shard's content depends only on (master_seed, shard index, shard size), so
+    the output is identical regardless of the number of workers.
+    
+    Args:
+        count: Total number of records
+        shard_size: Records per shard
+        master_seed: Seed for the whole corpus
+        output_dir: Directory for the shard files
+        formats: Output formats to write
+        workers: Number of worker processes (1 runs in-process)
+        prefix: File name prefix for the shards
+        progress: Print a line per completed shard
+    
+    Returns:
+        Dictionary with the number of rows, shard paths, elapsed seconds and rows/sec
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    shard_counts = [min(shard_size, count - start) for start in range(0, count, shard_size)]
+    start = time.perf_counter()
+    results = []
+    
+    if workers <= 1:
+        for shard_index, shard_count in enumerate(shard_counts):
+            results.append(generate_shard(shard_index, shard_count, master_seed, output_dir, formats, prefix))
+            if progress:
+                print(f"  shard {shard_index:05d} done ({shard_count} rows)")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(generate_shard, shard_index, shard_count, master_seed, output_dir, formats, prefix): shard_index
+                for shard_index, shard_count in enumerate(shard_counts)
+            }
+            for future in as_completed(futures):
+                results.append(future.result())
+                if progress:
+                    print(f"  shard {futures[future]:05d} done ({results[-1]['rows']} rows)")
+    
+    elapsed = time.perf_counter() - start
+    rows = sum(result['rows'] for result in results)
+    return {
+        "rows": rows,
+        "shards": len(shard_counts),
+        "paths": sorted(path for result in results for path in result['paths']),
+        "elapsed_s": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0
+    }
+
+# Output formats accepted by --formats
+OUTPUT_FORMATS = ("jsonl", "csv") + COLUMNAR_FORMATS
+
+def positive_int(value):
+    """argparse type for options that must be a positive integer."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the GreenThumb Goods multi-intent query dataset.")
+    parser.add_argument("--count", type=int, default=50, help="Number of records to generate")
+    parser.add_argument("--shard-size", type=positive_int, default=None,
+                        help="Stream records into shards of this many rows (enables large-scale mode)")
+    parser.add_argument("--formats", default=None,
+                        help="Comma-separated formats: jsonl, csv, parquet, feather (shards default to jsonl,csv; "
+                             "the single dataset is always written as .json, plus csv by default)")
+    parser.add_argument("--output-dir", default=None,
+                        help="Output directory (default: ./greenthumb_corpus for shards, this script's directory otherwise)")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed for reproducible output")
+    parser.add_argument("--workers", type=positive_int, default=1, help="Worker processes for sharded generation")
+    args = parser.parse_args(argv)
+    if args.workers > 1 and not args.shard_size:
+        parser.error("--workers requires --shard-size")
+    unknown = [fmt for fmt in parse_formats(args.formats or "") if fmt not in OUTPUT_FORMATS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)} (choose from {', '.join(OUTPUT_FORMATS)})")
+    return args
+
+def parse_formats(value):
+    return tuple(fmt.strip() for fmt in value.split(',') if fmt.strip())
+
+def generate_corpus(args):
+    """Stream a large corpus to sharded files without holding it in memory."""
+    output_dir = args.output_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'greenthumb_corpus')
+    formats = parse_formats(args.formats or "jsonl,csv")
+    print(f"Streaming {args.count:,} records into shards of {args.shard_size:,} ({', '.join(formats)}) in {output_dir}...")
+    
+    if args.seed is None and args.workers <= 1:
+        stats = write_shards(iter_records(args.count), output_dir, args.shard_size, formats)
+    else:
+        # Seeded (or parallel) runs give every shard its own RNG so output is reproducible
+        master_seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+        print(f"Master seed {master_seed}, {args.workers} worker(s)")
+        stats = generate_seeded_corpus(args.count, args.shard_size, master_seed, output_dir, formats, args.workers)
+    
+    print(f"Wrote {stats['rows']:,} records to {stats['shards']} shard(s) in {stats['elapsed_s']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)")
+    return stats
+
+# Save the dataset as JSON
+def write_json_dataset(dataset, path):
+    """Write the dataset as an indented JSON list."""
+    with open(path, 'w') as f:
+        json.dump(dataset, f, indent=2)
+
+# Save the dataset as JSON Lines
+def write_jsonl_dataset(dataset, path):
+    """Write the dataset with one JSON record per line."""
+    with open(path, 'w') as f:
+        for item in dataset:
+            f.write(json.dumps(item) + "\n")
+
+# Save the dataset as CSV
+def write_csv_dataset(dataset, path):
+    """Write the dataset as CSV with list fields flattened (see flatten_record)."""
+    df = pd.DataFrame([flatten_record(item) for item in dataset])
+    df.to_csv(path, index=False)
+
+def save_dataset(dataset, output_dir, formats=("csv",)):
+    """
+    Save the dataset as greenthumb_dataset.json plus a copy in each requested format.
+    
+    Args:
+        dataset: List of record dictionaries
+        output_dir: Directory for the files (created if missing)
+        formats: Extra formats to write ("jsonl", "csv", "parquet" and/or "feather")
+    
+    Returns:
+        List of saved file paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, 'greenthumb_dataset.json')
+    write_json_dataset(dataset, json_path)
+    saved = [json_path]
+    if "jsonl" in formats:
+        jsonl_path = os.path.join(output_dir, 'greenthumb_dataset.jsonl')
+        write_jsonl_dataset(dataset, jsonl_path)
+        saved.append(jsonl_path)
+    if "csv" in formats:
+        csv_path = os.path.join(output_dir, 'greenthumb_dataset.csv')
+        write_csv_dataset(dataset, csv_path)
+        saved.append(csv_path)
+    
+    # Save columnar copies (dictionary-encoded label columns) when requested
+    for fmt in formats:
+        if fmt in COLUMNAR_FORMATS:
+            columnar_path = os.path.join(output_dir, f'greenthumb_dataset.{fmt}')
+            write_columnar(dataset, columnar_path, COLUMNAR_VOCABULARIES, fmt)
+            saved.append(columnar_path)
+    return saved
+
+def main(argv=None):
+    """Generate the dataset and save it to files."""
+    args = parse_args(argv)
+    if args.shard_size:
+        return generate_corpus(args)
+    
+    print(f"Generating dataset of {args.count} complex multi-intent customer queries...")
+    
+    # Generate complex queries and responses
+    rng = random.Random(args.seed) if args.seed is not None else None
+    dataset = []
+    for i in range(args.count):
+        dataset.append(generate_complex_query(rng))
     
-    csv_path = os.path.join(output_dir, 'greenthumb_dataset.csv')
-    df.to_csv(csv_path, index=False)
+    # Save next to this script unless another directory was given
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(__file__))
+    saved = save_dataset(dataset, output_dir, parse_formats(args.formats or "csv"))
     
     print(f"Dataset created with {len(dataset)} complex queries.")
-    print(f"Files saved: {json_path} and {csv_path}")
+    print(f"Files saved: {', '.join(saved)}")
     
     # Display a few examples
     print("\nExample queries:")
-    for i in range(3):
+    for i in range(min(3, len(dataset))):
         print(f"\nQuery {i+1}: {dataset[i]['query']}")
         print(f"Response: {dataset[i]['response']}")
         print(f"Intents: {', '.join(dataset[i]['intents'])}")
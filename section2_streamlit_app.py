@@ -4,16 +4,57 @@ This script creates a Streamlit interface using the open-source Phi-3-mini model
 """
 
 import streamlit as st
-import json
 import os
+import random
 import requests
+import time
+import uuid
+from collections import deque
+
+from analytics_events import (CHAT_SESSION_INITIATED, COMPLEX_QUERY_IDENTIFIED, POLICY_INFORMATION_DELIVERED,
+                              PRODUCT_RECOMMENDATION_PROVIDED, USER_SATISFACTION_RATING, emitter_from_env)
+from chat_history import ChatHistory, render_chat_message, render_messages
+from chat_prompts import create_prompt
+from context_assembly import detect_policies, detect_products
+from conversation_context import ConversationContext
+from dataset_store import open_dataset_store
+from failover_router import AllBackendsFailed, FailoverRouter
+from fast_path_router import FastPathRouter
+from http_client import PooledHTTPClient
+from inference_streaming import GenerationTimer
+from intent_classifier import load_or_train_classifier
+from model_backends import HuggingFaceBackend, create_backend
+from rate_scheduler import INTERACTIVE, PRIORITIES, rate_scheduler_from_env
+from request_coalescing import SingleFlight
+from response_cache import get_default_cache, make_cache_key
+from semantic_cache import semantic_cache_from_env
+from token_utils import estimate_tokens
+from tracing import tracer_from_env
 
 # Hugging Face API setup (optional: add your HF token if needed)
 HF_MODEL_ID = "microsoft/phi-3-mini-4k-instruct"
-HF_API_URL = f"https://api-inference.huggingface.co/models/{HF_MODEL_ID}"
+HF_API_URL = os.getenv("HF_API_URL", f"https://api-inference.huggingface.co/models/{HF_MODEL_ID}")
 HF_HEADERS = {
     "Authorization": f"Bearer {os.getenv('HF_API_KEY', '')}"
 } if os.getenv("HF_API_KEY") else {}
+HF_MAX_NEW_TOKENS = 300
+HF_TEMPERATURE = 0.7
+HF_CONNECT_TIMEOUT = float(os.getenv("HF_CONNECT_TIMEOUT", "3.05"))
+HF_READ_TIMEOUT = float(os.getenv("HF_READ_TIMEOUT", "60"))
+
+# Prompt token budget: phi-3-mini's 4k window minus room for the reply, with a margin for estimation error
+PHI3_CONTEXT_WINDOW = 4096
+CONTEXT_TOKEN_BUDGET = int((PHI3_CONTEXT_WINDOW - HF_MAX_NEW_TOKENS) * 0.9)
+
+# Chat history bounds: messages rendered in full, messages per page of older history,
+# and messages kept before the oldest are compacted
+HISTORY_RECENT_MESSAGES = 20
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_MESSAGES = 200
+
+# Dataset (a .json/.jsonl file or a directory of .jsonl shards) and how much of it to train on
+DATASET_PATH = os.getenv("GREENTHUMB_DATASET", os.path.join(os.path.dirname(os.path.abspath(__file__)), "greenthumb_dataset.json"))
+CLASSIFIER_TRAINING_SAMPLE = 20000
 
 # ──────────────────────────────────────────────────────────────
 # Set Streamlit page configuration
@@ -40,57 +81,207 @@ st.markdown("""
     .chat-message.bot { background-color: #ffffff; border: 1px solid #e0e0e0; }
     .chat-message .avatar { width: 40px; height: 40px; border-radius: 50%; object-fit: cover; margin-right: 1rem; }
     .chat-message .message { flex: 1; }
+    .chat-caption { color: #808495; font-size: 0.85rem; margin: -0.5rem 0 1rem 0; }
 </style>
 """, unsafe_allow_html=True)
 
 # ──────────────────────────────────────────────────────────────
-# Load example data (optional fallback)
-@st.cache_data
-def load_example_data():
+# Dataset shared (not copied) by every session: memory-mapped, records parsed on access
+@st.cache_resource
+def get_dataset_store():
     try:
-        path = os.path.join(os.path.dirname(__file__), "greenthumb_dataset.json")
-        with open(path, "r") as f:
-            return json.load(f)
-    except:
-        return [{"query": "What herbs grow well indoors?", "response": "Try basil, mint, and parsley. All thrive in indirect light!"}]
-
-# System prompt for each mode
-def create_prompt(user_query, mode):
-    if mode == "Zero-shot":
-        return (
-            "You are a helpful assistant for GreenThumb Goods, a company that sells eco-friendly gardening supplies.\n\n"
-            f"Customer: {user_query}\nAssistant:"
-        )
-    else:  # Few-shot
-        examples = (
-            "Customer: What plants are good for beginners?\n"
-            "Assistant: Our Herb Garden Starter Kit and Indoor Succulent Collection are great for beginners.\n\n"
-            "Customer: What's your return policy?\n"
-            "Assistant: We offer a 30-day satisfaction guarantee on all items. Perishables must be returned within 7 days.\n\n"
-        )
-        return examples + f"Customer: {user_query}\nAssistant:"
+        return open_dataset_store(DATASET_PATH)
+    except (OSError, ValueError):
+        return None
+
+# Response cache shared by every session in this Streamlit process (and other processes via disk)
+@st.cache_resource
+def get_response_cache():
+    return get_default_cache()
+
+# Near-duplicate answer cache shared by every session (GREENTHUMB_SEMANTIC_CACHE=0 disables it)
+@st.cache_resource
+def get_semantic_cache():
+    return semantic_cache_from_env()
+
+# Pooled keep-alive HTTP client shared by every session in this Streamlit process
+@st.cache_resource
+def get_http_client():
+    return PooledHTTPClient(timeout=(HF_CONNECT_TIMEOUT, HF_READ_TIMEOUT))
+
+# Model backend shared by every session: GREENTHUMB_BACKEND=huggingface (default), openai or local.
+# GREENTHUMB_FALLBACK_BACKEND adds a secondary backend for hedged requests and failover.
+@st.cache_resource
+def get_model_backend():
+    name = os.getenv("GREENTHUMB_BACKEND", "huggingface")
+    if name == "huggingface":
+        backend = HuggingFaceBackend(HF_API_URL, HF_MODEL_ID, HF_HEADERS, HF_TEMPERATURE, HF_MAX_NEW_TOKENS,
+                                     http_client=get_http_client())
+    else:
+        backend = create_backend(name, temperature=HF_TEMPERATURE, max_tokens=HF_MAX_NEW_TOKENS)
+    fallback = os.getenv("GREENTHUMB_FALLBACK_BACKEND")
+    if fallback:
+        backend = FailoverRouter([backend, create_backend(fallback, temperature=HF_TEMPERATURE, max_tokens=HF_MAX_NEW_TOKENS)])
+    return backend
+
+# Request tracing and metrics (enabled by GREENTHUMB_TRACE_FILE, GREENTHUMB_METRICS_PORT or GREENTHUMB_TRACING=1)
+@st.cache_resource
+def get_tracer():
+    return tracer_from_env()
+
+# Analytics events from the GA4 tracking plan (sent only when GREENTHUMB_ANALYTICS_URL is set)
+@st.cache_resource
+def get_analytics():
+    return emitter_from_env()
+
+def track_event(name, **params):
+    analytics = get_analytics()
+    if analytics is not None:
+        analytics.emit(name, client_id=st.session_state.analytics_client_id, **params)
+
+def track_reply_events(reply, metrics):
+    """Emit the events a reply triggers: complex query, product recommendation, policy information."""
+    if get_analytics() is None:
+        return
+    intents = metrics.get("intents") or []
+    if len(intents) >= 2:
+        track_event(COMPLEX_QUERY_IDENTIFIED, intent_count=len(intents), intents=intents)
+    recommended = [product["name"] for _, product in detect_products(reply)]
+    if recommended:
+        track_event(PRODUCT_RECOMMENDATION_PROVIDED, products=recommended)
+    delivered = detect_policies(reply)
+    if delivered:
+        track_event(POLICY_INFORMATION_DELIVERED, policies=delivered, fast_path=metrics["fast_path"])
+
+# Provider budget shared with evaluation runs in other processes (GREENTHUMB_RATE_RPM/TPM); chat goes first
+@st.cache_resource
+def get_rate_scheduler():
+    return rate_scheduler_from_env()
+
+def wait_for_rate_budget(prompt, backend):
+    scheduler = get_rate_scheduler()
+    if scheduler is not None:
+        scheduler.acquire(estimate_tokens(prompt) + backend.max_tokens, INTERACTIVE)
+
+# Single-flight layer: concurrent identical model requests from all sessions share one backend call
+@st.cache_resource
+def get_request_coalescer():
+    return SingleFlight()
+
+# Router that answers pure policy questions without calling the model (counters shared by all sessions)
+@st.cache_resource
+def get_fast_path_router():
+    return FastPathRouter()
+
+# Intent classifier (persisted weights, or trained once on a sample of the dataset)
+@st.cache_resource
+def get_intent_classifier():
+    store = get_dataset_store()
+    sample = store.sample(CLASSIFIER_TRAINING_SAMPLE, random.Random(0)) if store is not None else []
+    return load_or_train_classifier([item for item in sample if item.get("intents")])
+
+# Turn backend errors into messages a customer can act on
+def describe_model_error(error):
+    if isinstance(error, AllBackendsFailed) and error.errors:
+        # Describe the primary backend's failure
+        error = error.errors[0][1]
+    if isinstance(error, requests.Timeout):
+        return "The assistant is taking too long to respond. Please try again in a moment."
+    response = getattr(error, "response", None)
+    if response is not None and response.status_code == 503:
+        return "The assistant model is still loading. Please try again in a minute."
+    if response is not None and response.status_code == 429:
+        return "The assistant is receiving too many requests right now. Please try again shortly."
+    return f"Error from {get_model_backend().name}: {str(error)}"
+
+# Query the model backend (Hugging Face endpoint by default)
+def get_phi3_response(prompt, semantic_key=None):
+    """Return the reply; a successful one is also stored in the semantic cache under semantic_key=(query, namespace)."""
+    backend = get_model_backend()
+    cache = get_response_cache()
+    cache_key = make_cache_key(backend.model_id, prompt, backend.temperature, backend.max_tokens)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    def fetch():
+        wait_for_rate_budget(prompt, backend)
+        reply = backend.generate(prompt)
+        # Only successful replies are cached (before the flight ends, so later callers hit the cache)
+        if cache is not None:
+            cache.set(cache_key, reply)
+        if semantic_key is not None:
+            get_semantic_cache().put(semantic_key[0], reply, semantic_key[1])
+        return reply
 
-# Query Hugging Face model endpoint
-def get_phi3_response(prompt):
-    payload = {"inputs": prompt, "parameters": {"max_new_tokens": 300, "temperature": 0.7}}
+    # Identical requests already in flight from other sessions share that call
     try:
-        res = requests.post(HF_API_URL, headers=HF_HEADERS, json=payload)
-        res.raise_for_status()
-        generated = res.json()
-        return generated[0]["generated_text"].split("Assistant:")[-1].strip()
+        return get_request_coalescer().do(cache_key, fetch)
     except Exception as e:
-        return f"Error from Hugging Face API: {str(e)}"
+        return describe_model_error(e)
+
+# Stream tokens from the model backend as they are generated
+def stream_phi3_response(prompt, timer, semantic_key=None):
+    """Yield reply text chunks as they arrive, falling back to the blocking call if streaming fails."""
+    backend = get_model_backend()
+    cache = get_response_cache()
+    cache_key = make_cache_key(backend.model_id, prompt, backend.temperature, backend.max_tokens)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            timer.mark_token()
+            yield cached
+            return
+
+    def fetch_stream():
+        wait_for_rate_budget(prompt, backend)
+        chunks = []
+        for token in backend.stream(prompt):
+            chunks.append(token)
+            yield token
+        if cache is not None and chunks:
+            cache.set(cache_key, "".join(chunks).strip())
+        if semantic_key is not None and chunks:
+            get_semantic_cache().put(semantic_key[0], "".join(chunks).strip(), semantic_key[1])
+
+    chunks = []
+    try:
+        # Identical requests already in flight from other sessions share that stream
+        for token in get_request_coalescer().stream(cache_key, fetch_stream):
+            timer.mark_token()
+            # A backend without native streaming yields the whole reply as one chunk
+            if chunks:
+                timer.streamed = True
+            chunks.append(token)
+            yield token
+    except Exception as e:
+        if chunks:
+            yield f" [stream interrupted: {str(e)}]"
+            return
+        # Nothing was streamed yet: use the blocking call instead
+        reply = get_phi3_response(prompt, semantic_key)
+        timer.mark_token()
+        yield reply
+        return
 
 # Display chat-style messages
-def display_chat_message(message, is_user=False):
-    avatar = "👤" if is_user else "🌱"
-    role_class = "user" if is_user else "bot"
-    st.markdown(f"""
-    <div class="chat-message {role_class}">
-        <div class="avatar">{avatar}</div>
-        <div class="message">{message}</div>
-    </div>
-    """, unsafe_allow_html=True)
+def display_chat_message(message, is_user=False, container=None):
+    (container or st).markdown(render_chat_message(message, is_user), unsafe_allow_html=True)
+
+def format_latency_caption(metrics):
+    if metrics.get("fast_path"):
+        mode = "fast path"
+    elif metrics.get("semantic_cache"):
+        mode = "answer to a similar question"
+    else:
+        mode = "streamed" if metrics["streamed"] else "blocking"
+    caption = f"First token {metrics['ttft_s']:.2f}s · total {metrics['total_s']:.2f}s ({mode})"
+    if metrics.get("prompt_tokens"):
+        caption += f" · prompt ~{metrics['prompt_tokens']} tokens"
+    if metrics.get("intents"):
+        caption += f" · intents: {', '.join(metrics['intents'])}"
+    return caption
 
 # ──────────────────────────────────────────────────────────────
 # Chat UI
@@ -100,6 +291,7 @@ st.markdown("Ask anything about our gardening products, sustainability policies,
 # Sidebar prompt mode
 st.sidebar.title("Model Settings")
 prompt_mode = st.sidebar.radio("Select Prompt Strategy", ["Zero-shot", "Few-shot"])
+stream_mode = st.sidebar.checkbox("Stream responses", value=True)
 
 # Sample prompts
 with st.sidebar.expander("Example Queries"):
@@ -109,28 +301,217 @@ with st.sidebar.expander("Example Queries"):
     - How do I compost kitchen waste at home?
     - Do your pots support hydroponics?
     """)
+    if get_dataset_store() is not None:
+        intent_counts = get_dataset_store().intent_counts()
+        if intent_counts:
+            browse_intent = st.selectbox("Browse the dataset by intent", sorted(intent_counts))
+            for item in get_dataset_store().sample_by_intent(browse_intent, 3, random.Random(browse_intent)):
+                st.markdown(f"- {item['query']}")
+
+# Connection pool statistics
+with st.sidebar.expander("Connection Pool"):
+    http_stats = get_http_client().stats()
+    st.markdown(
+        f"- Requests: {http_stats['calls']} ({http_stats['retries']} retries, {http_stats['timeouts']} timeouts)\n"
+        f"- Connections opened: {http_stats['connections_opened']}\n"
+        f"- Connection reuse: {http_stats['connection_reuse_ratio']:.0%}"
+    )
+
+# Fast-path routing statistics
+with st.sidebar.expander("Fast Path"):
+    route_stats = get_fast_path_router().stats()
+    st.markdown(
+        f"- Answered directly: {route_stats['fast_path']} of {route_stats['queries']} "
+        f"({route_stats['fast_path_share']:.0%})\n"
+        f"- Sent to the model: {route_stats['escalated']}"
+    )
+
+# Request coalescing statistics
+with st.sidebar.expander("Request Coalescing"):
+    flight_stats = get_request_coalescer().stats()
+    st.markdown(
+        f"- Model requests: {flight_stats['calls']}, backend calls issued: {flight_stats['issued']}\n"
+        f"- Shared with an identical in-flight request: {flight_stats['coalesced']} ({flight_stats['coalesced_share']:.0%})\n"
+        f"- Gave up on a stuck shared call: {flight_stats['timeouts']}"
+    )
+
+# Semantic cache statistics
+if get_semantic_cache() is not None:
+    with st.sidebar.expander("Similar Questions"):
+        semantic_stats = get_semantic_cache().stats()
+        st.markdown(
+            f"- Answered from a similar question: {semantic_stats['hits']} of "
+            f"{semantic_stats['hits'] + semantic_stats['misses']} ({semantic_stats['hit_rate']:.0%})\n"
+            f"- Stored answers: {semantic_stats['entries']} of {semantic_stats['capacity']} "
+            f"({semantic_stats['evictions']} evicted)"
+        )
+
+# Hedging and failover statistics
+if isinstance(get_model_backend(), FailoverRouter):
+    with st.sidebar.expander("Failover"):
+        router_stats = get_model_backend().stats()
+        st.markdown(
+            f"- Requests: {router_stats['requests']} ({router_stats['hedged']} hedged, "
+            f"{router_stats['failovers']} failed over, {router_stats['all_failed']} failed)\n"
+            + "\n".join(f"- {backend['name']}: {backend['wins']} answers, circuit {backend['circuit']}, "
+                        f"hedge after {backend['hedge_delay']:.2f}s" for backend in router_stats["backends"])
+        )
+
+# Shared rate-limit budget: queue depth and waits per priority class
+if get_rate_scheduler() is not None:
+    with st.sidebar.expander("Rate Limits"):
+        rate_stats = get_rate_scheduler().stats()
+        st.markdown("\n".join(
+            f"- {priority.capitalize()}: {rate_stats[priority]['queued']} waiting, {rate_stats[priority]['granted']} sent, "
+            f"mean wait {rate_stats[priority]['wait_mean_s']:.2f}s (max {rate_stats[priority]['wait_max_s']:.2f}s)"
+            for priority in PRIORITIES
+        ))
+
+# Response cache statistics
+if get_response_cache() is not None:
+    with st.sidebar.expander("Response Cache"):
+        cache_stats = get_response_cache().stats()
+        st.markdown(
+            f"- Hits: {cache_stats['hits']} (all processes: {cache_stats['total_hits']})\n"
+            f"- Misses: {cache_stats['misses']} (all processes: {cache_stats['total_misses']})\n"
+            f"- Entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.1f} KB)"
+        )
+
+# Request tracing: mean time per step
+if get_tracer().enabled:
+    with st.sidebar.expander("Tracing"):
+        span_rows = [f"- {span}: {mean_ms:.1f} ms (n={count})" for request, span, count, mean_ms in get_tracer().span_summary()]
+        st.markdown("\n".join(span_rows) or "No requests traced yet.")
+
+# Analytics pipeline statistics
+if get_analytics() is not None:
+    with st.sidebar.expander("Analytics"):
+        analytics_stats = get_analytics().stats()
+        st.markdown(
+            f"- Events: {analytics_stats['emitted']} emitted, {analytics_stats['sent_events']} delivered, "
+            f"{analytics_stats['queued']} queued, {analytics_stats['dropped']} dropped\n"
+            f"- Batches: {analytics_stats['sent_batches']} sent, {analytics_stats['spool_files']} waiting on disk"
+        )
+        if analytics_stats['errors']:
+            st.caption(f"{analytics_stats['errors']} pipeline error(s); last: {analytics_stats['last_error']}")
 
 # Initialize chat
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "analytics_client_id" not in st.session_state:
+    st.session_state.analytics_client_id = uuid.uuid4().hex
+    track_event(CHAT_SESSION_INITIATED, prompt_mode=prompt_mode)
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory(max_messages=HISTORY_MAX_MESSAGES)
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationContext(token_budget=CONTEXT_TOKEN_BUDGET)
+if "render_times" not in st.session_state:
+    st.session_state.render_times = deque(maxlen=50)
+history = st.session_state.history
+
+# Display prior chat history: recent messages in full, older ones one page at a time
+render_start = time.perf_counter()
+older_pages = history.older_page_count(HISTORY_RECENT_MESSAGES, HISTORY_PAGE_SIZE)
+if older_pages or history.compacted:
+    older_count = max(0, len(history) - HISTORY_RECENT_MESSAGES) + history.compacted
+    with st.expander(f"Earlier messages ({older_count})"):
+        if history.compacted:
+            st.caption(f"The {history.compacted} oldest messages were compacted to save memory.")
+        if older_pages:
+            page = st.number_input("Page (1 = most recent)", min_value=1, max_value=older_pages, value=1)
+            st.markdown(render_messages(history.older_page(page - 1, HISTORY_RECENT_MESSAGES, HISTORY_PAGE_SIZE)),
+                        unsafe_allow_html=True)
+recent_messages = history.recent(HISTORY_RECENT_MESSAGES)
+if recent_messages:
+    st.markdown(render_messages(recent_messages), unsafe_allow_html=True)
+st.session_state.render_times.append(time.perf_counter() - render_start)
 
-# Display prior chat history
-for msg in st.session_state.messages:
-    display_chat_message(msg["content"], msg["role"] == "user")
+# Prompt size statistics
+with st.sidebar.expander("Conversation Context"):
+    context_stats = st.session_state.conversation.stats()
+    st.markdown(
+        f"- Prompt tokens: last {context_stats['last_prompt_tokens']}, mean {context_stats['mean_prompt_tokens']:.0f}, "
+        f"max {context_stats['max_prompt_tokens']} (budget {CONTEXT_TOKEN_BUDGET})\n"
+        f"- Older messages: {context_stats['last_summarized_messages']} summarized, "
+        f"{context_stats['last_dropped_messages']} dropped\n"
+        f"- Render cache hit rate: {context_stats['render_cache_hit_rate']:.0%}"
+    )
+
+# Chat history statistics
+with st.sidebar.expander("Chat History"):
+    render_times = st.session_state.render_times
+    st.markdown(
+        f"- Messages kept: {len(history)} ({history.compacted} compacted)\n"
+        f"- History render: {render_times[-1] * 1000:.1f} ms "
+        f"(mean {sum(render_times) / len(render_times) * 1000:.1f} ms over {len(render_times)} reruns)"
+    )
 
 # Input and submit
 query = st.text_input("Ask a question:", key="query_input")
 if st.button("Submit") and query:
-    st.session_state.messages.append({"role": "user", "content": query})
-    display_chat_message(query, is_user=True)
+    with get_tracer().request("chat", mode=prompt_mode, stream=stream_mode) as trace:
+        history.append("user", query)
+        with trace.span("render"):
+            display_chat_message(query, is_user=True)
+
+        # Earlier turns (excluding the query just added) give follow-up questions their context
+        with trace.span("prompt_build"):
+            prompt = create_prompt(query, prompt_mode, history.messages[:-1], st.session_state.conversation)
+        timer = GenerationTimer()
+        # Single-intent policy questions are answered from the policy texts without a model call
+        with trace.span("fast_path"):
+            fast_reply = get_fast_path_router().answer(query)
+        # A first question (no earlier turns to depend on) can reuse the answer to a near-duplicate one
+        semantic_key = None
+        similar_reply = None
+        if fast_reply is None and get_semantic_cache() is not None and len(history) == 1 and not history.compacted:
+            semantic_key = (query, f"{get_model_backend().model_id}|{prompt_mode}")
+            with trace.span("semantic_cache"):
+                similar_reply = get_semantic_cache().get(*semantic_key)
+        placeholder = None
+        if fast_reply is not None:
+            reply = fast_reply
+            timer.mark_token()
+        elif similar_reply is not None:
+            reply = similar_reply
+            timer.mark_token()
+        elif stream_mode:
+            # Render tokens into the bot bubble as they arrive (the span includes that rendering)
+            placeholder = st.empty()
+            reply = ""
+            with trace.span("backend_call"):
+                for chunk in stream_phi3_response(prompt, timer, semantic_key):
+                    reply += chunk
+                    display_chat_message(reply + " ▌", container=placeholder)
+            reply = reply.strip()
+        else:
+            with trace.span("backend_call"), st.spinner("Thinking..."):
+                reply = get_phi3_response(prompt, semantic_key)
+        timer.finish()
 
-    with st.spinner("Thinking..."):
-        prompt = create_prompt(query, prompt_mode)
-        reply = get_phi3_response(prompt)
+        with trace.span("post_process"):
+            metrics = timer.metrics()
+            metrics["fast_path"] = fast_reply is not None
+            metrics["semantic_cache"] = similar_reply is not None
+            if not metrics["fast_path"] and not metrics["semantic_cache"]:
+                metrics["prompt_tokens"] = estimate_tokens(prompt)
+            if get_intent_classifier() is not None:
+                metrics["intents"] = get_intent_classifier().predict([query])[0]
+            caption = format_latency_caption(metrics)
+            track_reply_events(reply, metrics)
+        with trace.span("render"):
+            display_chat_message(reply, container=placeholder)
+            st.caption(caption)
+            history.append("assistant", reply, metrics, caption)
+        trace.set(prompt_tokens=metrics.get("prompt_tokens"), response_tokens=estimate_tokens(reply),
+                  ttft_s=metrics["ttft_s"], fast_path=metrics["fast_path"], streamed=metrics["streamed"])
 
-    st.session_state.messages.append({"role": "assistant", "content": reply})
-    display_chat_message(reply)
+# Satisfaction rating for the latest reply
+if get_analytics() is not None and history.messages and history.messages[-1]["role"] == "assistant":
+    message_number = len(history) + history.compacted
+    rating = st.feedback("thumbs", key=f"rating_{message_number}")
+    if rating is not None and st.session_state.get("rated_message") != message_number:
+        st.session_state.rated_message = message_number
+        track_event(USER_SATISFACTION_RATING, rating="up" if rating == 1 else "down", message_number=message_number)
 
 # Footer
 st.markdown("---")
-st.markdown("*Running on `microsoft/phi-3-mini-4k-instruct` via Hugging Face Inference API.*")
+st.markdown(f"*Running on `{get_model_backend().model_id}` via {get_model_backend().name}.*")
@@ -3,18 +3,56 @@ Section 3: Prompt Engineering Approach for GreenThumb Goods
 This script implements two distinct prompt engineering strategies for handling complex customer queries.
 """
 
+import argparse
 import json
 import os
 import sys
-import random
-from openai import OpenAI
 
-# Import configuration
+from context_assembly import assemble_context, report_token_savings
+from evaluation_engine import evaluate, format_report
+from failover_router import FailoverRouter
+from fast_path_router import FastPathRouter
+from few_shot_index import load_or_build_index
+from intent_classifier import load_or_train_classifier
+from model_backends import OpenAIBackend, create_backend
+from section1_dataset import policies, products
+from rate_scheduler import rate_scheduler_from_env
+from response_cache import get_default_cache, make_cache_key
+from tracing import tracer_from_env
+
+# Make config.py importable (the OpenAI backend reads OPENAI_API_KEY from it on first use)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import OPENAI_API_KEY
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Model settings used for every evaluation call
+OPENAI_MODEL = "gpt-3.5-turbo"
+OPENAI_TEMPERATURE = 0.7
+OPENAI_MAX_TOKENS = 500
+
+# Create the model backend: "openai" (set OPENAI_BASE_URL to use a local stub server) or "local" (offline),
+# optionally behind a FailoverRouter that hedges to and fails over to a fallback backend
+def make_backend(name, fallback=None):
+    if name == "openai":
+        backend = OpenAIBackend(OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS)
+    else:
+        backend = create_backend(name, temperature=OPENAI_TEMPERATURE, max_tokens=OPENAI_MAX_TOKENS)
+    if fallback:
+        return FailoverRouter([backend, make_backend(fallback)])
+    return backend
+
+# Backend used for every call (clients are created on first use); --backend/--fallback-backend override it
+model_backend = make_backend(os.getenv("GREENTHUMB_BACKEND", "openai"), os.getenv("GREENTHUMB_FALLBACK_BACKEND"))
+
+# Shared on-disk response cache (None when disabled with GREENTHUMB_CACHE=0 or --no-cache)
+response_cache = get_default_cache()
+
+# Provider budget shared with the Streamlit app (GREENTHUMB_RATE_RPM/TPM); evaluation calls run at batch priority
+rate_scheduler = rate_scheduler_from_env()
+
+# Answers single-intent policy questions without an API call
+fast_path_router = FastPathRouter()
+
+# Request tracing (GREENTHUMB_TRACE_FILE / GREENTHUMB_METRICS_PORT; a no-op unless configured)
+tracer = tracer_from_env()
 
 # Load the dataset
 def load_dataset(file_path):
@@ -24,7 +62,7 @@ def load_dataset(file_path):
     return data
 
 # Strategy A: Zero-shot with detailed instructions and context
-def create_zero_shot_prompt(query, product_info, policy_info):
+def create_zero_shot_prompt(query, product_info, policy_info, token_budget=None):
     """
     Create a zero-shot prompt with detailed instructions and context.
     
@@ -32,16 +70,14 @@ def create_zero_shot_prompt(query, product_info, policy_info):
         query: The customer query
         product_info: Dictionary containing product information
         policy_info: Dictionary containing policy information
+        token_budget: If set, include only the policies, products and categories the query
+            touches, within this many context tokens (None includes everything)
     
     Returns:
         A formatted prompt string
     """
-    prompt = f"""You are a customer service AI assistant for GreenThumb Goods, a company specializing in gardening supplies and sustainable products. Your task is to provide helpful, accurate, and friendly responses to customer queries.
-
-COMPANY CONTEXT:
-GreenThumb Goods is committed to sustainability and offers a wide range of eco-friendly gardening products and home goods. The company values customer satisfaction and environmental responsibility.
-
-AVAILABLE PRODUCT CATEGORIES:
+    if token_budget is None:
+        context = f"""AVAILABLE PRODUCT CATEGORIES:
 - Plants (herb kits, succulents, seedlings, etc.)
 - Tools (garden tools, lights, composting equipment, etc.)
 - Soil & Fertilizers (organic soils, natural fertilizers, etc.)
@@ -52,7 +88,16 @@ COMPANY POLICIES:
 2. Shipping: {policy_info['shipping']}
 3. Sustainability: {policy_info['sustainability']}
 4. Rewards Program: {policy_info['rewards']}
-5. Warranty: {policy_info['warranty']}
+5. Warranty: {policy_info['warranty']}"""
+    else:
+        context = assemble_context(query, product_info, policy_info, token_budget)["text"]
+    
+    prompt = f"""You are a customer service AI assistant for GreenThumb Goods, a company specializing in gardening supplies and sustainable products. Your task is to provide helpful, accurate, and friendly responses to customer queries.
+
+COMPANY CONTEXT:
+GreenThumb Goods is committed to sustainability and offers a wide range of eco-friendly gardening products and home goods. The company values customer satisfaction and environmental responsibility.
+
+{context}
 
 INSTRUCTIONS:
 - Identify all intents in the customer's query (product inquiries, policy questions, etc.)
@@ -70,17 +115,23 @@ Please provide a comprehensive response addressing all aspects of the customer's
     return prompt
 
 # Strategy B: Few-shot learning with examples
-def create_few_shot_prompt(query, examples):
+def create_few_shot_prompt(query, examples=None, index=None, k=3, intents=None):
     """
     Create a few-shot prompt with examples.
     
     Args:
         query: The customer query
-        examples: List of example query-response pairs
+        examples: List of example query-response pairs (retrieved from index if None)
+        index: FewShotIndex used to pick the k most relevant examples for this query
+        k: Number of examples to retrieve from the index
+        intents: Optional intents of the query, used to favour examples with the same intents
     
     Returns:
         A formatted prompt string
     """
+    if examples is None:
+        examples = index.search(query, k=k, intents=intents)
+    
     prompt = """You are a customer service AI assistant for GreenThumb Goods, a company specializing in gardening supplies and sustainable products. Your task is to provide helpful, accurate, and friendly responses to customer queries.
 
 Here are some examples of how to respond to complex customer queries:
@@ -97,17 +148,26 @@ Here are some examples of how to respond to complex customer queries:
     return prompt
 
 # Select challenging queries for testing
-def select_challenging_queries(dataset, n=5):
+def select_challenging_queries(dataset, n=5, classifier=None):
     """
     Select n challenging multi-intent queries from the dataset.
     
     Args:
         dataset: The full dataset
         n: Number of queries to select
+        classifier: Optional IntentClassifier used to label records that have no intents
     
     Returns:
         List of selected queries
     """
+    unlabelled = [item for item in dataset if not item.get('intents')]
+    if classifier is not None and unlabelled:
+        # Label copies so the caller's records are left untouched
+        predicted = classifier.predict([item['query'] for item in unlabelled])
+        labelled = {id(item): {**item, 'intents': labels} for item, labels in zip(unlabelled, predicted)}
+        dataset = [labelled.get(id(item), item) for item in dataset]
+    dataset = [item for item in dataset if item.get('intents')]
+    
     # Filter for queries with at least 2 intents
     complex_queries = [item for item in dataset if len(item['intents']) >= 2]
     
@@ -120,29 +180,93 @@ def select_challenging_queries(dataset, n=5):
     return selected
 
 # Get response from OpenAI API
-def get_openai_response(prompt):
+def get_openai_response(prompt, query=None):
     """
     Get a response from the OpenAI API.
     
     Args:
         prompt: The formatted prompt
+        query: The raw customer query; if given, pure policy questions are answered directly
     
     Returns:
-        The response from the API
+        The response from the API (or the fast-path policy answer)
     """
+    if query is not None:
+        fast_reply = fast_path_router.answer(query)
+        if fast_reply is not None:
+            return fast_reply
+    
+    cache_key = make_cache_key(model_backend.model_id, prompt, model_backend.temperature, model_backend.max_tokens)
+    if response_cache is not None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=500
-        )
-        return response.choices[0].message.content
+        content = model_backend.generate(prompt)
     except Exception as e:
-        return f"Error calling OpenAI API: {str(e)}\n\nThis would normally return a response from the OpenAI API. Please ensure your API key is set correctly in config.py."
+        return format_openai_error(e)
+    
+    # Only successful responses are cached
+    if response_cache is not None:
+        response_cache.set(cache_key, content)
+    return content
+
+# Get response from OpenAI API without blocking the event loop
+async def get_openai_response_async(prompt):
+    """
+    Get a response from the OpenAI API asynchronously.
+    
+    Unlike get_openai_response, errors are raised so the evaluation engine can count them.
+    
+    Args:
+        prompt: The formatted prompt
+    
+    Returns:
+        The response from the API
+    """
+    cache_key = make_cache_key(model_backend.model_id, prompt, model_backend.temperature, model_backend.max_tokens)
+    if response_cache is not None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    content = await model_backend.agenerate(prompt)
+    if response_cache is not None:
+        response_cache.set(cache_key, content)
+    return content
+
+def format_openai_error(error):
+    """Format an OpenAI API error as the placeholder response text."""
+    return f"Error calling OpenAI API: {str(error)}\n\nThis would normally return a response from the OpenAI API. Please ensure your API key is set correctly in config.py."
+
+# Parse command-line options for the evaluation run
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Test zero-shot and few-shot prompt strategies.")
+    parser.add_argument("--num-queries", type=int, default=5, help="Number of challenging queries to evaluate")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum OpenAI calls in flight")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests-per-minute budget")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens-per-minute budget")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+    parser.add_argument("--backend", choices=["openai", "huggingface", "local"], default=None,
+                        help="Model backend (default: GREENTHUMB_BACKEND or openai); local runs offline")
+    parser.add_argument("--fallback-backend", choices=["openai", "huggingface", "local"], default=None,
+                        help="Secondary backend for hedged requests and failover (default: GREENTHUMB_FALLBACK_BACKEND)")
+    parser.add_argument("--few-shot-k", type=int, default=3, help="Few-shot examples retrieved per query")
+    parser.add_argument("--context-budget", type=int, default=400,
+                        help="Token budget for zero-shot context; only relevant policies/products are included (0 = full context)")
+    return parser.parse_args(argv)
 
 # Main function to test prompt strategies
-def main():
+def main(argv=None):
+    global response_cache, model_backend
+    args = parse_args(argv)
+    if args.no_cache:
+        response_cache = None
+    if args.backend or args.fallback_backend:
+        model_backend = make_backend(args.backend or os.getenv("GREENTHUMB_BACKEND", "openai"),
+                                     args.fallback_backend or os.getenv("GREENTHUMB_FALLBACK_BACKEND"))
+    
     # Set up output directory
     output_dir = os.path.dirname(os.path.abspath(__file__))
     dataset_path = os.path.join(output_dir, 'greenthumb_dataset.json')
@@ -159,61 +283,82 @@ def main():
     print("Loading dataset...")
     dataset = load_dataset(dataset_path)
     
-    # Product and policy information
-    product_info = {
-        "plants": [
-            {"name": "Organic Herb Garden Starter Kit", "price": 29.99, "description": "Complete kit with 6 herb varieties, organic soil, and biodegradable pots"},
-            {"name": "Indoor Succulent Collection", "price": 34.99, "description": "Set of 5 low-maintenance succulents in decorative ceramic pots"}
-        ],
-        "tools": [
-            {"name": "Ergonomic Garden Tool Set", "price": 49.99, "description": "Set of 3 ergonomic hand tools with sustainable bamboo handles"},
-            {"name": "Compost Tumbler", "price": 129.99, "description": "Dual-chamber compost tumbler with 80-gallon capacity"}
-        ]
-    }
-    
-    policy_info = {
-        "returns": "GreenThumb Goods offers a 30-day satisfaction guarantee on all products. Plants and perishable items must be returned within 7 days with proof of purchase.",
-        "shipping": "Free shipping on orders over $50 within the continental US. Standard shipping (3-5 business days) is $5.99.",
-        "sustainability": "All GreenThumb Goods packaging is either recyclable, biodegradable, or made from recycled materials.",
-        "rewards": "GreenThumb Rewards members earn 1 point per dollar spent. 100 points can be redeemed for a $5 discount.",
-        "warranty": "Garden tools carry a 2-year warranty against manufacturing defects. Electronic items have a 1-year warranty."
-    }
+    # Product and policy information (the full catalog and policy texts, pruned per query)
+    product_info = products
+    policy_info = policies
+    
+    context_budget = args.context_budget or None
+    if context_budget:
+        savings = report_token_savings(
+            [item['query'] for item in dataset],
+            lambda q: create_zero_shot_prompt(q, product_info, policy_info),
+            lambda q: create_zero_shot_prompt(q, product_info, policy_info, context_budget)
+        )
+        print(f"Relevance-pruned context saves {savings['mean_saved']:.0f} tokens per zero-shot prompt "
+              f"({savings['saved_fraction']:.0%} of {savings['full_tokens']} tokens across {savings['prompts']} dataset queries)")
+    
+    # Share of dataset traffic the fast path would answer without a model call
+    for item in dataset:
+        fast_path_router.answer(item['query'])
+    route_stats = fast_path_router.stats()
+    print(f"Fast path answers {route_stats['fast_path']} of {route_stats['queries']} dataset queries directly "
+          f"({route_stats['fast_path_share']:.0%}); the rest need the model")
     
     # Select challenging queries
     print("Selecting challenging queries...")
-    challenging_queries = select_challenging_queries(dataset)
-    
-    # Select examples for few-shot learning
-    few_shot_examples = random.sample(dataset, 3)
+    classifier = load_or_train_classifier([item for item in dataset if item.get('intents')])
+    challenging_queries = select_challenging_queries(dataset, args.num_queries, classifier)
     
-    # Test both strategies
-    print("Testing prompt strategies...")
-    results = []
+    # Index the dataset so each query gets its own most relevant few-shot examples
+    index_path = os.path.join(os.path.dirname(dataset_path), 'few_shot_index.npz')
+    few_shot_index = load_or_build_index(dataset, index_path)
     
+    # Build every (query, strategy) pair up front so they can be evaluated concurrently
+    # Strategy A: Zero-shot with detailed instructions
+    # Strategy B: Few-shot learning with examples
+    # Each job's trace starts with its prompt build and is finished by the evaluation engine
+    jobs = []
     for i, query_item in enumerate(challenging_queries):
         query = query_item['query']
-        print(f"\nQuery {i+1}: {query}")
-        
-        # Strategy A: Zero-shot with detailed instructions
-        print("Testing Strategy A: Zero-shot with detailed instructions...")
-        zero_shot_prompt = create_zero_shot_prompt(query, product_info, policy_info)
-        zero_shot_response = get_openai_response(zero_shot_prompt)
-        
-        # Strategy B: Few-shot learning with examples
-        print("Testing Strategy B: Few-shot learning with examples...")
-        few_shot_prompt = create_few_shot_prompt(query, few_shot_examples)
-        few_shot_response = get_openai_response(few_shot_prompt)
-        
-        # Store results
-        results.append({
-            "query": query,
-            "intents": query_item['intents'],
-            "zero_shot_prompt": zero_shot_prompt,
-            "zero_shot_response": zero_shot_response,
-            "few_shot_prompt": few_shot_prompt,
-            "few_shot_response": few_shot_response
+        trace = tracer.request("evaluation", strategy="zero_shot", query_index=i)
+        with trace.span("prompt_build"):
+            zero_shot_prompt = create_zero_shot_prompt(query, product_info, policy_info, context_budget)
+        jobs.append({"index": i, "strategy": "zero_shot", "prompt": zero_shot_prompt, "trace": trace})
+        trace = tracer.request("evaluation", strategy="few_shot", query_index=i)
+        with trace.span("prompt_build"):
+            few_shot_prompt = create_few_shot_prompt(query, index=few_shot_index, k=args.few_shot_k, intents=query_item['intents'])
+        jobs.append({"index": i, "strategy": "few_shot", "prompt": few_shot_prompt, "trace": trace})
+    
+    # Test both strategies
+    print(f"Testing prompt strategies ({len(jobs)} calls, concurrency {args.concurrency})...")
+    records, stats = evaluate(
+        jobs, get_openai_response_async,
+        concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm, max_tokens=OPENAI_MAX_TOKENS,
+        scheduler=rate_scheduler, cleanup=model_backend.aclose
+    )
+    
+    # Store results
+    results = [{"query": item['query'], "intents": item['intents']} for item in challenging_queries]
+    for record in records:
+        response = record['response'] if record['error'] is None else format_openai_error(record['error'])
+        results[record['index']].update({
+            f"{record['strategy']}_prompt": record['prompt'],
+            f"{record['strategy']}_response": response,
+            f"{record['strategy']}_latency_s": record['latency']
         })
     
+    for i, result in enumerate(results):
+        print(f"\nQuery {i+1}: {result['query']}")
+    
+    print("\nEvaluation throughput:")
+    print(format_report(stats))
+    if tracer.enabled:
+        print("Time per step (mean): " + ", ".join(
+            f"{span} {mean_ms:.1f} ms" for request, span, count, mean_ms in tracer.span_summary() if request == "evaluation"))
+    if response_cache is not None:
+        cache_stats = response_cache.stats()
+        print(f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['entries']} entries on disk)")
+    
     # Save results
     results_path = os.path.join(output_dir, 'prompt_engineering_results.json')
     with open(results_path, 'w') as f:
@@ -223,10 +368,10 @@ def main():
     
     # Display example prompts
     print("\nExample Zero-Shot Prompt:")
-    print(create_zero_shot_prompt("I'm interested in starting a herb garden. What products do you recommend? Also, what's your return policy?", product_info, policy_info))
+    print(create_zero_shot_prompt("I'm interested in starting a herb garden. What products do you recommend? Also, what's your return policy?", product_info, policy_info, context_budget))
     
     print("\nExample Few-Shot Prompt:")
-    print(create_few_shot_prompt("I'm interested in starting a herb garden. What products do you recommend? Also, what's your return policy?", few_shot_examples[:2]))
+    print(create_few_shot_prompt("I'm interested in starting a herb garden. What products do you recommend? Also, what's your return policy?", index=few_shot_index, k=2))
     
     return results
 
@@ -0,0 +1,448 @@
+"""
+Near-duplicate answer cache for GreenThumb Goods
+This module serves a stored answer for a query that is phrased differently from an earlier one
+but asks the same thing: queries are normalized into bags of hashed words (stopwords and product names
+dropped, synonyms mapped, suffixes stemmed) and compared by IDF-weighted cosine similarity. An answer
+is reused only when the similarity reaches a length-dependent threshold, the queries mention the same
+products and policies, and they do not differ in a deciding word (a number, a negation or a substituted
+word). Capacity is bounded with LRU eviction.
+
+Usage:
+    python semantic_cache.py --data greenthumb_dataset.json --thresholds 0.6,0.7,0.75,0.8,0.9
+    python semantic_cache.py --paraphrases benchmarks/semantic_paraphrases.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from catalog_index import get_catalog_index
+from context_assembly import detect_policies, detect_products
+from dataset_store import open_dataset_store
+from section1_dataset import products
+from text_features import tokenize
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "greenthumb_dataset.json")
+DEFAULT_PARAPHRASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "semantic_paraphrases.json")
+
+# Words that do not change what is being asked
+STOPWORDS = frozenset("""
+a an the i me my we our you your it its is are was were be been do does did can could would should will
+to of for in on at by with about from and or but if so that this these those there what which who how
+please hi hello hey thanks thank also any some just tell know want like get have has had am
+much many often way best right now here where whose whom why able possible use used thing more need
+take offer product products policy order orders process request getting got good well work works bought up
+""".split())
+
+# Domain synonyms, so "delivery"/"shipping" or "price"/"cost" ask the same thing
+SYNONYMS = {
+    "delivery": "ship", "deliver": "ship", "delivered": "ship", "shipment": "ship", "shipping": "ship",
+    "shipped": "ship", "package": "ship", "price": "cost", "expensive": "cost", "pay": "cost", "charge": "cost",
+    "fee": "cost", "wash": "clean", "include": "contain", "included": "contain", "come": "contain",
+    "comes": "contain", "join": "member", "sign": "member", "become": "member", "membership": "member",
+    "returnable": "return", "refundable": "refund", "recyclable": "recycle", "reusable": "reuse",
+    "available": "stock", "scrap": "waste", "scraps": "waste", "recommend": "suggest", "compatible": "support",
+    "receive": "get", "received": "get", "countries": "international", "country": "international",
+    "internationally": "international", "abroad": "international", "watering": "water", "years": "year",
+    "period": "long", "window": "long", "day": "long", "days": "long", "when": "long"
+}
+
+SUFFIXES = ("ments", "ment", "ings", "ing", "ed", "es", "s")
+
+# Stands in for a query that only names a product ("Tell me about the Compost Tumbler")
+ABOUT_TOKEN = "__about__"
+
+# Words that change the answer whenever only one of two queries has them ("after 10 days" vs "after 40 days")
+NUMBER_WORDS = frozenset("""
+one two three four five six seven eight nine ten eleven twelve twenty thirty forty fifty hundred thousand
+first second third half
+""".split())
+NEGATIONS = frozenset("not no never without except non dont doesnt cant cannot isnt arent wont".split())
+
+# Query length (distinct normalized words) at which SemanticCache.threshold applies unchanged
+REFERENCE_LENGTH = 2
+
+
+def stem(token):
+    """Strip one common suffix and a final "e", so "reused"/"reuse" and "replacement"/"replace" match."""
+    for suffix in SUFFIXES:
+        if len(token) > len(suffix) + 2 and token.endswith(suffix) and not token.endswith("ss"):
+            token = token[:-len(suffix)]
+            break
+    if len(token) > 3 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def normalize_tokens(text):
+    """
+    Reduce a query to the words that say what is asked.
+
+    Product names are dropped (the signature already requires the same products), as are stopwords;
+    the rest is mapped through SYNONYMS and stemmed. A query that only names products becomes
+    [ABOUT_TOKEN].
+    """
+    tokens = tokenize(text)
+    product_positions = {position for start, end, kind, _ in get_catalog_index(products).match(text)
+                         if kind == "product" for position in range(start, end)}
+    normalized = []
+    for position, token in enumerate(tokens):
+        token = token.replace("'s", "").replace("'", "")
+        if position in product_positions or not token or token in STOPWORDS:
+            continue
+        token = SYNONYMS.get(token, token)
+        token = SYNONYMS.get(stem(token), stem(token))
+        if token not in STOPWORDS:  # e.g. "received" -> "get"
+            normalized.append(token)
+    if not normalized and product_positions:
+        normalized.append(ABOUT_TOKEN)
+    return normalized
+
+
+def query_vector(text, n_features=2 ** 12):
+    """
+    Embed a query as a binary bag of hashed normalized words (word order is ignored).
+
+    Args:
+        text: Query text
+        n_features: Vector size (hash buckets)
+
+    Returns:
+        float32 NumPy array of length n_features (all zeros for an empty query)
+    """
+    vector = np.zeros(n_features, dtype=np.float32)
+    # Binary weights: a word repeated in several clauses must not outweigh the others
+    for token in normalize_tokens(text):
+        vector[zlib.crc32(token.encode("utf-8")) % n_features] = 1.0
+    return vector
+
+
+def conflicting(tokens_a, tokens_b):
+    """
+    Tell whether two normalized queries differ in a word that decides the answer.
+
+    That is a number or negation present in only one of them, or a substitution: each query has
+    a word the other lacks (Canada/Mexico, rain/misuse, dogs/children). Synonyms are already
+    mapped to one word, so only extra words on one side ("garden tools" vs "tools") are tolerated.
+    """
+    only_a, only_b = tokens_a - tokens_b, tokens_b - tokens_a
+    if any(token in NUMBER_WORDS or token in NEGATIONS or any(c.isdigit() for c in token) for token in only_a | only_b):
+        return True
+    return bool(only_a and only_b)
+
+
+def query_signature(text, namespace=""):
+    """Products and policies a query mentions (plus a namespace such as the prompt mode); answers are only shared within a signature."""
+    mentioned = frozenset(product["name"] for _, product in detect_products(text, products))
+    return (namespace, mentioned, frozenset(detect_policies(text)))
+
+
+class SemanticCache:
+    """
+    In-memory similarity cache shared by every session in the process.
+
+    Vectors live in one preallocated matrix (capacity x n_features); entries are grouped by
+    signature so a lookup only scores entries that mention the same products and policies.
+    Similarity is cosine over IDF-weighted words, with document frequencies taken from the stored
+    queries, so a word the cache has rarely seen counts for more than a common one. A candidate
+    is a hit when its similarity reaches the threshold required for the longer query (see
+    required_similarity) and the two queries do not conflict (see conflicting).
+
+    Args:
+        capacity: Maximum number of stored answers (least recently used are evicted)
+        threshold: Minimum cosine similarity for a hit between short queries
+        ttl: Seconds an answer stays valid (None for no expiry)
+        n_features: Hashed vector size
+    """
+
+    def __init__(self, capacity=1000, threshold=0.75, ttl=None, n_features=2 ** 12):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.n_features = n_features
+        self._vectors = np.zeros((capacity, n_features), dtype=np.float32)
+        self._df = np.zeros(n_features, dtype=np.int32)
+        self._entries = OrderedDict()  # slot -> {"query", "tokens", "answer", "signature", "created"}, in LRU order
+        self._by_signature = {}  # signature -> set of slots
+        self._free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, slot):
+        entry = self._entries.pop(slot)
+        slots = self._by_signature[entry["signature"]]
+        slots.discard(slot)
+        if not slots:
+            del self._by_signature[entry["signature"]]
+        self._df -= self._vectors[slot].astype(np.int32)
+        self._free.append(slot)
+
+    def required_similarity(self, length):
+        """
+        Similarity needed for a hit when the longer query has `length` distinct words.
+
+        One differing word barely moves the cosine of two long queries (0.89 at five words), so
+        the threshold applies to two-word queries and the remaining gap to 1 shrinks in proportion
+        to the length: 0.75 becomes 0.83 at three words and 0.9 at five.
+        """
+        return 1.0 - (1.0 - self.threshold) * min(1.0, REFERENCE_LENGTH / max(length, 1))
+
+    def lookup(self, query, namespace=""):
+        """
+        Find the most similar stored query with the same signature.
+
+        Args:
+            query: Customer query
+            namespace: Keeps answers for different prompt modes (or models) apart
+
+        Returns:
+            Tuple of (answer or None, similarity of the best candidate, that candidate's query or None)
+        """
+        vector = query_vector(query, self.n_features)
+        tokens = frozenset(normalize_tokens(query))
+        signature = query_signature(query, namespace)
+        now = time.time()
+        with self._lock:
+            slots = list(self._by_signature.get(signature, ()))
+            if self.ttl is not None:
+                for slot in [slot for slot in slots if now - self._entries[slot]["created"] > self.ttl]:
+                    self._remove(slot)
+                    slots.remove(slot)
+            best_slot, best = None, 0.0
+            if slots and vector.any():
+                weights = (np.log((1.0 + len(self._entries)) / (1.0 + self._df)) + 1.0) ** 2
+                candidates = self._vectors[slots]
+                scores = (candidates @ (vector * weights)) / np.sqrt((candidates @ weights) * (vector @ weights))
+                # Best candidate that passes the length-dependent bar and does not conflict
+                for position in np.argsort(-scores):
+                    slot, score = slots[position], float(scores[position])
+                    if best_slot is None:
+                        best_slot, best = slot, score
+                    entry = self._entries[slot]
+                    if score < self.required_similarity(max(len(tokens), len(entry["tokens"]))):
+                        continue
+                    if conflicting(tokens, entry["tokens"]):
+                        continue
+                    self._entries.move_to_end(slot)
+                    self.hits += 1
+                    return entry["answer"], score, entry["query"]
+            self.misses += 1
+            return None, best, self._entries[best_slot]["query"] if best_slot is not None else None
+
+    def get(self, query, namespace=""):
+        """Return a stored answer for a near-duplicate query, or None."""
+        return self.lookup(query, namespace)[0]
+
+    def put(self, query, answer, namespace=""):
+        """Store the answer to a query, evicting the least recently used entry if full."""
+        vector = query_vector(query, self.n_features)
+        if not vector.any():
+            return
+        signature = query_signature(query, namespace)
+        with self._lock:
+            if not self._free:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._df += vector.astype(np.int32)
+            self._entries[slot] = {"query": query, "tokens": frozenset(normalize_tokens(query)), "answer": answer,
+                                   "signature": signature, "created": time.time()}
+            self._by_signature.setdefault(signature, set()).add(slot)
+
+    def stats(self):
+        """
+        Report cache metrics.
+
+        Returns:
+            Dictionary with entries, capacity, hits, misses, hit_rate and evictions
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+
+def semantic_cache_from_env():
+    """
+    Create a SemanticCache configured from the environment.
+
+    Environment variables:
+        GREENTHUMB_SEMANTIC_CACHE: set to "0" to disable it
+        GREENTHUMB_SEMANTIC_THRESHOLD, GREENTHUMB_SEMANTIC_CAPACITY, GREENTHUMB_SEMANTIC_TTL: settings
+
+    Returns:
+        A SemanticCache, or None when it is disabled
+    """
+    if os.getenv("GREENTHUMB_SEMANTIC_CACHE", "1") == "0":
+        return None
+    ttl = os.getenv("GREENTHUMB_SEMANTIC_TTL")
+    return SemanticCache(capacity=int(os.getenv("GREENTHUMB_SEMANTIC_CAPACITY", "1000")),
+                         threshold=float(os.getenv("GREENTHUMB_SEMANTIC_THRESHOLD", "0.75")),
+                         ttl=float(ttl) if ttl else None)
+
+
+def replay_dataset(records, threshold, capacity, ttl=None):
+    """
+    Replay records through a fresh cache: look each query up, and store its response on a miss.
+
+    A hit counts as mismatched when the record that supplied the answer had different intents,
+    a proxy for serving an answer to a different question.
+
+    Args:
+        records: Iterable of dataset records with "query", "response" and "intents"
+        threshold: Similarity threshold
+        capacity: Cache capacity
+        ttl: Optional answer lifetime in seconds
+
+    Returns:
+        Dictionary with the cache stats, mismatched hits and mean lookup time in microseconds
+    """
+    cache = SemanticCache(capacity=capacity, threshold=threshold, ttl=ttl)
+    intents_by_query = {}
+    mismatched = 0
+    lookup_time = 0.0
+    for record in records:
+        start = time.perf_counter()
+        answer, similarity, matched = cache.lookup(record['query'])
+        lookup_time += time.perf_counter() - start
+        if answer is None:
+            cache.put(record['query'], record['response'])
+            intents_by_query[record['query']] = set(record['intents'])
+        elif intents_by_query.get(matched) != set(record['intents']):
+            mismatched += 1
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    stats["mismatched_hits"] = mismatched
+    stats["lookup_us"] = lookup_time / lookups * 1e6 if lookups else 0.0
+    return stats
+
+
+def load_paraphrases(path=DEFAULT_PARAPHRASE_PATH):
+    """
+    Load an evaluation set: {"paraphrases": [[query, ...], ...], "minimal_pairs": [[query, query], ...]}.
+
+    Each paraphrases group holds phrasings of one question; each minimal pair holds two questions
+    that differ in one deciding detail and must not share an answer.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data["paraphrases"], data.get("minimal_pairs", [])
+
+
+def _pair_hits(pairs, threshold):
+    """Count ordered pairs (a, b) where b hits a cache holding only a."""
+    hits = 0
+    for a, b in pairs:
+        cache = SemanticCache(capacity=1, threshold=threshold)
+        cache.put(a, a)
+        hits += cache.get(b) is not None
+    return hits
+
+
+def evaluate_paraphrases(groups, minimal_pairs, thresholds):
+    """
+    Measure thresholds on paraphrase groups and minimal pairs.
+
+    Every ordered pair is scored by storing one query in an empty cache and looking up the other.
+    Pairs from the same group should hit (recall); pairs from different groups with the same
+    signature and minimal pairs should not (false hits). A replay stores each group's first
+    phrasing in one cache and looks up the rest.
+
+    Args:
+        groups: List of lists of queries
+        minimal_pairs: List of [query, query] pairs that must not share an answer
+        thresholds: Similarity thresholds to evaluate
+
+    Returns:
+        List of dictionaries with threshold, recall, false_hits and negative_pairs (different
+        groups), minimal_pair_hits and minimal_pairs (both directions), and replay_hit_rate
+    """
+    items = [(group, query) for group, queries in enumerate(groups) for query in queries]
+    signatures = {query: query_signature(query) for _, query in items}
+    positives, negatives = [], []
+    for (group_a, a), (group_b, b) in itertools.permutations(items, 2):
+        if group_a == group_b:
+            positives.append((a, b))
+        elif signatures[a] == signatures[b]:
+            negatives.append((a, b))  # pairs with different signatures can never hit
+    minimal = [(a, b) for pair in minimal_pairs for a, b in (pair, pair[::-1])]
+
+    results = []
+    for threshold in thresholds:
+        cache = SemanticCache(capacity=len(items), threshold=threshold)
+        for queries in groups:
+            cache.put(queries[0], queries[0])
+        # A hit only counts if it returns the group's own answer
+        replay_hits = sum(cache.get(query) == queries[0] for queries in groups for query in queries[1:])
+        results.append({
+            "threshold": threshold,
+            "recall": _pair_hits(positives, threshold) / len(positives) if positives else 0.0,
+            "false_hits": _pair_hits(negatives, threshold),
+            "negative_pairs": len(negatives),
+            "minimal_pair_hits": _pair_hits(minimal, threshold),
+            "minimal_pairs": len(minimal),
+            "replay_hit_rate": replay_hits / sum(len(queries) - 1 for queries in groups)
+        })
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a dataset through the semantic cache and report hit rates.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Dataset: .json, .jsonl or a directory of .jsonl shards")
+    parser.add_argument("--thresholds", default="0.6,0.7,0.75,0.8,0.9", help="Comma-separated similarity thresholds")
+    parser.add_argument("--capacity", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N records")
+    parser.add_argument("--paraphrases", default=None,
+                        help=f"Evaluate on paraphrase groups and minimal pairs instead, e.g. {DEFAULT_PARAPHRASE_PATH}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    thresholds = [float(value) for value in args.thresholds.split(",")]
+    if args.paraphrases:
+        groups, minimal_pairs = load_paraphrases(args.paraphrases)
+        print(f"{sum(map(len, groups))} phrasings of {len(groups)} questions, {len(minimal_pairs)} minimal pairs")
+        print(f"{'threshold':>9} {'recall':>7} {'false hits':>12} {'minimal-pair hits':>18} {'replay hit rate':>16}")
+        for result in evaluate_paraphrases(groups, minimal_pairs, thresholds):
+            print(f"{result['threshold']:>9.2f} {result['recall']:>7.0%} "
+                  f"{result['false_hits']:>5} / {result['negative_pairs']:<4} "
+                  f"{result['minimal_pair_hits']:>10} / {result['minimal_pairs']:<5} {result['replay_hit_rate']:>16.0%}")
+        return
+
+    store = open_dataset_store(args.data)
+    count = min(len(store), args.limit or len(store))
+    records = [store[row] for row in range(count)]
+    store.close()
+
+    print(f"Replaying {count} queries (capacity {args.capacity})")
+    print(f"{'threshold':>9} {'hit rate':>9} {'hits':>7} {'mismatched':>11} {'evictions':>10} {'lookup us':>10}")
+    for threshold in thresholds:
+        stats = replay_dataset(records, threshold, args.capacity)
+        print(f"{threshold:>9.2f} {stats['hit_rate']:>9.1%} {stats['hits']:>7} {stats['mismatched_hits']:>11} "
+              f"{stats['evictions']:>10} {stats['lookup_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
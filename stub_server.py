@@ -0,0 +1,262 @@
+"""
+Local stub inference server for GreenThumb Goods
+This script runs a stand-in for the OpenAI and Hugging Face inference endpoints (and an analytics
+collector on /collect) so the assistant can be exercised and benchmarked offline with
+controllable latency and failures.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from token_utils import estimate_tokens
+
+# Default behaviour of the stub
+DEFAULT_CONFIG = {
+    "latency": 0.5,      # Mean seconds spent "generating" each response
+    "jitter": 0.1,       # Uniform +/- jitter applied to the latency
+    "error_rate": 0.0,   # Fraction of requests answered with error_status
+    "error_status": 503, # Status code used for injected failures
+    "slow_rate": 0.0,    # Fraction of requests that take slow_latency instead (cold starts)
+    "slow_latency": 5.0, # Seconds spent on a slow request
+    "stream": True,      # Honour "stream": true with server-sent events
+    "token_delay": 0.02, # Seconds between streamed tokens (latency applies before the first)
+    "seed": None,        # Seed for the latency/failure RNG (None for random)
+    "collector_up": True # Accept analytics batches on /collect (False answers 503, as if the collector were down)
+}
+
+
+def generate_stub_reply(prompt):
+    """
+    Build a deterministic canned reply for a prompt.
+
+    Args:
+        prompt: The prompt text sent to the stub
+
+    Returns:
+        Reply text that is stable for identical prompts
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    # Quote the last meaningful line, skipping trailing role markers such as "Assistant:"
+    lines = [line.strip() for line in prompt.splitlines() if line.strip() and not line.strip().endswith(":")]
+    last_line = lines[-1] if lines else ""
+    return (
+        "Thank you for reaching out to GreenThumb Goods! "
+        f"This is a stub response (ref {digest}) to: {last_line[:200]} "
+        "Please let me know if you have any other questions!"
+    )
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the OpenAI chat and Hugging Face inference APIs."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        return json.loads(body or b"{}")
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate_work(self):
+        """Sleep for the configured latency; return True if this request should fail."""
+        config = self.server.config
+        with self.server.rng_lock:
+            jitter = self.server.rng.uniform(-config["jitter"], config["jitter"])
+            fail = self.server.rng.random() < config["error_rate"]
+            slow = self.server.rng.random() < config["slow_rate"]
+        time.sleep(config["slow_latency"] if slow else max(0.0, config["latency"] + jitter))
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+            if fail:
+                self.server.stats["errors"] += 1
+        return fail
+
+    def _send_injected_error(self):
+        status = self.server.config["error_status"]
+        self._send_json(status, {"error": "Model is currently loading", "estimated_time": 1.0})
+
+    def do_POST(self):
+        if self.path.split("?")[0].rstrip("/") == "/collect":
+            self._handle_collect()
+            return
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": "Invalid JSON body"})
+            return
+
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            self._handle_chat_completion(payload)
+        elif self.path.startswith("/models/"):
+            self._handle_hf_inference(payload)
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def _handle_chat_completion(self, payload):
+        if self._simulate_work():
+            self._send_injected_error()
+            return
+        prompt = "\n".join(m.get("content", "") for m in payload.get("messages", []))
+        reply = generate_stub_reply(prompt)
+        self._send_json(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": estimate_tokens(prompt),
+                "completion_tokens": estimate_tokens(reply),
+                "total_tokens": estimate_tokens(prompt) + estimate_tokens(reply)
+            }
+        })
+
+    def _handle_hf_inference(self, payload):
+        if self._simulate_work():
+            self._send_injected_error()
+            return
+        prompt = payload.get("inputs", "")
+        reply = generate_stub_reply(prompt)
+        if payload.get("stream") and self.server.config["stream"]:
+            self._stream_tokens(reply)
+        else:
+            self._send_json(200, [{"generated_text": f"{prompt} {reply}"}])
+
+    def _handle_collect(self):
+        """Accept a (possibly gzip-compressed) analytics batch: {"events": [...]}."""
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        if not self.server.config["collector_up"]:
+            self._send_json(503, {"error": "Collector unavailable"})
+            return
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            events = json.loads(body or b"{}").get("events", [])
+        except (OSError, ValueError, AttributeError):
+            self._send_json(400, {"error": "Invalid analytics batch"})
+            return
+        with self.server.stats_lock:
+            self.server.stats["collected_batches"] += 1
+            self.server.stats["collected_events"] += len(events)
+            self.server.collected.extend(events)
+        self._send_json(200, {"accepted": len(events)})
+
+    def _stream_tokens(self, reply):
+        """Send the reply as text-generation-inference style server-sent events."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == 0 else " " + word
+            event = {"token": {"id": i, "text": text, "special": False}, "generated_text": None}
+            if i == len(words) - 1:
+                event["generated_text"] = reply
+            self._write_chunk(f"data:{json.dumps(event)}\n\n".encode("utf-8"))
+            time.sleep(self.server.config["token_delay"])
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog large enough for load tests."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def start_stub_server(host="127.0.0.1", port=0, **config):
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        **config: Overrides for DEFAULT_CONFIG (latency, jitter, error_rate, ...)
+
+    Returns:
+        Tuple of (server, base_url); call server.shutdown() to stop it
+    """
+    server = StubHTTPServer((host, port), StubRequestHandler)
+    server.config = dict(DEFAULT_CONFIG, **config)
+    server.rng = random.Random(server.config["seed"])
+    server.rng_lock = threading.Lock()
+    server.stats = {"requests": 0, "errors": 0, "collected_batches": 0, "collected_events": 0}
+    server.collected = deque(maxlen=10000)  # most recent analytics events received on /collect
+    server.stats_lock = threading.Lock()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
+
+
+def main():
+    """Run the stub server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI and Hugging Face inference APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=DEFAULT_CONFIG["latency"], help="Mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=DEFAULT_CONFIG["jitter"], help="Uniform latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_CONFIG["error_rate"], help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=DEFAULT_CONFIG["error_status"], help="HTTP status for injected failures")
+    parser.add_argument("--slow-rate", type=float, default=DEFAULT_CONFIG["slow_rate"], help="Fraction of requests that are slow (cold starts)")
+    parser.add_argument("--slow-latency", type=float, default=DEFAULT_CONFIG["slow_latency"], help="Latency of a slow request in seconds")
+    parser.add_argument("--token-delay", type=float, default=DEFAULT_CONFIG["token_delay"], help="Seconds between streamed tokens")
+    parser.add_argument("--no-stream", action="store_true", help="Ignore streaming requests (test the blocking fallback)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(
+        args.host, args.port,
+        latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status,
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+        token_delay=args.token_delay, stream=not args.no_stream, seed=args.seed
+    )
+    print(f"Stub server listening on {base_url}")
+    print(f"  OpenAI:       OPENAI_BASE_URL={base_url}/v1")
+    print(f"  Hugging Face: {base_url}/models/<model-id>")
+    print("Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
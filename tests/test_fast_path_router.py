@@ -0,0 +1,48 @@
+"""Routing checks for FastPathRouter: only single-intent, pure policy questions skip the model."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fast_path_router import FastPathRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return FastPathRouter()
+
+
+@pytest.mark.parametrize("query, policy", [
+    ("What's your return policy?", "returns"),
+    ("How long does shipping take?", "shipping"),
+    ("What are the shipping costs?", "shipping"),
+    ("How do I join the rewards program?", "rewards"),
+    ("What is your warranty policy?", "warranty"),
+    ("How do I track my order", "shipping"),
+])
+def test_pure_policy_questions_take_the_fast_path(router, query, policy):
+    decision = router.classify(query)
+    assert decision["route"] == "fast_path"
+    assert decision["policy"] == policy
+
+
+@pytest.mark.parametrize("query, reason", [
+    # A product question joined to a policy question by "and" must not lose its first half
+    ("Do you sell compost tumblers and what is your return policy?", "multi_intent"),
+    ("What is your return policy? Also, how long does shipping take?", "multi_policy"),
+    # A product the catalog does not know is still a product question, not a rewards question
+    ("Do you have discounts on the bonsai tree?", "unresolved_mention"),
+    ("My package arrived damaged, what is your return policy?", "multi_policy"),
+    ("What's your return policy for the Organic Herb Garden Starter Kit?", "product_specific"),
+])
+def test_compound_and_product_questions_go_to_the_model(router, query, reason):
+    decision = router.classify(query)
+    assert decision["route"] == "llm"
+    assert decision["reason"] == reason
+    assert router.answer(query) is None
+
+
+def test_tracking_an_order_is_not_a_complaint(router):
+    assert router.classify("how do I track my order")["reason"] != "complaint"
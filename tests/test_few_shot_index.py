@@ -0,0 +1,37 @@
+"""Persistence checks for FewShotIndex: reloading an unchanged dataset must not change the index."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from few_shot_index import load_or_build_index
+
+RECORDS = [
+    {"query": "Do you ship internationally?", "response": "Yes, to 30 countries.", "intents": ["shipping_inquiry"]},
+    {"query": "What is your return policy?", "response": "30 days for plants.", "intents": ["return_request"]},
+    {"query": "What is your return policy?", "response": "30 days for plants.", "intents": ["return_request"]},
+]
+
+
+def test_reloading_the_same_records_keeps_the_index_unchanged(tmp_path):
+    path = str(tmp_path / "index.npz")
+    first = load_or_build_index(RECORDS, path)
+    df, mtime = first.df.copy(), os.stat(path).st_mtime_ns
+
+    for _ in range(2):
+        index = load_or_build_index(RECORDS, path)
+        changes = index.update(RECORDS)
+        assert changes == {"added": 0, "removed": 0, "reused": len(RECORDS)}
+        assert np.array_equal(index.df, df)
+    assert os.stat(path).st_mtime_ns == mtime  # nothing changed, so the file is not rewritten
+
+
+def test_dropping_a_duplicate_removes_one_copy(tmp_path):
+    path = str(tmp_path / "index.npz")
+    load_or_build_index(RECORDS, path)
+    index = load_or_build_index(RECORDS[:2], path)
+    assert len(index) == 2
+    assert np.array_equal(index.df, load_or_build_index(RECORDS[:2], str(tmp_path / "fresh.npz")).df)
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
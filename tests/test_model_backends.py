@@ -0,0 +1,55 @@
+"""Event-loop lifecycle checks for the async backends: a finished evaluation run must not leave clients open."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evaluation_engine import evaluate
+from failover_router import FailoverRouter
+from model_backends import LocalBackend, OpenAIBackend
+from stub_server import start_stub_server
+
+JOBS = [{"index": i, "prompt": f"Customer query number {i}"} for i in range(4)]
+
+
+@pytest.fixture
+def stub_url():
+    server, base_url = start_stub_server(latency=0.0, jitter=0.0, seed=0)
+    yield f"{base_url}/v1"
+    server.shutdown()
+
+
+def test_each_run_closes_its_openai_client(stub_url):
+    backend = OpenAIBackend(api_key="stub", base_url=stub_url)
+    clients = []
+
+    async def call(prompt):
+        clients.append(backend._async_client())
+        return await backend.agenerate(prompt)
+
+    for _ in range(2):
+        records, _ = evaluate(JOBS, call, cleanup=backend.aclose)
+        assert all(record["error"] is None for record in records)
+    assert len(set(map(id, clients))) == 2  # one client per run's event loop
+    assert all(client.is_closed() for client in clients)
+    assert backend._async_clients == {}
+
+
+def test_clients_of_finished_loops_are_dropped(stub_url):
+    backend = OpenAIBackend(api_key="stub", base_url=stub_url)
+    for _ in range(3):
+        asyncio.run(backend.agenerate("Hello"))
+    assert len(backend._async_clients) == 1  # each run pruned the client of the previous, closed loop
+
+
+def test_failover_router_closes_every_backend(stub_url):
+    # The local primary always fails, so both backends serve every prompt
+    backends = [LocalBackend(latency=0.0, error_rate=1.0, max_concurrency=2), OpenAIBackend(api_key="stub", base_url=stub_url)]
+    router = FailoverRouter(backends, hedge=False)
+    records, _ = evaluate(JOBS, router.agenerate, cleanup=router.aclose)
+    assert all(record["error"] is None for record in records)
+    assert backends[0]._async_slots == {}
+    assert backends[1]._async_clients == {}
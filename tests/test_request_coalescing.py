@@ -0,0 +1,78 @@
+"""Timeout checks for SingleFlight: a follower must not wait forever on a leader that hangs."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from request_coalescing import SingleFlight
+
+
+def start_hung_leader(flight, release, method="do"):
+    """Start a leader whose call blocks until release is set; return once it is in flight."""
+    def hang():
+        release.wait()
+        return "leader reply" if method == "do" else iter(["leader reply"])
+
+    def run():
+        result = getattr(flight, method)("key", hang)
+        if method == "stream":
+            list(result)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    while not flight.in_flight():
+        time.sleep(0.01)
+    return thread
+
+
+def test_follower_falls_back_to_its_own_call_when_the_leader_hangs():
+    flight, release = SingleFlight(wait_timeout=0.2), threading.Event()
+    leader = start_hung_leader(flight, release)
+    try:
+        assert flight.do("key", lambda: "own reply") == "own reply"
+        assert flight.stats()["timeouts"] == 1
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_stream_follower_falls_back_before_any_chunk_arrives():
+    flight, release = SingleFlight(wait_timeout=0.2), threading.Event()
+    leader = start_hung_leader(flight, release, "stream")
+    try:
+        assert list(flight.stream("key", lambda: iter(["own", " reply"]))) == ["own", " reply"]
+        assert flight.stats()["timeouts"] == 1
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_stream_follower_raises_when_the_shared_stream_stalls_midway():
+    flight, release = SingleFlight(wait_timeout=0.2), threading.Event()
+
+    def stalling():
+        yield "first"
+        release.wait()
+        yield " second"
+
+    leader = threading.Thread(target=lambda: list(flight.stream("key", stalling)), daemon=True)
+    leader.start()
+    while not flight.in_flight():
+        time.sleep(0.01)
+    tokens = flight.stream("key", lambda: iter(["unused"]))
+    try:
+        assert next(tokens) == "first"
+        with pytest.raises(TimeoutError):
+            next(tokens)
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_wait_timeout_must_be_positive():
+    with pytest.raises(ValueError):
+        SingleFlight(wait_timeout=0)
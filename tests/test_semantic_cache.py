@@ -0,0 +1,49 @@
+"""Hit/miss checks for SemanticCache: paraphrases share an answer, questions differing in one detail do not."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from semantic_cache import DEFAULT_PARAPHRASE_PATH, SemanticCache, evaluate_paraphrases, load_paraphrases
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Can I return opened fertilizer bags after 10 days for a full refund?",
+     "Can I return opened fertilizer bags after 40 days for a full refund?"),
+    ("Do you ship live plants to Canada in winter months?", "Do you ship live plants to Mexico in winter months?"),
+    ("Does the warranty on garden tools cover rust damage from rain?",
+     "Does the warranty on garden tools cover rust damage from misuse?"),
+    ("Are your organic fertilizers safe around dogs and cats?", "Are your organic fertilizers safe around children and cats?"),
+    ("How long does shipping to Alaska take?", "How long does shipping to Hawaii take?"),
+    ("Can I return a gift with a receipt?", "Can I return a gift without a receipt?"),
+])
+def test_minimal_pairs_do_not_share_an_answer(stored, asked):
+    cache = SemanticCache()
+    cache.put(stored, "stored answer")
+    assert cache.get(asked) is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Can I return tools I bought?", "Are tools returnable?"),
+    ("How long does shipping take?", "When will my order be delivered?"),
+    ("What comes in the Organic Herb Garden Starter Kit?", "What's included in the Organic Herb Garden Starter Kit?"),
+])
+def test_paraphrases_share_an_answer(stored, asked):
+    cache = SemanticCache()
+    cache.put(stored, "stored answer")
+    assert cache.get(asked) == "stored answer"
+
+
+def test_default_threshold_has_no_false_hits_on_the_benchmark_set():
+    groups, minimal_pairs = load_paraphrases(DEFAULT_PARAPHRASE_PATH)
+    result, = evaluate_paraphrases(groups, minimal_pairs, [SemanticCache().threshold])
+    assert result["false_hits"] == 0
+    assert result["minimal_pair_hits"] == 0
+    assert result["replay_hit_rate"] > 0.5
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        SemanticCache(capacity=0)
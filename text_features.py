@@ -0,0 +1,67 @@
+"""
+Hashed text features for GreenThumb Goods
+Tokenization and hashed word n-gram features shared by retrieval, classification and caching.
+Hashing uses CRC32 so feature ids are stable across processes and runs.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Default dimensionality of the hashed feature space
+DEFAULT_N_FEATURES = 2 ** 18
+
+
+def tokenize(text):
+    """Lowercase and split text into word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def extract_ngrams(tokens, ngram_range=(1, 2)):
+    """
+    Build word n-grams from tokens.
+
+    Args:
+        tokens: List of word tokens
+        ngram_range: Inclusive (min_n, max_n) n-gram sizes
+
+    Returns:
+        List of n-gram strings (words joined with a space)
+    """
+    min_n, max_n = ngram_range
+    ngrams = []
+    for n in range(min_n, max_n + 1):
+        if n == 1:
+            ngrams.extend(tokens)
+        else:
+            ngrams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    return ngrams
+
+
+def hash_feature(feature, n_features=DEFAULT_N_FEATURES):
+    """Map a feature string to a stable bucket in [0, n_features)."""
+    return zlib.crc32(feature.encode("utf-8")) % n_features
+
+
+def hashed_counts(text, n_features=DEFAULT_N_FEATURES, ngram_range=(1, 2)):
+    """
+    Compute sparse hashed n-gram counts for a text.
+
+    Args:
+        text: Input text
+        n_features: Size of the hashed feature space
+        ngram_range: Inclusive (min_n, max_n) n-gram sizes
+
+    Returns:
+        Tuple of (sorted unique feature indices as int32, counts as float32)
+    """
+    crc32 = zlib.crc32
+    hashes = [crc32(ngram.encode("utf-8")) for ngram in extract_ngrams(tokenize(text), ngram_range)]
+    if not hashes:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    buckets = (np.array(hashes, dtype=np.int64) % n_features).astype(np.int32)
+    indices, counts = np.unique(buckets, return_counts=True)
+    return indices, counts.astype(np.float32)
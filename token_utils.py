@@ -0,0 +1,25 @@
+"""
+Token utilities for GreenThumb Goods
+Lightweight token estimation shared by rate limiting, prompt budgeting and reporting.
+"""
+
+# Average number of characters per token for English text with GPT-style tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a piece of text.
+
+    This is a fast approximation (roughly four characters per token) that avoids
+    a tokenizer dependency. It is accurate enough for budgeting and rate limiting.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        Estimated token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
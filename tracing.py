@@ -0,0 +1,365 @@
+"""
+Request tracing and metrics for GreenThumb Goods
+This module records a trace per assistant request with timed spans (prompt build, backend call,
+post-processing, render) and token counts, aggregates them into counters and histograms, and
+exports traces to a JSONL file and metrics in Prometheus text format over a local HTTP endpoint.
+When tracing is disabled every call goes to a shared no-op object.
+
+Configuration (environment variables):
+    GREENTHUMB_TRACE_FILE: Append one JSON line per finished request to this file
+    GREENTHUMB_METRICS_PORT: Serve Prometheus metrics on http://127.0.0.1:<port>/metrics
+    GREENTHUMB_TRACING=1: Keep in-memory metrics only (the others imply this)
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets for durations (seconds) and token counts
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+# Trace attributes that are token counts, with the "kind" label they are recorded under
+TOKEN_ATTRIBUTES = {"prompt_tokens": "prompt", "response_tokens": "response"}
+
+
+def _format_labels(label_names, key, extra=None):
+    pairs = list(zip(label_names, key)) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, description, label_names=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels (Prometheus semantics)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, description, label_names=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def summary(self):
+        """Return {label key: (count, sum)} for every series."""
+        with self._lock:
+            return {key: (sum(series[:-1]), series[-1]) for key, series in self.series.items()}
+
+    def render(self):
+        lines = []
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self.series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters and histograms, rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, description, label_names, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, description, label_names, **kwargs)
+            return metric
+
+    def counter(self, name, description, label_names=()):
+        return self._get_or_create(Counter, name, description, label_names)
+
+    def histogram(self, name, description, label_names=(), buckets=DURATION_BUCKETS):
+        return self._get_or_create(Histogram, name, description, label_names, buckets=buckets)
+
+    def render_prometheus(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class Span:
+    """Times one step of a trace; use as a context manager."""
+
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.trace.spans.append({
+            "name": self.name,
+            "offset_ms": (self.start - self.trace.started) * 1000,
+            "duration_ms": (end - self.start) * 1000,
+            "error": exc_type.__name__ if exc_type else None
+        })
+        return False
+
+
+class Trace:
+    """
+    One request: a list of timed spans plus attributes (token counts, mode, ...).
+
+    Use as a context manager; the trace is exported when the block exits. An exception
+    escaping the block marks the trace status as "error".
+    """
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes)
+        self.spans = []
+        self.status = "ok"
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+
+    def span(self, name):
+        """Return a context manager timing one step of this request."""
+        return Span(self, name)
+
+    def add_span(self, name, seconds, offset_seconds=None):
+        """Record a step timed elsewhere (e.g. time to first token of a stream)."""
+        if offset_seconds is None:
+            offset_seconds = time.perf_counter() - self.started - seconds
+        self.spans.append({"name": name, "offset_ms": offset_seconds * 1000, "duration_ms": seconds * 1000, "error": None})
+
+    def set(self, **attributes):
+        """Attach attributes (e.g. prompt_tokens=120) to the trace."""
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        """Mark the request as failed without raising (e.g. an error turned into a reply)."""
+        self.status = "error"
+        self.attributes["error"] = type(error).__name__ if isinstance(error, BaseException) else str(error)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.fail(exc)
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+        self.tracer.finish(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+            "spans": self.spans
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _NoopTrace:
+    """Stand-in returned by a disabled tracer; every method does nothing."""
+
+    __slots__ = ()
+    trace_id = None
+
+    def span(self, name):
+        return NOOP_SPAN
+
+    def add_span(self, name, seconds, offset_seconds=None):
+        pass
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+NOOP_TRACE = _NoopTrace()
+
+
+class Tracer:
+    """
+    Creates traces and aggregates finished ones into metrics.
+
+    Args:
+        enabled: When False, request() returns a shared no-op trace
+        jsonl_path: Optional file that receives one JSON line per finished trace
+        registry: MetricsRegistry to record into (a new one by default)
+    """
+
+    def __init__(self, enabled=True, jsonl_path=None, registry=None):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.registry = registry or MetricsRegistry()
+        self._file = None
+        self._file_lock = threading.Lock()
+        self.metrics_server = None
+
+        self.requests = self.registry.counter(
+            "greenthumb_requests_total", "Finished assistant requests", ("request", "status"))
+        self.request_seconds = self.registry.histogram(
+            "greenthumb_request_duration_seconds", "End-to-end request duration", ("request",))
+        self.span_seconds = self.registry.histogram(
+            "greenthumb_span_duration_seconds", "Duration of each request step", ("request", "span"))
+        self.tokens = self.registry.counter(
+            "greenthumb_tokens_total", "Estimated prompt and response tokens", ("request", "kind"))
+        self.token_sizes = self.registry.histogram(
+            "greenthumb_tokens", "Estimated tokens per prompt / response", ("request", "kind"), TOKEN_BUCKETS)
+
+    def request(self, name, **attributes):
+        """Start a trace for one request (use as a context manager)."""
+        if not self.enabled:
+            return NOOP_TRACE
+        return Trace(self, name, attributes)
+
+    def finish(self, trace):
+        """Record a finished trace in the metrics and the JSONL file."""
+        self.requests.inc(request=trace.name, status=trace.status)
+        self.request_seconds.observe(trace.duration_ms / 1000, request=trace.name)
+        for span in trace.spans:
+            self.span_seconds.observe(span["duration_ms"] / 1000, request=trace.name, span=span["name"])
+        for attribute, kind in TOKEN_ATTRIBUTES.items():
+            if trace.attributes.get(attribute) is not None:
+                self.tokens.inc(trace.attributes[attribute], request=trace.name, kind=kind)
+                self.token_sizes.observe(trace.attributes[attribute], request=trace.name, kind=kind)
+        if self.jsonl_path:
+            line = json.dumps(trace.to_dict(), default=str) + "\n"
+            with self._file_lock:
+                if self._file is None:
+                    self._file = open(self.jsonl_path, "a", buffering=1)
+                self._file.write(line)
+
+    def span_summary(self):
+        """
+        Mean duration of each (request, span) pair.
+
+        Returns:
+            List of (request, span, count, mean milliseconds), sorted by request and span
+        """
+        return sorted(
+            (request, span, count, total / count * 1000)
+            for (request, span), (count, total) in self.span_seconds.summary().items() if count
+        )
+
+    def start_metrics_server(self, port, host="127.0.0.1"):
+        """Serve the registry at http://host:port/metrics on a background thread."""
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.metrics_server = server
+        return server
+
+    def close(self):
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server = None
+
+
+def tracer_from_env():
+    """Create a Tracer configured by GREENTHUMB_TRACE_FILE, GREENTHUMB_METRICS_PORT and GREENTHUMB_TRACING."""
+    jsonl_path = os.getenv("GREENTHUMB_TRACE_FILE") or None
+    port = os.getenv("GREENTHUMB_METRICS_PORT")
+    enabled = bool(jsonl_path or port or os.getenv("GREENTHUMB_TRACING", "0") not in ("", "0"))
+    tracer = Tracer(enabled, jsonl_path)
+    if enabled and port:
+        try:
+            tracer.start_metrics_server(int(port))
+        except OSError as e:
+            print(f"Metrics endpoint not started on port {port}: {e}")
+    return tracer